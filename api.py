@@ -4,19 +4,64 @@ GET /books, POST /books, DELETE /books/{isbn}
 
 from __future__ import annotations
 
-from fastapi import FastAPI, HTTPException, status
-from fastapi.responses import FileResponse
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Header, HTTPException, Query, Response, status
+from fastapi.responses import FileResponse, JSONResponse
 from pydantic import BaseModel
 from typing import Optional, List
 from pathlib import Path
 
+from covers import CoverCache
+from jobs import JobQueue, QueueFull
 from library import Library, Book
+from metrics import MetricsMiddleware, metrics_response
 from open_library import OpenLibraryClient
+from profiling import Profiler, ProfilingMiddleware
+from refresher import Refresher
+from storage import storage_from_env
+from tracing import TracingMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # API_PRELOAD=1 (run_api.py --prod): arama/tamamlama indeksleri ilk istekte değil açılışta kurulur
+    if os.getenv("API_PRELOAD") == "1":
+        lib.preload()
+    # REFRESH_ENABLED=1: eksik/eski kitap bilgileri arka planda Open Library'den yenilenir
+    if os.getenv("REFRESH_ENABLED") == "1":
+        refresher.start()
+    yield
+    refresher.stop(timeout=5)
+    # Kuyruktaki zenginleştirme işleri bitirilir, ardından write-behind modunda
+    # bekleyen değişiklikler diske yazılır
+    jobs.close(timeout=float(os.getenv("JOBS_DRAIN_TIMEOUT", "10")))
+    lib.close()
+    covers.close()
+
+
+app = FastAPI(title="Library API", version="1.0.0", lifespan=lifespan)
+# STORAGE_WRITE_BEHIND=1: kayıtlar istek içinde değil, arka planda toplu yazılır
+lib = Library(storage=storage_from_env("library.json"))
+client = OpenLibraryClient.from_env()
+# Yavaş istek profili: PROFILE_ENABLED=1 veya /admin/profiling ile çalışma anında açılır
+profiler = Profiler.from_env()
+profiler.attach_library(lib)
+
+
+def _enrich(isbn: str) -> dict:
+    # Arka plan işçisinde çalışır: Open Library sorgusu + yazar çözümleme + ekleme
+    book = lib.add_book_by_isbn(isbn, client)
+    return {"title": book.title, "author": book.author, "isbn": book.isbn}
 
 
-app = FastAPI(title="Library API", version="1.0.0")
-lib = Library()
-client = OpenLibraryClient()
+# POST /books?async=true işleri (JOBS_WORKERS, JOBS_MAX_PENDING)
+jobs = JobQueue.from_env(_enrich)
+refresher = Refresher.from_env(lib, client)
+# Kapak küçük resimleri: COVERS_DIR altında, COVERS_MAX_MB ile sınırlı disk LRU;
+# kapak indirmeleri kendi bütçesini (COVERS_RATE) kullanır, POST /books'u bekletmez
+covers = CoverCache.from_env(client)
 
 BASE_DIR = Path(__file__).resolve().parent
 UI_INDEX = BASE_DIR / "ui" / "index.html"
@@ -24,6 +69,11 @@ UI_INDEX = BASE_DIR / "ui" / "index.html"
 
 ## CORS kaldırıldı. UI aynı origin'den servis ediliyor.
 
+app.add_middleware(MetricsMiddleware, app_name="api")
+app.add_middleware(ProfilingMiddleware, profiler=profiler)
+# En dışta: X-Request-ID ve kök span (TRACE_FILE / OTEL_EXPORTER_OTLP_ENDPOINT)
+app.add_middleware(TracingMiddleware)
+
 @app.get("/")
 def root():
     # Basit HTML arayüzünü servis et
@@ -35,12 +85,46 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    # Prometheus metin formatı: istek süreleri, Open Library, depolama, katalog boyutu
+    return metrics_response()
+
+
+class ProfilingSettings(BaseModel):
+    enabled: Optional[bool] = None
+    threshold_ms: Optional[float] = None
+    mode: Optional[str] = None
+
+
+def _check_admin(token: Optional[str]) -> None:
+    # Token tanımlı değilse yönetim endpoint'i tamamen kapalıdır
+    if not profiler.admin_token or token != profiler.admin_token:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Yetkisiz")
+
+
+@app.get("/admin/profiling", include_in_schema=False)
+def get_profiling(x_admin_token: Optional[str] = Header(default=None)):
+    _check_admin(x_admin_token)
+    return profiler.status()
+
+
+@app.put("/admin/profiling", include_in_schema=False)
+def update_profiling(body: ProfilingSettings, x_admin_token: Optional[str] = Header(default=None)):
+    _check_admin(x_admin_token)
+    try:
+        return profiler.configure(body.enabled, body.threshold_ms, body.mode)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
 class BookModel(BaseModel):
     title: str
     author: str
     isbn: str
     created_at: Optional[str] = None
     genres: Optional[List[str]] = None
+    updated_at: Optional[str] = None
 
 
 class ISBNBody(BaseModel):
@@ -48,9 +132,13 @@ class ISBNBody(BaseModel):
 
 
 @app.get("/books", response_model=list[BookModel])
-def list_books():
+def list_books(
+    genre: Optional[str] = Query(None, min_length=1, max_length=100, description="Yalnızca bu türdeki kitaplar"),
+):
     models: list[BookModel] = []
-    for b in lib.list_books():
+    # Tür filtresi tür indeksinden okunur; katalog taranmaz
+    books = lib.books_by_genre(genre) if genre else lib.list_books()
+    for b in books:
         created = getattr(b, "created_at", None)
         genres = getattr(b, "genres", None)
         if genres is not None and not isinstance(genres, list):
@@ -62,13 +150,97 @@ def list_books():
                 isbn=b.isbn,
                 created_at=created,
                 genres=genres,
+                updated_at=getattr(b, "updated_at", None),
             )
         )
     return models
 
 
-@app.post("/books", response_model=BookModel, status_code=status.HTTP_201_CREATED)
-def create_book(body: ISBNBody):
+class CountModel(BaseModel):
+    name: str
+    count: int
+
+
+class StatsModel(BaseModel):
+    books: int
+    authors: int
+    genres: int
+    top_authors: list[CountModel]
+    top_genres: list[CountModel]
+    by_month: dict[str, int]
+    by_day: Optional[dict[str, int]] = None
+
+
+@app.get("/books/stats", response_model=StatsModel, response_model_exclude_none=True)
+def books_stats(
+    top: int = Query(10, ge=1, le=100, description="En çok kitabı olan kaç yazar/tür"),
+    daily: bool = Query(False, description="Gün bazında eklenme sayıları da dönsün"),
+):
+    # Sayaçlar ekleme/silmede güncellenir; katalog taranmaz
+    return lib.stats(top=top, daily=daily)
+
+
+class SearchHitModel(BookModel):
+    score: float
+
+
+@app.get("/books/search", response_model=list[SearchHitModel])
+def search_books(
+    q: str = Query(..., min_length=1, max_length=200, description="Başlık veya yazar (yazım hataları tolere edilir)"),
+    limit: int = Query(10, ge=1, le=100),
+    min_score: float = Query(0.5, ge=0.1, le=1.0, description="Sorgu trigramlarının en az bu oranı eşleşmeli"),
+):
+    return [
+        SearchHitModel(
+            title=b.title,
+            author=b.author,
+            isbn=b.isbn,
+            created_at=b.created_at,
+            genres=b.genres if isinstance(b.genres, list) else None,
+            score=score,
+        )
+        for b, score in lib.fuzzy_search(q, limit=limit, min_score=min_score)
+    ]
+
+
+class CompletionModel(BaseModel):
+    text: str
+    field: str
+    count: int
+
+
+@app.get("/books/autocomplete", response_model=list[CompletionModel])
+def autocomplete_books(
+    prefix: str = Query(..., min_length=1, max_length=100, description="Başlık/yazarın ya da içindeki bir kelimenin başı"),
+    limit: int = Query(10, ge=1, le=50),
+    field: Optional[str] = Query(None, pattern="^(title|author)$"),
+):
+    # Önek indeksinden okunur; her tuş vuruşunda tüm katalog dönmez
+    return lib.autocomplete(prefix, limit=limit, field=field)
+
+
+class JobModel(BaseModel):
+    id: str
+    isbn: str
+    status: str
+    result: Optional[BookModel] = None
+    error: Optional[str] = None
+    created_at: float
+    finished_at: Optional[float] = None
+
+
+@app.post(
+    "/books",
+    response_model=BookModel,
+    status_code=status.HTTP_201_CREATED,
+    responses={202: {"model": JobModel, "description": "async=true: iş kuyruğa alındı"}},
+)
+def create_book(
+    body: ISBNBody,
+    async_: bool = Query(False, alias="async", description="Hemen 202 + iş kimliği dön, kitabı arka planda ekle"),
+):
+    if async_:
+        return _enqueue_book(body.isbn)
     try:
         book = lib.add_book_by_isbn(body.isbn, client)
         return BookModel(title=book.title, author=book.author, isbn=book.isbn)
@@ -78,6 +250,35 @@ def create_book(body: ISBNBody):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
+def _enqueue_book(isbn: str) -> JSONResponse:
+    # İstek Open Library'yi beklemez; yalnızca doğrulama ve kuyruğa ekleme yapılır
+    try:
+        norm = client.normalize_isbn_or_barcode(isbn)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if not client.has_valid_checksum(norm):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Geçersiz ISBN kontrol hanesi")
+    if norm in lib:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Kitap zaten kütüphanede")
+    try:
+        job = jobs.submit(norm)
+    except QueueFull as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e), headers={"Retry-After": "1"})
+    return JSONResponse(
+        JobModel(**job.to_dict()).model_dump(),
+        status_code=status.HTTP_202_ACCEPTED,
+        headers={"Location": f"/jobs/{job.id}"},
+    )
+
+
+@app.get("/jobs/{job_id}", response_model=JobModel)
+def get_job(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="İş bulunamadı")
+    return job.to_dict()
+
+
 @app.delete("/books/{isbn}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_book(isbn: str):
     ok = lib.remove_book(isbn)
@@ -96,6 +297,32 @@ def delete_books(body: ISBNListBody):
     return {"deleted": deleted, "not_found": not_found}
 
 
+# Küçük resim ISBN başına değişmez; tarayıcı 30 gün boyunca sunucuya sormaz
+COVER_CACHE_CONTROL = "public, max-age=2592000"
+
+
+@app.get(
+    "/books/{isbn}/cover",
+    response_class=Response,
+    responses={200: {"content": {"image/jpeg": {}}}, 304: {"description": "ETag eşleşti"}},
+)
+def book_cover(isbn: str, if_none_match: Optional[str] = Header(default=None)):
+    if isbn not in lib:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Kitap bulunamadı")
+    try:
+        cover = covers.get(isbn)
+    except ValueError:
+        cover = None
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(e))
+    if cover is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Kapak bulunamadı")
+    headers = {"ETag": cover.etag, "Cache-Control": COVER_CACHE_CONTROL}
+    if if_none_match and {cover.etag, "*"} & {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=cover.data, media_type=cover.media_type, headers=headers)
+
+
 @app.get("/books/preview/{isbn}", response_model=BookModel)
 def preview_book(isbn: str):
     try:
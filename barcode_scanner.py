@@ -1,12 +1,189 @@
-"""Barcode scanner module using OpenCV and pyzbar."""
+"""Barcode scanner module using OpenCV and pyzbar.
+
+OpenCV and pyzbar are heavy native libraries; both are loaded on first use,
+so importing this module (e.g. from the API or a worker) stays cheap.
+"""
+
+import importlib
+import logging
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+
+class _LazyModule:
+    """Module proxy that imports ``name`` on first attribute access."""
+
+    def __init__(self, name: str) -> None:
+        self._name = name
+        self._module: Any = None
+
+    def __getattr__(self, attr: str) -> Any:
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+cv2: Any = _LazyModule("cv2")
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Detection:
+    data: str
+    barcode_type: str
+    rect: Tuple[int, int, int, int]  # x, y, w, h
+
+
+@dataclass(frozen=True)
+class ScanResult:
+    data: str
+    barcode_type: str
+    rect: Tuple[int, int, int, int]
+    frame_id: int
+    captured_at: float  # time.monotonic()
+
+
+def _decode(frame):
+    # pyzbar yerel libzbar'a ihtiyaç duyar; yalnızca gerçekten decode edilirken yükle
+    from pyzbar.pyzbar import decode
+
+    return decode(frame)
+
+
+def decode_frame(frame) -> List[Detection]:
+    """Default decoder: pyzbar on the full frame."""
+    out: List[Detection] = []
+    for barcode in _decode(frame):
+        (x, y, w, h) = barcode.rect
+        out.append(Detection(barcode.data.decode("utf-8"), barcode.type, (x, y, w, h)))
+    return out
+
+
+def _shift(detections: List[Detection], dx: int, dy: int, scale: float = 1.0) -> List[Detection]:
+    """Map rects from a cropped/resized image back to frame coordinates."""
+    out: List[Detection] = []
+    for d in detections:
+        x, y, w, h = d.rect
+        rect = (int(round(x / scale)) + dx, int(round(y / scale)) + dy, int(round(w / scale)), int(round(h / scale)))
+        out.append(Detection(d.data, d.barcode_type, rect))
+    return out
+
+
+class TrackingDecoder:
+    """Cheaper per-frame decoding for a live camera.
+
+    - Each frame is converted to grayscale once.
+    - Full-frame scans try a downscaled image first and only fall back to
+      full resolution when that finds nothing.
+    - After a hit only a region of interest around the last ``rect``
+      (grown by ``roi_margin``) is decoded. A full-frame scan still runs every
+      ``full_scan_every`` frames, and whenever the ROI loses the code.
+
+    ``decoder`` receives a grayscale image and returns detections in that
+    image's coordinates; it defaults to pyzbar. Instances can be shared by
+    ``ScanPipeline`` workers.
+    """
+
+    def __init__(
+        self,
+        decoder: Callable[[Any], List[Detection]] = decode_frame,
+        downscale: float = 0.5,
+        roi_margin: float = 0.5,
+        full_scan_every: int = 15,
+    ) -> None:
+        self.decoder = decoder
+        self.downscale = downscale
+        self.roi_margin = roi_margin
+        self.full_scan_every = full_scan_every
+        self._roi: Optional[Tuple[int, int, int, int]] = None
+        self._since_full = 0
+        self._lock = threading.Lock()
+        self.full_scans = 0
+        self.downscaled_hits = 0
+        self.roi_scans = 0
+
+    def reset(self) -> None:
+        with self._lock:
+            self._roi = None
+            self._since_full = 0
+
+    @staticmethod
+    def _gray(frame):
+        if frame.ndim == 3:
+            return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return frame
+
+    def _expand(self, rect: Tuple[int, int, int, int], shape) -> Tuple[int, int, int, int]:
+        x, y, w, h = rect
+        mx, my = int(w * self.roi_margin), int(h * self.roi_margin)
+        x0, y0 = max(0, x - mx), max(0, y - my)
+        x1, y1 = min(shape[1], x + w + mx), min(shape[0], y + h + my)
+        return x0, y0, x1, y1
+
+    def _full_scan(self, gray) -> List[Detection]:
+        self.full_scans += 1
+        if 0 < self.downscale < 1:
+            small = cv2.resize(gray, None, fx=self.downscale, fy=self.downscale, interpolation=cv2.INTER_AREA)
+            found = self.decoder(small)
+            if found:
+                self.downscaled_hits += 1
+                return _shift(found, 0, 0, self.downscale)
+        return self.decoder(gray)
+
+    def __call__(self, frame) -> List[Detection]:
+        gray = self._gray(frame)
+        with self._lock:
+            roi = self._roi
+            use_roi = roi is not None and self._since_full < self.full_scan_every
+            self._since_full = self._since_full + 1 if use_roi else 0
+
+        found: List[Detection] = []
+        if use_roi:
+            x0, y0, x1, y1 = roi
+            self.roi_scans += 1
+            found = _shift(self.decoder(gray[y0:y1, x0:x1]), x0, y0)
+        if not found:
+            found = self._full_scan(gray)
+
+        with self._lock:
+            if found:
+                xs = [d.rect[0] for d in found] + [d.rect[0] + d.rect[2] for d in found]
+                ys = [d.rect[1] for d in found] + [d.rect[1] + d.rect[3] for d in found]
+                union = (min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys))
+                self._roi = self._expand(union, gray.shape)
+            else:
+                self._roi = None
+        return found
+
+
+class ImageFileSource:
+    """``read()``-compatible source over image files, for tests and recorded sessions."""
+
+    def __init__(self, paths: List[str]) -> None:
+        self.paths = list(paths)
+        self._i = 0
+
+    def read(self):
+        while self._i < len(self.paths):
+            frame = cv2.imread(self.paths[self._i])
+            self._i += 1
+            if frame is not None:
+                return True, frame
+        return False, None
+
+    def release(self) -> None:
+        self._i = len(self.paths)
 
-import cv2
-from pyzbar.pyzbar import decode
-from typing import Optional, Tuple
 
 class BarcodeScanner:
-    def __init__(self):
+    def __init__(self, fast_decode: bool = False):
         self.cap = None
+        # fast_decode: grayscale + downscale + ROI takibi (TrackingDecoder)
+        self.decoder: Optional[TrackingDecoder] = TrackingDecoder() if fast_decode else None
         
     def start_camera(self) -> bool:
         """Start camera capture"""
@@ -23,9 +200,17 @@ class BarcodeScanner:
         ret, frame = self.cap.read()
         if not ret:
             return None
+
+        if self.decoder is not None:
+            detections = self.decoder(frame)
+            for d in detections:
+                (x, y, w, h) = d.rect
+                cv2.rectangle(frame, (x-10, y-10), (x+w+10, y+h+10), (0, 255, 0), 2)
+            cv2.imshow('Barcode Scanner', frame)
+            return (detections[0].data, detections[0].barcode_type) if detections else None
             
         # Decode barcodes in frame
-        barcodes = decode(frame)
+        barcodes = _decode(frame)
         
         for barcode in barcodes:
             # Draw rectangle around barcode
@@ -45,8 +230,187 @@ class BarcodeScanner:
         cv2.imshow('Barcode Scanner', frame)
         return None
         
+    def start_pipeline(self, **kwargs: Any) -> "ScanPipeline":
+        """Start a threaded capture/decode pipeline on the opened camera."""
+        if not self.cap or not self.cap.isOpened():
+            raise RuntimeError("Camera not started")
+        pipeline = ScanPipeline(self.cap, **kwargs)
+        pipeline.start()
+        return pipeline
+
     def stop_camera(self):
         """Stop camera capture and close windows"""
         if self.cap:
             self.cap.release()
         cv2.destroyAllWindows()
+
+
+_STOP = object()
+
+
+class ScanPipeline:
+    """Producer/consumer barcode pipeline.
+
+    One capture thread reads frames from ``source`` (anything with
+    ``read() -> (ok, frame)``, e.g. ``cv2.VideoCapture``) into a bounded
+    queue. When the queue is full the oldest frame is dropped, so decoders
+    always work on recent frames and capture never waits for them.
+    ``workers`` decode threads run ``decoder(frame)``; pyzbar and OpenCV
+    release the GIL, so they run in parallel on multi-core machines.
+
+    Results are delivered to ``on_result`` (called from a worker thread)
+    and/or read with :meth:`results`. An exception from ``decoder`` or
+    ``on_result`` is logged and counted (``frames_failed`` /
+    ``callback_errors``); the worker goes on with the next frame. An
+    exception from ``source.read()`` ends the stream: it is logged, kept in
+    ``capture_error`` and :meth:`results` finishes as at end of input.
+    """
+
+    def __init__(
+        self,
+        source: Any,
+        decoder: Callable[[Any], List[Detection]] = decode_frame,
+        workers: Optional[int] = None,
+        queue_size: int = 2,
+        on_result: Optional[Callable[[ScanResult], None]] = None,
+        stop_at_end: bool = False,
+    ) -> None:
+        self.source = source
+        self.decoder = decoder
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self.on_result = on_result
+        self.stop_at_end = stop_at_end
+        self._frames: "queue.Queue[Any]" = queue.Queue(maxsize=queue_size)
+        self._results: "queue.Queue[Any]" = queue.Queue(maxsize=1024)
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._active_workers = 0
+        self._lock = threading.Lock()
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.frames_decoded = 0
+        self.frames_failed = 0
+        self.callback_errors = 0
+        self.capture_error: Optional[BaseException] = None
+
+    def start(self) -> "ScanPipeline":
+        self._stop.clear()
+        self._active_workers = self.workers
+        self._threads = [threading.Thread(target=self._capture_loop, name="scan-capture", daemon=True)]
+        for i in range(self.workers):
+            self._threads.append(threading.Thread(target=self._decode_loop, name=f"scan-decode-{i}", daemon=True))
+        for t in self._threads:
+            t.start()
+        return self
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+    def __enter__(self) -> "ScanPipeline":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    @property
+    def running(self) -> bool:
+        return any(t.is_alive() for t in self._threads)
+
+    def _put_latest(self, item: Any) -> None:
+        while True:
+            try:
+                self._frames.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self._frames.get_nowait()
+                    with self._lock:
+                        self.frames_dropped += 1
+                except queue.Empty:
+                    pass
+
+    def _capture_loop(self) -> None:
+        frame_id = 0
+        try:
+            while not self._stop.is_set():
+                ok, frame = self.source.read()
+                if not ok:
+                    if self.stop_at_end:
+                        break
+                    time.sleep(0.005)
+                    continue
+                self._put_latest((frame_id, time.monotonic(), frame))
+                frame_id += 1
+                with self._lock:
+                    self.frames_captured += 1
+        except Exception as e:
+            # Kaynak hatası akışın sonu sayılır; results() sonsuza dek beklemesin
+            self.capture_error = e
+            logger.exception("Kare okunamadı; yakalama durdu")
+        finally:
+            if not self._stop.is_set():
+                # Kaynak bitti: kuyruktaki kareler işlensin, sonra her worker dursun
+                for _ in range(self.workers):
+                    self._frames.put(_STOP)
+
+    def _decode_loop(self) -> None:
+        try:
+            while True:
+                try:
+                    item = self._frames.get(timeout=0.1)
+                except queue.Empty:
+                    if self._stop.is_set():
+                        return
+                    continue
+                if item is _STOP:
+                    return
+                frame_id, captured_at, frame = item
+                try:
+                    detections = self.decoder(frame)
+                except Exception:
+                    # Tek bozuk kare worker'ı öldürmesin; sürekli hata günlüğü doldurmasın
+                    with self._lock:
+                        self.frames_failed += 1
+                        failed = self.frames_failed
+                    if failed == 1 or failed % 100 == 0:
+                        logger.exception("Kare çözülemedi (toplam %d hata)", failed)
+                    continue
+                with self._lock:
+                    self.frames_decoded += 1
+                for d in detections:
+                    result = ScanResult(d.data, d.barcode_type, d.rect, frame_id, captured_at)
+                    if self.on_result is not None:
+                        try:
+                            self.on_result(result)
+                        except Exception:
+                            with self._lock:
+                                self.callback_errors += 1
+                            logger.exception("Sonuç callback'i hata verdi: %s", result.data)
+                    try:
+                        self._results.put_nowait(result)
+                    except queue.Full:
+                        pass  # Sadece callback kullanılıyorsa iterator kuyruğu dolabilir
+        finally:
+            with self._lock:
+                self._active_workers -= 1
+                last = self._active_workers == 0
+            if last:
+                try:
+                    self._results.put_nowait(_STOP)
+                except queue.Full:
+                    self._results.get_nowait()
+                    self._results.put_nowait(_STOP)
+
+    def results(self, timeout: Optional[float] = None) -> Iterator[ScanResult]:
+        """Yield results until the pipeline stops (or ``timeout`` seconds pass without one)."""
+        while True:
+            try:
+                item = self._results.get(timeout=timeout)
+            except queue.Empty:
+                return
+            if item is _STOP:
+                return
+            yield item
@@ -0,0 +1,240 @@
+"""Görüntü ve video dosyalarından başsız (GUI'siz) toplu barkod çıkarma.
+
+Raf fotoğrafları veya kaydedilmiş videolar bir süreç havuzunda decode
+edilir; aynı kodun tekrar eden okumaları elenir ve normalize edilmiş
+ISBN'ler parça parça ``Library.add_books_by_isbn`` ile içe aktarılır.
+
+Kullanım:
+    python batch_scan.py raflar/ videolar/ --workers 4
+    python batch_scan.py raflar/ --import --batch-size 100 --fetch-workers 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from barcode_scanner import Detection, TrackingDecoder, cv2, decode_frame
+from isbn_batch import normalize_isbns
+
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff", ".webp"}
+VIDEO_EXTENSIONS = {".mp4", ".avi", ".mov", ".mkv", ".webm", ".m4v"}
+
+
+@dataclass
+class FileResult:
+    path: str
+    frames: int
+    codes: List[str]
+    error: Optional[str] = None
+
+
+@dataclass
+class BatchReport:
+    files: int = 0
+    frames: int = 0
+    detections: int = 0
+    unique_isbns: int = 0
+    invalid_codes: int = 0
+    errors: Dict[str, str] = field(default_factory=dict)
+    elapsed_seconds: float = 0.0
+    added: int = 0
+    failed: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def frames_per_second(self) -> float:
+        return self.frames / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = dict(self.__dict__)
+        data["frames_per_second"] = round(self.frames_per_second, 2)
+        return data
+
+
+def discover(paths: Iterable[str]) -> List[str]:
+    """Expand directories into supported image/video files (sorted, recursive)."""
+    out: List[str] = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _dirs, files in os.walk(path):
+                for name in sorted(files):
+                    if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS | VIDEO_EXTENSIONS:
+                        out.append(os.path.join(root, name))
+        elif os.path.isfile(path):
+            out.append(path)
+    return sorted(out)
+
+
+def scan_still(frame, decoder: Callable[[Any], List[Detection]] = decode_frame, downscale: float = 0.5) -> List[str]:
+    """Every code in a still image: full resolution plus a downscaled pass, de-duplicated.
+
+    ``TrackingDecoder`` stops at the first pass that finds anything, which
+    suits a live camera but misses small or secondary codes in shelf photos.
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    codes = [d.data for d in decoder(gray)]
+    if 0 < downscale < 1:
+        # Büyük veya bulanık kodlar bazen yalnızca küçültülmüş görüntüde okunur
+        small = cv2.resize(gray, None, fx=downscale, fy=downscale, interpolation=cv2.INTER_AREA)
+        codes.extend(d.data for d in decoder(small))
+    return list(dict.fromkeys(codes))
+
+
+def scan_file(path: str, frame_step: int = 1, decoder: Callable[[Any], List[Detection]] = decode_frame) -> FileResult:
+    """Decode one image or video file. Runs inside pool worker processes."""
+    tracker = TrackingDecoder(decoder=decoder)
+    codes: List[str] = []
+    frames = 0
+    try:
+        if os.path.splitext(path)[1].lower() in VIDEO_EXTENSIONS:
+            cap = cv2.VideoCapture(path)
+            try:
+                index = 0
+                while True:
+                    ok = cap.grab()
+                    if not ok:
+                        break
+                    if index % frame_step == 0:
+                        ok, frame = cap.retrieve()
+                        if ok:
+                            frames += 1
+                            codes.extend(d.data for d in tracker(frame))
+                    index += 1
+            finally:
+                cap.release()
+        else:
+            frame = cv2.imread(path)
+            if frame is None:
+                return FileResult(path, 0, [], "Görüntü okunamadı")
+            frames = 1
+            codes.extend(scan_still(frame, decoder))
+    except Exception as e:
+        return FileResult(path, frames, codes, str(e))
+    return FileResult(path, frames, codes)
+
+
+def iter_results(
+    files: List[str],
+    workers: Optional[int] = None,
+    frame_step: int = 1,
+    decoder: Callable[[Any], List[Detection]] = decode_frame,
+) -> Iterator[FileResult]:
+    """Yield per-file results in file order. ``workers=0`` runs in-process."""
+    if workers == 0:
+        for path in files:
+            yield scan_file(path, frame_step, decoder)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunk = max(1, len(files) // ((workers or os.cpu_count() or 1) * 4))
+        yield from pool.map(scan_file, files, [frame_step] * len(files), [decoder] * len(files), chunksize=chunk)
+
+
+def extract_isbns(
+    paths: Iterable[str],
+    workers: Optional[int] = None,
+    frame_step: int = 1,
+    decoder: Callable[[Any], List[Detection]] = decode_frame,
+    report: Optional[BatchReport] = None,
+) -> Iterator[str]:
+    """Stream unique, checksum-valid ISBNs found in the given files/directories."""
+    report = report if report is not None else BatchReport()
+    files = discover(paths)
+    seen = set()
+    started = time.perf_counter()
+    try:
+        for result in iter_results(files, workers, frame_step, decoder):
+            report.files += 1
+            report.frames += result.frames
+            report.detections += len(result.codes)
+            if result.error:
+                report.errors[result.path] = result.error
+            if not result.codes:
+                continue
+            # Aynı dosyadaki tekrarları normalize etmeden önce ele
+            unique_codes = list(dict.fromkeys(result.codes))
+            isbns, valid = normalize_isbns(unique_codes)
+            report.invalid_codes += int((~valid).sum())
+            for isbn in isbns[valid].tolist():
+                if isbn not in seen:
+                    seen.add(isbn)
+                    report.unique_isbns += 1
+                    yield isbn
+    finally:
+        report.elapsed_seconds = time.perf_counter() - started
+
+
+def import_into_library(
+    isbns: Iterable[str],
+    lib: "Library",
+    client: "OpenLibraryClient",
+    batch_size: int = 50,
+    report: Optional[BatchReport] = None,
+    workers: int = 4,
+) -> BatchReport:
+    """Bulk-import streamed ISBNs; one persist per ``batch_size`` ISBNs.
+
+    Each batch is fetched with ``workers`` concurrent lookups; the client's
+    scheduler still enforces the upstream rate budget.
+    """
+    report = report if report is not None else BatchReport()
+    batch: List[str] = []
+
+    def flush() -> None:
+        added, failed = lib.add_books_by_isbn(batch, client, workers=workers)
+        report.added += len(added)
+        report.failed.update(failed)
+        batch.clear()
+
+    for isbn in isbns:
+        if lib.find_book(isbn):
+            continue
+        batch.append(isbn)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Görüntü/video dosyalarından toplu ISBN çıkarma")
+    parser.add_argument("paths", nargs="+", help="Dosya veya klasörler")
+    parser.add_argument("--workers", type=int, default=None, help="Süreç sayısı (0 = aynı süreçte)")
+    parser.add_argument("--frame-step", type=int, default=1, help="Videolarda her N. kareyi işle")
+    parser.add_argument("--import", dest="do_import", action="store_true", help="ISBN'leri kütüphaneye ekle")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--fetch-workers", type=int, default=4, help="Eşzamanlı Open Library isteği (--import)")
+    parser.add_argument("--storage", default="library.json")
+    args = parser.parse_args(argv)
+    if args.batch_size < 1 or args.fetch_workers < 1:
+        parser.error("--batch-size ve --fetch-workers 1 veya daha büyük olmalı")
+
+    report = BatchReport()
+    isbns = extract_isbns(args.paths, workers=args.workers, frame_step=args.frame_step, report=report)
+    if args.do_import:
+        from library import Library
+        from open_library import OpenLibraryClient
+        from storage import storage_from_env
+
+        lib = Library(args.storage, storage=storage_from_env(args.storage))
+        try:
+            import_into_library(isbns, lib, OpenLibraryClient.from_env(), args.batch_size, report, args.fetch_workers)
+        finally:
+            # Write-behind bekleyen kayıtları diske yazar
+            lib.close()
+    else:
+        for isbn in isbns:
+            print(isbn, flush=True)
+    print(json.dumps(report.as_dict(), ensure_ascii=False), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,497 @@
+"""Ağ gerektirmeyen performans ölçümleri.
+
+Sentetik kataloglar (1k .. 1M kitap) üzerinde ``Library`` işlemleri,
+``JsonFileStorage`` okuma/yazma, süreç soğuk başlatma ve ``api.py`` /
+``fastapi_main.py`` endpoint gecikme/verim ölçülür; ``server`` bölümü
+``run_api.py`` geliştirme ve üretim modlarını gerçek HTTP üzerinden karşılaştırır. Open Library çağrıları
+``StubOpenLibraryClient`` ile taklit edilir, HTTP istekleri süreç içinde
+ASGI üzerinden gönderilir. Sonuçlar commit'ler arasında karşılaştırmak için
+JSON olarak kaydedilir.
+
+Kullanım:
+    python benchmark.py --sizes 1000,10000,100000 --out bench.json
+    python benchmark.py --sizes 1000000 --only library,storage
+    python benchmark.py --compare onceki.json --out simdiki.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from library import Book, Library
+from open_library import OpenLibraryClient
+from storage import JsonFileStorage, ShardedJsonStorage, Storage, WriteBehindStorage
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SECTIONS = ("library", "storage", "startup", "api", "server")
+# "sys": yorumlayıcının kendi açılış süresi (karşılaştırma tabanı)
+STARTUP_MODULES = ("sys", "library", "open_library", "main", "barcode_scanner", "api", "fastapi_main")
+# Giriş noktalarında yüklenmemesi gereken ağır bağımlılıklar
+HEAVY_MODULES = ("httpx", "cv2", "pyzbar", "numpy")
+
+
+@dataclass
+class Result:
+    name: str
+    size: int
+    ops: int
+    seconds: float
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def ops_per_second(self) -> float:
+        return self.ops / self.seconds if self.seconds else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["ops_per_second"] = round(self.ops_per_second, 2)
+        data["us_per_op"] = round(self.seconds / self.ops * 1e6, 3) if self.ops else 0.0
+        return data
+
+
+def make_isbn(i: int) -> str:
+    """Deterministic checksum-valid ISBN-13 for the i-th synthetic book."""
+    body = f"978{i:09d}"
+    total = sum(int(c) * (1 if k % 2 == 0 else 3) for k, c in enumerate(body))
+    return body + str((10 - total % 10) % 10)
+
+
+def make_books(n: int, start: int = 0) -> List[Book]:
+    return [
+        Book(
+            title=f"Kitap {i}",
+            author=f"Yazar {i % 5000}",
+            isbn=make_isbn(i),
+            created_at="2024-01-01T00:00:00+00:00",
+            genres=[f"Tür {i % 40}"],
+        )
+        for i in range(start, start + n)
+    ]
+
+
+class MemoryStorage(Storage):
+    """Keeps the last written snapshot in memory, to time ``Library`` without disk I/O."""
+
+    def __init__(self, data: Optional[List[Dict[str, Any]]] = None) -> None:
+        self.data = data or []
+        self.writes = 0
+
+    def read(self) -> List[Dict[str, Any]]:
+        return self.data
+
+    def write(self, data: List[Dict[str, Any]]) -> None:
+        self.data = data
+        self.writes += 1
+
+
+class StubOpenLibraryClient(OpenLibraryClient):
+    """Answers ``fetch_by_isbn`` locally, with an optional artificial delay."""
+
+    def __init__(self, delay: float = 0.0) -> None:
+        super().__init__()
+        self.delay = delay
+        self.calls = 0
+
+    def fetch_by_isbn(self, isbn: str) -> dict:
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        return {"title": f"Kitap {isbn}", "authors": ["Stub Yazar"], "subjects": ["Benchmark"]}
+
+
+def _timeit(fn: Callable[[], Any]) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    return {
+        "p50_ms": round(pick(0.50) * 1000, 3),
+        "p90_ms": round(pick(0.90) * 1000, 3),
+        "p99_ms": round(pick(0.99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+    }
+
+
+# ===== Library =====
+
+def bench_library(size: int, sample: int = 1000, seed: int = 0) -> List[Result]:
+    rng = random.Random(seed)
+    results: List[Result] = []
+    books = make_books(size)
+    storage = MemoryStorage()
+    lib = Library(storage=storage)
+
+    elapsed = _timeit(lambda: lib.add_books(books))
+    results.append(Result("library.add_books", size, size, elapsed))
+
+    # Tekil ekleme her seferinde kaydeder; kaydetme maliyeti katalog boyutuyla büyür
+    extra = make_books(20, start=size)
+    elapsed = _timeit(lambda: [lib.add_book(b) for b in extra])
+    results.append(Result("library.add_book", size, len(extra), elapsed, {"writes": len(extra)}))
+
+    hits = [make_isbn(rng.randrange(size)) for _ in range(sample)]
+    elapsed = _timeit(lambda: [lib.find_book(i) for i in hits])
+    results.append(Result("library.find_book", size, sample, elapsed))
+
+    misses = [make_isbn(size + 10_000 + i) for i in range(sample)]
+    elapsed = _timeit(lambda: [lib.find_book(i) for i in misses])
+    results.append(Result("library.find_book_miss", size, sample, elapsed))
+
+    rounds = 10
+    elapsed = _timeit(lambda: [lib.list_books() for _ in range(rounds)])
+    results.append(Result("library.list_books", size, rounds, elapsed))
+
+    victims = [b.isbn for b in extra]
+    elapsed = _timeit(lambda: [lib.remove_book(i) for i in victims])
+    results.append(Result("library.remove_book", size, len(victims), elapsed))
+
+    victims = rng.sample(hits, min(len(hits), 100))
+    victims = list(dict.fromkeys(victims))
+    elapsed = _timeit(lambda: lib.remove_books(victims))
+    results.append(Result("library.remove_books", size, len(victims), elapsed))
+
+    client = StubOpenLibraryClient()
+    fresh = [make_isbn(size + 20_000 + i) for i in range(min(sample, 100))]
+    elapsed = _timeit(lambda: lib.add_books_by_isbn(fresh, client))
+    results.append(Result("library.add_books_by_isbn", size, len(fresh), elapsed))
+    return results
+
+
+# ===== Storage =====
+
+def bench_storage(size: int, workdir: str) -> List[Result]:
+    data = [asdict(b) for b in make_books(size)]
+    path = os.path.join(workdir, f"storage_{size}.json")
+    storage = JsonFileStorage(path)
+
+    elapsed = _timeit(lambda: storage.write(data))
+    nbytes = os.path.getsize(path)
+    results = [Result("storage.write", size, 1, elapsed, {"bytes": nbytes})]
+
+    elapsed = _timeit(storage.read)
+    results.append(Result("storage.read", size, 1, elapsed, {"bytes": nbytes}))
+
+    elapsed = _timeit(lambda: Library(path))
+    results.append(Result("library.load", size, 1, elapsed, {"bytes": nbytes}))
+
+    # Tek tek eklemelerde istek içi kayıt maliyeti: senkron JSON ve write-behind
+    extra = [Book(f"Ek {i}", "Yazar", make_isbn(size + i)) for i in range(20)]
+    for name, backend in (("sync", JsonFileStorage(path)), ("write_behind", WriteBehindStorage(JsonFileStorage(path)))):
+        storage.write(data)
+        lib = Library(storage=backend)
+        samples = [_timeit(lambda b=b: lib.add_book(b)) for b in extra]
+        results.append(Result(f"library.add_book.{name}", size, len(samples), sum(samples), _percentiles(samples)))
+        lib.close()
+    os.remove(path)
+
+    # 16 parçalı depolama: açılış paralel okunur, ekleme yalnızca bir parçayı yazar
+    shard_dir = os.path.join(workdir, f"shards_{size}")
+    sharded = ShardedJsonStorage(shard_dir, shards=16)
+    elapsed = _timeit(lambda: sharded.write(data))
+    results.append(Result("storage.sharded.write", size, 1, elapsed, {"shards": 16}))
+    for executor in ("thread", "process"):
+        elapsed = _timeit(lambda: Library(storage=ShardedJsonStorage(shard_dir, shards=16, executor=executor)))
+        results.append(Result(f"library.load.sharded_{executor}", size, 1, elapsed, {"shards": 16}))
+    lib = Library(storage=ShardedJsonStorage(shard_dir, shards=16))
+    samples = [_timeit(lambda b=b: lib.add_book(b)) for b in extra]
+    results.append(Result("library.add_book.sharded", size, len(samples), sum(samples), _percentiles(samples)))
+    shutil.rmtree(shard_dir)
+    return results
+
+
+# ===== Soğuk başlatma =====
+
+def bench_startup(workdir: str, repeat: int = 3) -> List[Result]:
+    results: List[Result] = []
+    env = dict(os.environ, PYTHONPATH=BASE_DIR + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    probe = "import json, sys; print(json.dumps([m for m in {heavy!r} if m in sys.modules]))"
+    for module in STARTUP_MODULES:
+        samples = []
+        heavy: List[str] = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            # Temiz bir çalışma dizininde: api.py kendi library.json dosyasını oluşturmasın
+            out = subprocess.run([sys.executable, "-c", f"import {module}; " + probe.format(heavy=HEAVY_MODULES)],
+                                 cwd=workdir, env=env, check=True, capture_output=True, text=True)
+            samples.append(time.perf_counter() - started)
+            heavy = json.loads(out.stdout.strip().splitlines()[-1])
+        results.append(Result(f"startup.import_{module}", 0, repeat, sum(samples),
+                              dict(_percentiles(samples), heavy_modules=heavy)))
+    return results
+
+
+# ===== API =====
+
+async def drive(app: Any, requests: List[Dict[str, Any]], concurrency: int, timeout: float = 5.0) -> Dict[str, Any]:
+    """Send ``requests`` with ``concurrency`` workers to an ASGI app, or to a server if ``app`` is a URL."""
+    import httpx
+
+    if isinstance(app, str):
+        options: Dict[str, Any] = {"base_url": app, "limits": httpx.Limits(max_connections=concurrency)}
+    else:
+        options = {"transport": httpx.ASGITransport(app=app), "base_url": "http://bench"}
+    latencies: List[float] = []
+    errors = 0
+    statuses: Dict[str, int] = {}
+    async with httpx.AsyncClient(timeout=timeout, **options) as client:
+        queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+        for req in requests:
+            queue.put_nowait(req)
+
+        async def worker() -> None:
+            nonlocal errors
+            while True:
+                try:
+                    req = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                started = time.perf_counter()
+                resp = await client.request(req["method"], req["url"], json=req.get("json"), headers=req.get("headers"))
+                latencies.append(time.perf_counter() - started)
+                statuses[str(resp.status_code)] = statuses.get(str(resp.status_code), 0) + 1
+                if resp.status_code != req.get("expect", 200):
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return {"seconds": elapsed, "errors": errors, "statuses": dict(sorted(statuses.items())), **_percentiles(latencies)}
+
+
+def _api_result(name: str, size: int, requests: List[Dict[str, Any]], app: Any, concurrency: int) -> Result:
+    stats = asyncio.run(drive(app, requests, concurrency))
+    seconds = stats.pop("seconds")
+    stats["concurrency"] = concurrency
+    return Result(name, size, len(requests), seconds, stats)
+
+
+def bench_api(size: int, requests: int, concurrency: int) -> List[Result]:
+    import logging
+
+    import api
+    import fastapi_main
+
+    # fastapi_main kök logger'ı INFO'ya ayarlıyor; istemci tarafı istek logları ölçümü bozmasın
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    results: List[Result] = []
+    saved = (api.lib, api.client)
+    api.lib = Library(storage=MemoryStorage())
+    api.lib.add_books(make_books(size))
+    api.client = StubOpenLibraryClient()
+    try:
+        app = api.app
+        results.append(_api_result("api.health", size, [{"method": "GET", "url": "/health"}] * requests, app, concurrency))
+        list_requests = max(1, min(requests, 200_000 // max(size, 1)))
+        results.append(_api_result("api.list_books", size, [{"method": "GET", "url": "/books"}] * list_requests, app, concurrency))
+        preview = [{"method": "GET", "url": f"/books/preview/{make_isbn(i)}"} for i in range(requests)]
+        results.append(_api_result("api.preview_book", size, preview, app, concurrency))
+        fresh = [make_isbn(size + 30_000 + i) for i in range(requests)]
+        created = [{"method": "POST", "url": "/books", "json": {"isbn": i}, "expect": 201} for i in fresh]
+        results.append(_api_result("api.create_book", size, created, app, concurrency))
+        deleted = [{"method": "DELETE", "url": f"/books/{i}", "expect": 204} for i in fresh]
+        results.append(_api_result("api.delete_book", size, deleted, app, concurrency))
+    finally:
+        api.lib, api.client = saved
+
+    # Demo API: limiter ölçümü bozmasın diye kapatılır, bellekteki veritabanı doldurulur
+    limiter_enabled = fastapi_main.limiter.enabled
+    saved_db = list(fastapi_main.books_db)
+    fastapi_main.limiter.enabled = False
+    fastapi_main.books_db[:] = [
+        {"id": i + 1, "title": f"Kitap {i}", "author": f"Yazar {i}", "publication_year": 2000} for i in range(size)
+    ]
+    try:
+        app = fastapi_main.app
+        key = {fastapi_main.API_KEY_NAME: fastapi_main.API_KEY}
+        results.append(_api_result("fastapi_main.health", size, [{"method": "GET", "url": "/health"}] * requests, app, concurrency))
+        results.append(_api_result("fastapi_main.list_books", size, [{"method": "GET", "url": "/books/?limit=100"}] * requests, app, concurrency))
+        last = [{"method": "GET", "url": f"/books/{size}"}] * requests
+        results.append(_api_result("fastapi_main.get_book_last", size, last, app, concurrency))
+        results.append(_api_result("fastapi_main.secure", size, [{"method": "GET", "url": "/secure", "headers": key}] * requests, app, concurrency))
+    finally:
+        fastapi_main.limiter.enabled = limiter_enabled
+        fastapi_main.books_db[:] = saved_db
+    return results
+
+
+# ===== Sunucu (run_api.py) =====
+
+def free_port() -> int:
+    """A localhost TCP port that is free right now."""
+    import socket
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workdir: str, args: List[str], port: int, env: Optional[Dict[str, str]] = None) -> subprocess.Popen:
+    """Start ``run_api.py`` for ``api:app`` in ``workdir`` and wait until /health answers."""
+    import httpx
+
+    env = dict(os.environ, **(env or {}), PYTHONPATH=BASE_DIR + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    # Yeni oturum: reload modundaki alt süreçler de birlikte kapatılabilsin
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(BASE_DIR, "run_api.py"), "--app", "api:app", "--port", str(port),
+         "--no-browser", "--log-level", "warning", *args],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            pass
+        if proc.poll() is not None:
+            break
+        time.sleep(0.1)
+    stop_server(proc)
+    raise RuntimeError(f"Sunucu başlamadı: run_api.py {' '.join(args)}")
+
+
+def stop_server(proc: subprocess.Popen) -> None:
+    """Stop a server from :func:`start_server` together with its child processes."""
+    import signal
+
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=15)
+    except (ProcessLookupError, subprocess.TimeoutExpired):
+        os.killpg(proc.pid, signal.SIGKILL)
+        proc.wait()
+
+
+def bench_server(size: int, requests: int, concurrency: int, workers: int = 1) -> List[Result]:
+    """Current launcher (reload, default loop) vs. ``--prod`` over real HTTP on localhost."""
+    # api:app tek worker ile çalışır (run_api.SINGLE_PROCESS_APPS)
+    modes = {"dev": [], "prod": ["--prod", "--workers", str(workers)]}
+    results: List[Result] = []
+    with tempfile.TemporaryDirectory(prefix="kutuphane-server-") as workdir:
+        JsonFileStorage(os.path.join(workdir, "library.json")).write([b.to_dict() for b in make_books(size)])
+        for mode, args in modes.items():
+            port = free_port()
+            proc = start_server(workdir, args, port)
+            try:
+                url = f"http://127.0.0.1:{port}"
+                for name, path in (("health", "/health"), ("list_books", "/books"), ("search", "/books/search?q=kitap%2042")):
+                    reqs = [{"method": "GET", "url": path}] * requests
+                    result = _api_result(f"server.{mode}.{name}", size, reqs, url, concurrency)
+                    result.extra["workers"] = workers if mode == "prod" else 1
+                    results.append(result)
+            finally:
+                stop_server(proc)
+    return results
+
+
+# ===== Çalıştırma ve karşılaştırma =====
+
+def git_commit() -> Optional[str]:
+    """Short hash of the checked-out commit, recorded in reports."""
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def run(
+    sizes: List[int],
+    only: Optional[List[str]] = None,
+    api_requests: int = 500,
+    concurrency: int = 8,
+    api_size: Optional[int] = None,
+) -> Dict[str, Any]:
+    sections = only or list(SECTIONS)
+    results: List[Result] = []
+    with tempfile.TemporaryDirectory(prefix="kutuphane-bench-") as workdir:
+        for size in sizes:
+            if "library" in sections:
+                results.extend(bench_library(size))
+            if "storage" in sections:
+                results.extend(bench_storage(size, workdir))
+        if "startup" in sections:
+            results.extend(bench_startup(workdir))
+        if "api" in sections:
+            results.extend(bench_api(api_size or min(sizes), api_requests, concurrency))
+        if "server" in sections:
+            results.extend(bench_server(api_size or min(sizes), api_requests, concurrency))
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "sizes": sizes,
+        },
+        "results": [r.as_dict() for r in results],
+    }
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any]) -> List[str]:
+    """Human-readable per-benchmark ratio of ``us_per_op`` (new / old)."""
+    before = {(r["name"], r["size"]): r for r in old["results"]}
+    lines = []
+    for r in new["results"]:
+        prev = before.get((r["name"], r["size"]))
+        if not prev or not prev["us_per_op"]:
+            continue
+        ratio = r["us_per_op"] / prev["us_per_op"]
+        lines.append(f"{r['name']:<32} {r['size']:>9} {prev['us_per_op']:>12.3f} -> {r['us_per_op']:>12.3f} us/op  x{ratio:.2f}")
+    return lines
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Kütüphane performans ölçümleri (ağ gerektirmez)")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Virgülle ayrılmış katalog boyutları")
+    parser.add_argument("--only", default=None, help=f"Çalıştırılacak bölümler: {','.join(SECTIONS)}")
+    parser.add_argument("--api-requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--api-size", type=int, default=None, help="API ölçümlerinde katalog boyutu")
+    parser.add_argument("--out", default=None, help="Sonuç JSON dosyası (varsayılan: stdout)")
+    parser.add_argument("--compare", default=None, help="Karşılaştırılacak önceki sonuç dosyası")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    only = [s for s in args.only.split(",") if s] if args.only else None
+    if only and set(only) - set(SECTIONS):
+        parser.error(f"Bilinmeyen bölüm: {', '.join(sorted(set(only) - set(SECTIONS)))}")
+
+    report = run(sizes, only, args.api_requests, args.concurrency, args.api_size)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            for line in compare(json.load(f), report):
+                print(line, file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
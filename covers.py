@@ -0,0 +1,255 @@
+"""Kitap kapakları: bir kez indir, küçük resim üret, diskte LRU olarak sakla.
+
+Her satır için Open Library kapak adresine bağlanmak her sayfa görüntülemede
+kitap başına bir ağ isteği demektir. ``CoverCache`` kapağı
+``OpenLibraryClient.fetch_cover`` ile bir kez indirir, OpenCV ile sabit
+boyutlu bir JPEG küçük resme çevirir ve ``DiskLRU`` içinde saklar; API
+küçük resmi uzun süreli ``Cache-Control`` ve ``ETag`` ile sunar.
+
+- ``DiskLRU`` toplam boyutu ``max_bytes`` ile sınırlar; en uzun süredir
+  okunmayan dosyalar silinir. Son kullanım zamanı dosyanın mtime değerinde
+  tutulur, yeniden başlatmada sıra korunur.
+- Kapağı olmayan ISBN'ler ``missing_ttl`` saniye boyunca tekrar sorulmaz;
+  bu liste en fazla ``max_missing`` kayıt tutar, süresi dolanlar silinir.
+- Aynı ISBN için eşzamanlı istekler tek bir indirmeyi bekler.
+- ``from_env`` kapaklar için ayrı bir istek bütçesi (``COVERS_RATE``)
+  kurar; kapak sayfası açan kullanıcılar ``POST /books`` sorgularının
+  Open Library bütçesini tüketmez, onları beklemez.
+
+OpenCV ve NumPy ilk küçük resimde yüklenir.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from metrics import REGISTRY
+from open_library import OpenLibraryClient
+from throttle import RequestScheduler
+
+
+COVER_REQUESTS = REGISTRY.counter("covers_requests_total", "Kapak istekleri", ["result"])
+CACHE_BYTES = REGISTRY.gauge("covers_cache_bytes", "Diskteki küçük resimlerin toplam boyutu")
+
+
+def make_thumbnail(data: bytes, width: int = 160, height: int = 240, quality: int = 85) -> bytes:
+    """Fit the image into ``width`` x ``height`` (aspect kept, white padding) and encode as JPEG."""
+    import cv2
+    import numpy as np
+
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Kapak görseli çözülemedi")
+    h, w = image.shape[:2]
+    scale = min(width / w, height / h)
+    new_w, new_h = max(1, round(w * scale)), max(1, round(h * scale))
+    # Küçültmede INTER_AREA daha az bozulma (moiré) üretir
+    interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_CUBIC
+    resized = cv2.resize(image, (new_w, new_h), interpolation=interpolation)
+    canvas = np.full((height, width, 3), 255, dtype=np.uint8)
+    top, left = (height - new_h) // 2, (width - new_w) // 2
+    canvas[top:top + new_h, left:left + new_w] = resized
+    ok, encoded = cv2.imencode(".jpg", canvas, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError("Küçük resim kodlanamadı")
+    return encoded.tobytes()
+
+
+class DiskLRU:
+    """Size-bounded directory of ``<key>.jpg`` files, evicted least recently used first."""
+
+    def __init__(self, directory: str, max_bytes: int = 50 * 1024 * 1024) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._sizes: "OrderedDict[str, int]" = OrderedDict()  # en eski kullanım başta
+        self._total = 0
+        self._lock = threading.Lock()
+        entries = []
+        # Dizin ilk yazmada oluşturulur; yalnızca import eden süreçler diske dokunmaz
+        for name in os.listdir(directory) if os.path.isdir(directory) else ():
+            if name.endswith(".jpg"):
+                st = os.stat(os.path.join(directory, name))
+                entries.append((st.st_mtime, name[:-4], st.st_size))
+        for _, key, size in sorted(entries):
+            self._sizes[key] = size
+            self._total += size
+        CACHE_BYTES.set(self._total)
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._sizes
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.jpg")
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            if key not in self._sizes:
+                return None
+            self._sizes.move_to_end(key)
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+            os.utime(self._path(key))
+        except OSError:
+            # Dosya dışarıdan silinmiş
+            with self._lock:
+                self._total -= self._sizes.pop(key, 0)
+            return None
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self._lock:
+            self._total += len(data) - self._sizes.pop(key, 0)
+            self._sizes[key] = len(data)
+            while self._total > self.max_bytes and len(self._sizes) > 1:
+                old, size = self._sizes.popitem(last=False)
+                self._total -= size
+                try:
+                    os.remove(self._path(old))
+                except OSError:
+                    pass
+            CACHE_BYTES.set(self._total)
+
+
+@dataclass(frozen=True)
+class Cover:
+    data: bytes
+    etag: str
+    media_type: str = "image/jpeg"
+
+
+class CoverCache:
+    """Thumbnails for ISBNs: disk LRU first, Open Library once on a miss."""
+
+    def __init__(
+        self,
+        client: OpenLibraryClient,
+        directory: str = "covers",
+        max_bytes: int = 50 * 1024 * 1024,
+        size: Tuple[int, int] = (160, 240),
+        missing_ttl: float = 86400.0,
+        max_missing: int = 10000,
+    ) -> None:
+        self.client = client
+        self.size = size
+        self.missing_ttl = missing_ttl
+        self.max_missing = max_missing
+        self.store = DiskLRU(directory, max_bytes)
+        # Kapağı olmayan ISBN -> son deneme; en eski deneme başta
+        self._missing: "OrderedDict[str, float]" = OrderedDict()
+        # ISBN -> [indirme kilidi, bekleyen istek sayısı]; sayı sıfırlanınca silinir
+        self._inflight: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, client: OpenLibraryClient) -> "CoverCache":
+        """Covers are fetched through a copy of ``client`` with its own budget:
+        ``COVERS_RATE`` req/s (default 1), few retries, so a page of
+        thumbnails neither waits behind nor drains the catalog lookups."""
+        width, _, height = os.getenv("COVERS_SIZE", "160x240").partition("x")
+        rate = float(os.getenv("COVERS_RATE", "1"))
+        scheduler = RequestScheduler(
+            rate=rate, min_rate=min(rate, 0.5), max_rate=rate,
+            max_retries=1, backoff_cap=5.0, max_retry_after=5.0,
+        )
+        return cls(
+            client.with_scheduler(scheduler),
+            directory=os.getenv("COVERS_DIR", "covers"),
+            max_bytes=int(float(os.getenv("COVERS_MAX_MB", "50")) * 1024 * 1024),
+            size=(int(width), int(height)),
+        )
+
+    def close(self) -> None:
+        self.client.close()
+
+    @staticmethod
+    def _cover(data: bytes) -> Cover:
+        return Cover(data, '"' + hashlib.blake2b(data, digest_size=8).hexdigest() + '"')
+
+    def _known_missing(self, isbn: str) -> bool:
+        tried = self._missing.get(isbn)
+        if tried is None:
+            return False
+        if time.monotonic() - tried < self.missing_ttl:
+            return True
+        with self._lock:
+            self._missing.pop(isbn, None)
+        return False
+
+    def _remember_missing(self, isbn: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._missing[isbn] = now
+            self._missing.move_to_end(isbn)
+            # Baştakiler en eskiler: süresi dolanlar ve sınırı aşanlar atılır
+            while self._missing and (
+                len(self._missing) > self.max_missing or now - next(iter(self._missing.values())) >= self.missing_ttl
+            ):
+                self._missing.popitem(last=False)
+
+    def get(self, isbn: str) -> Optional[Cover]:
+        """Thumbnail for ``isbn``, or ``None`` if it has no cover."""
+        # Normalleştirilmiş ISBN yalnızca rakam/X içerir; dosya adı olarak güvenli
+        isbn = self.client.normalize_isbn_or_barcode(isbn)
+        data = self.store.get(isbn)
+        if data is not None:
+            COVER_REQUESTS.labels("hit").inc()
+            return self._cover(data)
+        if self._known_missing(isbn):
+            COVER_REQUESTS.labels("missing").inc()
+            return None
+        with self._lock:
+            entry = self._inflight.setdefault(isbn, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                # Beklerken başka bir istek indirmiş olabilir
+                data = self.store.get(isbn)
+                if data is not None:
+                    COVER_REQUESTS.labels("hit").inc()
+                    return self._cover(data)
+                if self._known_missing(isbn):
+                    COVER_REQUESTS.labels("missing").inc()
+                    return None
+                try:
+                    original = self.client.fetch_cover(isbn)
+                except Exception:
+                    COVER_REQUESTS.labels("error").inc()
+                    raise
+                try:
+                    data = make_thumbnail(original, *self.size) if original is not None else None
+                except ValueError:
+                    # Bozuk görsel kapaksız sayılır
+                    data = None
+                if data is None:
+                    self._remember_missing(isbn)
+                    COVER_REQUESTS.labels("missing").inc()
+                    return None
+                self.store.put(isbn, data)
+                COVER_REQUESTS.labels("miss").inc()
+                return self._cover(data)
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                # Son bekleyen çıkınca silinir; yeni gelenler aynı kilidi bulur
+                if entry[1] == 0:
+                    del self._inflight[isbn]
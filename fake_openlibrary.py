@@ -0,0 +1,333 @@
+"""Yük testleri için yerel Open Library taklidi (gecikme ve hata enjeksiyonu).
+
+``/isbn/{isbn}.json``, ``/books/{olid}.json`` ve ``/authors/{key}.json``
+uçlarını fixture'lardan sunar. Fixture'da olmayan, kontrol hanesi geçerli
+ISBN'ler için (``synthesize=True``) deterministik bir kayıt üretilir; böylece
+binlerce farklı ISBN'le ekleme akışı ölçülebilir.
+
+Her istek için sırayla:
+
+- ``latency`` dağılımından bir bekleme (``fixed:20``, ``uniform:10,50``,
+  ``normal:40,10``, ``lognormal:40,0.6``, ``exp:30``; milisaniye),
+- ``error_rate`` olasılıkla 500, ``throttle_rate`` olasılıkla 429 +
+  ``Retry-After``,
+- ISBN isteklerinde ``redirect_rate`` olasılıkla gerçek API'deki gibi
+  ``302`` -> ``/books/{olid}.json``.
+
+İstemciyi yönlendirmek için ``OPENLIBRARY_BASE_URL`` kullanılır.
+
+Kullanım:
+    python fake_openlibrary.py --port 8081 --latency lognormal:80,0.5 \\
+        --error-rate 0.02 --throttle-rate 0.05 --redirect-rate 1
+    OPENLIBRARY_BASE_URL=http://127.0.0.1:8081 python run_api.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from open_library import OpenLibraryClient
+
+
+# Uçtan uca akışları kapsayan küçük örnek veri: yönlendirme, yazar anahtarı,
+# satır içi yazar adı ve yalnızca ISBN-10 ile bulunan kayıt
+FIXTURES: Dict[str, Any] = {
+    "books": {
+        "/books/OL1001M": {
+            "title": "Tutunamayanlar",
+            "authors": [{"key": "/authors/OL101A"}],
+            "subjects": ["Turkish fiction", "Roman"],
+            "publish_date": "1972",
+            "isbn_13": ["9789750719387"],
+        },
+        "/books/OL1002M": {
+            "title": "Kürk Mantolu Madonna",
+            "authors": [{"key": "/authors/OL102A"}],
+            "subjects": ["Roman", "Accessible book"],
+            "publish_date": "1943",
+            "isbn_13": ["9786053609421"],
+        },
+        "/books/OL1003M": {
+            "title": "Saatleri Ayarlama Enstitüsü",
+            "authors": [{"name": "Ahmet Hamdi Tanpınar"}],
+            "subjects": ["Roman"],
+            "publish_date": "1961",
+            "isbn_10": ["9750802942"],
+        },
+    },
+    "authors": {
+        "/authors/OL101A": {"name": "Oğuz Atay"},
+        "/authors/OL102A": {"name": "Sabahattin Ali"},
+    },
+}
+
+_ISBN_PATH = re.compile(r"^/isbn/([0-9Xx]{10}|[0-9]{13})\.json$")
+_BOOK_PATH = re.compile(r"^/books/(OL\d+X?M)\.json$")
+_AUTHOR_PATH = re.compile(r"^/authors/(OL\d+A)\.json$")
+# Üretilen kayıtlar: ISBN sürüm anahtarında saklanır, ayrıca eşleme tutulmaz
+_SYNTH_BOOK = re.compile(r"^OL9(\d{12}[0-9X])M$")
+_SYNTH_AUTHORS = 500
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Sampler (seconds) for a ``kind:a,b`` spec in milliseconds; ``"0"`` or ``""`` means none."""
+    kind, _, args = (spec or "0").partition(":")
+    if not args:
+        kind, args = "fixed", kind
+    try:
+        a, *rest = [float(x) for x in args.split(",")]
+    except ValueError:
+        raise ValueError(f"Geçersiz gecikme: {spec!r}")
+    a /= 1000
+    if a < 0 or any(x < 0 for x in rest):
+        raise ValueError(f"Geçersiz gecikme: {spec!r}")
+    if kind == "fixed" and not rest:
+        return lambda rng: a
+    if kind == "exp" and not rest:
+        return lambda rng: rng.expovariate(1 / a) if a > 0 else 0.0
+    if len(rest) != 1:
+        raise ValueError(f"Geçersiz gecikme: {spec!r}")
+    b = rest[0]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(a, b / 1000)
+    if kind == "normal":
+        return lambda rng: max(0.0, rng.gauss(a, b / 1000))
+    if kind == "lognormal":
+        # a: medyan (ms), b: sigma (birimsiz); uzun kuyruklu upstream gecikmesi
+        return lambda rng: rng.lognormvariate(math.log(a), b) if a > 0 else 0.0
+    raise ValueError(f"Geçersiz gecikme: {spec!r}")
+
+
+@dataclass
+class FakeConfig:
+    latency: str = "0"
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    retry_after: float = 1.0
+    redirect_rate: float = 0.0
+    synthesize: bool = True
+    seed: Optional[int] = None
+
+
+class FakeOpenLibrary:
+    """Threaded HTTP server answering like Open Library, with injected latency and faults."""
+
+    def __init__(self, config: Optional[FakeConfig] = None, fixtures: Optional[Dict[str, Any]] = None) -> None:
+        self.config = config or FakeConfig()
+        fixtures = fixtures if fixtures is not None else FIXTURES
+        self.books: Dict[str, dict] = dict(fixtures.get("books", {}))
+        self.authors: Dict[str, dict] = dict(fixtures.get("authors", {}))
+        self.by_isbn: Dict[str, str] = {}
+        for key, record in self.books.items():
+            for isbn in (*record.get("isbn_13", ()), *record.get("isbn_10", ())):
+                self.by_isbn[isbn] = key
+        self._latency = parse_latency(self.config.latency)
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self.counts: Counter = Counter()  # (uç, durum) -> istek sayısı
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_file(cls, path: str, config: Optional[FakeConfig] = None) -> "FakeOpenLibrary":
+        """Fixtures from ``{"books": {"/books/OL..M": {...}}, "authors": {"/authors/OL..A": {...}}}``."""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(config, json.load(f))
+
+    @property
+    def url(self) -> str:
+        if self._server is None:
+            raise RuntimeError("Sunucu başlatılmadı")
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {f"{endpoint}.{status}": n for (endpoint, status), n in sorted(self.counts.items())}
+
+    # ----- yanıtlar -----
+
+    def _synthetic_book(self, isbn: str) -> Optional[dict]:
+        if not self.config.synthesize or not OpenLibraryClient.has_valid_checksum(isbn):
+            return None
+        # ISBN-10'lar 13 haneye tamamlanır: anahtar sabit uzunlukta kalır
+        n = int(isbn[:-1]) % _SYNTH_AUTHORS
+        return {
+            "key": f"/books/OL9{isbn.rjust(13, '0')}M",
+            "title": f"Kitap {isbn}",
+            "authors": [{"key": f"/authors/OL9{n}A"}],
+            "subjects": [f"Tür {n % 40}"],
+            f"isbn_{len(isbn)}": [isbn],
+        }
+
+    def _edition(self, key: str) -> Optional[dict]:
+        if key in self.books:
+            return dict(self.books[key], key=key)
+        m = _SYNTH_BOOK.match(key.rsplit("/", 1)[-1])
+        if m:
+            isbn = m.group(1)
+            return self._synthetic_book(isbn[3:] if isbn.startswith("000") else isbn)
+        return None
+
+    def _author(self, key: str) -> Optional[dict]:
+        if key in self.authors:
+            return dict(self.authors[key], key=key)
+        m = re.match(r"^/authors/OL9(\d+)A$", key)
+        if m and self.config.synthesize:
+            return {"key": key, "name": f"Yazar {m.group(1)}"}
+        return None
+
+    def handle(self, path: str) -> Tuple[str, int, Dict[str, str], Optional[dict]]:
+        """Route ``path`` and apply fault injection: ``(endpoint, status, headers, body)``."""
+        path = path.split("?", 1)[0]
+        with self._lock:
+            delay = self._latency(self._rng)
+            draw = self._rng.random()
+            redirect = self._rng.random() < self.config.redirect_rate
+        if delay > 0:
+            time.sleep(delay)
+
+        if m := _ISBN_PATH.match(path):
+            endpoint = "isbn"
+        elif m := _BOOK_PATH.match(path):
+            endpoint = "books"
+        elif m := _AUTHOR_PATH.match(path):
+            endpoint = "authors"
+        else:
+            return "other", 404, {}, {"error": "notfound"}
+
+        if draw < self.config.error_rate:
+            return endpoint, 500, {}, {"error": "Internal Server Error"}
+        if draw < self.config.error_rate + self.config.throttle_rate:
+            return endpoint, 429, {"Retry-After": f"{self.config.retry_after:g}"}, {"error": "Too Many Requests"}
+
+        if endpoint == "isbn":
+            isbn = m.group(1).upper()
+            key = self.by_isbn.get(isbn)
+            if key:
+                record = self._edition(key)
+            elif len(isbn) == 13 and isbn.startswith("978") and OpenLibraryClient.isbn13_to_isbn10(isbn) in self.by_isbn:
+                # Yalnızca ISBN-10 ile kayıtlı baskı: istemci ISBN-10 ile tekrar denemeli
+                record = None
+            else:
+                record = self._synthetic_book(isbn)
+            if record is None:
+                return endpoint, 404, {}, {"error": "notfound", "key": path}
+            if redirect:
+                return endpoint, 302, {"Location": f"{record['key']}.json"}, None
+            return endpoint, 200, {}, record
+        record = self._edition(path[:-5]) if endpoint == "books" else self._author(path[:-5])
+        if record is None:
+            return endpoint, 404, {}, {"error": "notfound", "key": path}
+        return endpoint, 200, {}, record
+
+    # ----- sunucu -----
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Serve in a background thread; returns the base URL (``port=0`` picks a free port)."""
+        if self._server is not None:
+            return self.url
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive: istemcinin bağlantı havuzu yeniden kullanılabilsin
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:
+                endpoint, status, headers, body = fake.handle(self.path)
+                with fake._lock:
+                    fake.counts[(endpoint, status)] += 1
+                payload = json.dumps(body, ensure_ascii=False).encode("utf-8") if body is not None else b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-openlibrary", daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = self._thread = None
+
+    def __enter__(self) -> "FakeOpenLibrary":
+        self.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+
+def add_fault_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency", default="0", help="Gecikme dağılımı (ms): fixed:20, uniform:10,50, normal:40,10, lognormal:40,0.6, exp:30")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="500 dönen isteklerin oranı")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="429 dönen isteklerin oranı")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="429 yanıtlarındaki Retry-After (s)")
+    parser.add_argument("--redirect-rate", type=float, default=0.0, help="ISBN isteklerinden 302 ile yönlendirilenlerin oranı")
+    parser.add_argument("--no-synthesize", action="store_true", help="Fixture'da olmayan ISBN'ler için 404 dön")
+    parser.add_argument("--fixtures", default=None, help="Fixture JSON dosyası (varsayılan: yerleşik örnekler)")
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def fake_from_args(args: argparse.Namespace) -> FakeOpenLibrary:
+    config = FakeConfig(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after,
+        redirect_rate=args.redirect_rate,
+        synthesize=not args.no_synthesize,
+        seed=args.seed,
+    )
+    if args.fixtures:
+        return FakeOpenLibrary.from_file(args.fixtures, config)
+    return FakeOpenLibrary(config)
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Yerel Open Library taklidi (gecikme/hata enjeksiyonu)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    add_fault_arguments(parser)
+    args = parser.parse_args(argv)
+    try:
+        fake = fake_from_args(args)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"OPENLIBRARY_BASE_URL={fake.start(args.host, args.port)}", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(fake.stats()), file=sys.stderr)
+        fake.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -23,16 +23,21 @@ from fastapi import (
 )
 from fastapi.security import APIKeyHeader
 from pydantic import BaseModel, Field
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
+
+from metrics import MetricsMiddleware, metrics_response
+from rate_limit import RateLimiter
 
 # Logging configuration
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # ===== Rate Limiter Configuration =====
-limiter = Limiter(key_func=get_remote_address)
+# GCRA tabanlı limiter. Durum RATE_LIMIT_STORAGE ile seçilen backend'de tutulur:
+# memory:// (varsayılan), shm://<ad> (yerel worker'lar arası), redis://localhost:6379/0
+# Kova anahtarı: X-API-Key varsa API anahtarı, yoksa istemci IP'si.
+# Anahtar başına kota: RATE_LIMIT_KEY_LIMITS="anahtar=600/minute,diger=10/second"
+limiter = RateLimiter.from_env()
+BOOKS_RATE_LIMIT = "60/minute"
 
 # ===== In-Memory Database (for demo purposes) =====
 books_db: List[dict] = []
@@ -89,7 +94,17 @@ app = FastAPI(
 
     - Genel endpoint'ler: 5 istek/dakika
     - Sıkı sınırlı endpoint'ler: 2 istek/dakika
-    - Kitap endpoint'leri: 10 istek/dakika
+    - Kitap endpoint'leri: 10 istek/dakika (`/limited-books`)
+    - Kitap CRUD endpoint'leri: 60 istek/dakika
+
+    Limitler API anahtarı (yoksa IP) ve endpoint bazında ayrı tutulur.
+    Çok worker'lı kurulumda ortak sayaç için `RATE_LIMIT_STORAGE=shm://library`
+    veya `RATE_LIMIT_STORAGE=redis://localhost:6379/0` kullanın.
+
+    ### 📊 Metrikler
+
+    `GET /metrics` Prometheus metin formatında istek süreleri ve rate limit
+    reddetme sayılarını döndürür.
 
     ### 🌐 API Versions
 
@@ -123,7 +138,9 @@ app = FastAPI(
 
 # Add rate limiter to app
 app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+
+# Route bazında istek süresi histogramı (/metrics)
+app.add_middleware(MetricsMiddleware, app_name="fastapi_main")
 
 # ===== Pydantic Models =====
 class Book(BaseModel):
@@ -312,6 +329,20 @@ async def health_check():
         "version": "2.0.0"
     }
 
+@app.get(
+    "/metrics",
+    tags=["🔧 Sistem"],
+    summary="Prometheus Metrikleri",
+    description="İstek süreleri ve rate limit sayaçlarını Prometheus metin formatında döndürür."
+)
+async def metrics():
+    """
+    📊 **Metrikler Endpoint'i**
+    
+    Prometheus veya uyumlu bir toplayıcı tarafından periyodik olarak okunmak içindir.
+    """
+    return metrics_response()
+
 # ===== Demo Endpoints =====
 @app.get(
     "/slow-endpoint",
@@ -340,7 +371,8 @@ async def handle_slow_request():
     summary="Yeni Kitap Ekle",
     description="Kütüphaneye yeni bir kitap ekler."
 )
-async def create_book(book: BookCreate):
+@limiter.limit(BOOKS_RATE_LIMIT)
+async def create_book(request: Request, book: BookCreate):
     """
     📝 **Yeni Kitap Ekleme**
     
@@ -373,7 +405,9 @@ async def create_book(book: BookCreate):
     summary="Kitapları Listele",
     description="Kütüphanedeki kitapları sayfalama ile listeler."
 )
+@limiter.limit(BOOKS_RATE_LIMIT)
 async def list_books(
+    request: Request,
     skip: Annotated[int, Query(description="Atlanacak kitap sayısı", ge=0)] = 0,
     limit: Annotated[int, Query(description="Getirilecek kitap sayısı", ge=1, le=100)] = 10,
 ):
@@ -398,7 +432,8 @@ async def list_books(
     summary="Kitap Detayı",
     description="Belirtilen ID'ye sahip kitabın detaylarını getirir."
 )
-async def get_book(book_id: Annotated[int, Path(title="Kitap ID'si", ge=1, description="Getirilecek kitabın benzersiz ID'si")]):
+@limiter.limit(BOOKS_RATE_LIMIT)
+async def get_book(request: Request, book_id: Annotated[int, Path(title="Kitap ID'si", ge=1, description="Getirilecek kitabın benzersiz ID'si")]):
     """
     🔍 **Kitap Detayı Getirme**
     
@@ -428,7 +463,9 @@ async def get_book(book_id: Annotated[int, Path(title="Kitap ID'si", ge=1, descr
     summary="Kitap Güncelle",
     description="Belirtilen ID'ye sahip kitabın bilgilerini günceller."
 )
+@limiter.limit(BOOKS_RATE_LIMIT)
 async def update_book(
+    request: Request,
     book_id: Annotated[int, Path(title="Kitap ID'si", ge=1, description="Güncellenecek kitabın ID'si")],
     book: Book,
     version: Annotated[Optional[int], Query(title="Versiyon Numarası", ge=1, description="Optimistic locking için versiyon")] = None,
@@ -477,7 +514,8 @@ async def update_book(
     summary="Kitap Sil",
     description="Belirtilen ID'ye sahip kitabı kütüphaneden siler."
 )
-async def delete_book(book_id: Annotated[int, Path(title="Kitap ID'si", ge=1, description="Silinecek kitabın ID'si")]):
+@limiter.limit(BOOKS_RATE_LIMIT)
+async def delete_book(request: Request, book_id: Annotated[int, Path(title="Kitap ID'si", ge=1, description="Silinecek kitabın ID'si")]):
     """
     🗑️ **Kitap Silme**
     
@@ -765,5 +803,9 @@ async def error_demo():
     )
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run("fastapi_main:app", host="127.0.0.1", port=8000, reload=True, log_level="info") 
\ No newline at end of file
+    # Geliştirme/üretim ayarları tek yerde: python fastapi_main.py --prod --workers 4
+    import sys
+
+    from run_api import main
+
+    main(["--app", "fastapi_main:app", "--no-browser", *sys.argv[1:]])
@@ -0,0 +1,191 @@
+"""Kitap türleri (Open Library ``subjects``) için ortak, sınırlı sözlük.
+
+Open Library bazı baskılar için yüzlerce, çoğu zaman uzun ve tekrar eden
+konu başlığı döndürür. ``GenreVocabulary.clean`` bunları:
+
+- normalleştirir (boşluklar, baştaki/sondaki noktalama; büyük/küçük harf ve
+  Türkçe karakter farkları aynı türe katlanır),
+- bilinen gürültüyü atar ("Accessible book", "nyt:..." gibi),
+- kitap başına ``max_per_book`` türle sınırlar, ``max_length`` karakterden
+  uzun adları atar,
+- her türü sözlükte bir kez tutar; aynı tür tüm kitaplarda aynı ``str``
+  nesnesini paylaşır ve bir tamsayı kimliğe sahiptir.
+
+Temizleme yalnızca Open Library'den yeni gelen veriye uygulanır; dosyadan
+okunan türler ``adopt`` ile olduğu gibi sözlüğe alınır (kırpılmaz, atılmaz).
+Sözlük anahtarı ``key`` (katlanmış ad) olduğundan "Roman" ve "roman " gibi
+yazımlar aynı türdür: ``?genre=`` filtresi ve istatistikler onları birlikte
+sayar, metne olmayan kayıtlar atlanır.
+
+``encode_records`` / ``decode_records`` dosyaya yazarken türleri bir tablo +
+kimlik listeleri olarak saklar (``STORAGE_COMPACT_GENRES=1``).
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from metrics import REGISTRY
+from text_search import fold
+
+
+DROPPED = REGISTRY.counter("genres_dropped_total", "Sözlüğe alınmayan tür/konu başlıkları", ["reason"])
+
+# Open Library'nin içerikle ilgisi olmayan, çok sık görülen konu başlıkları (katlanmış)
+IGNORED = frozenset({
+    "accessible book", "protected daisy", "in library", "lending library", "overdrive",
+    "large type books", "open library staff picks", "internet archive wishlist",
+})
+_MACHINE_TAG = re.compile(r"^[A-Za-z_]+:\S")
+
+
+def normalize(subject: Any, max_length: int = 60) -> Optional[str]:
+    """Clean a single subject; ``None`` if it should be dropped (noise, or longer than ``max_length``)."""
+    if not isinstance(subject, str):
+        return None
+    name = " ".join(subject.split()).strip(" .,;:-")
+    if not name:
+        return None
+    if len(name) > max_length:
+        DROPPED.labels("length").inc()
+        return None
+    # "nyt:hardcover-fiction=2008-..." gibi makine etiketleri de atılır
+    if fold(name) in IGNORED or _MACHINE_TAG.match(name):
+        DROPPED.labels("ignored").inc()
+        return None
+    return name
+
+
+class GenreVocabulary:
+    """Interned genre table: folded key -> id -> canonical (first seen) name."""
+
+    def __init__(self, max_per_book: int = 10, max_length: int = 60, max_size: int = 100_000) -> None:
+        self.max_per_book = max_per_book
+        self.max_length = max_length
+        self.max_size = max_size
+        self._names: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "GenreVocabulary":
+        return cls(
+            max_per_book=int(os.getenv("GENRES_MAX_PER_BOOK", "10")),
+            max_length=int(os.getenv("GENRES_MAX_LENGTH", "60")),
+            max_size=int(os.getenv("GENRES_MAX_VOCABULARY", "100000")),
+        )
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def names(self) -> List[str]:
+        return list(self._names)
+
+    def name(self, genre_id: int) -> str:
+        return self._names[genre_id]
+
+    @staticmethod
+    def key(name: str) -> str:
+        """Spelling-insensitive key: casing, diacritics, punctuation and spacing are folded."""
+        return fold(name)
+
+    def lookup(self, name: str) -> Optional[int]:
+        """Id of an already known genre (any casing/diacritics), else ``None``."""
+        return self._ids.get(self.key(name))
+
+    def canonical(self, name: str) -> str:
+        """The shared name of ``name``'s genre (first seen spelling); ``name`` if unknown."""
+        genre_id = self.lookup(name)
+        return self._names[genre_id] if genre_id is not None else name
+
+    def intern(self, name: str, bounded: bool = True) -> Optional[int]:
+        key = self.key(name)
+        genre_id = self._ids.get(key)
+        if genre_id is not None:
+            return genre_id
+        with self._lock:
+            genre_id = self._ids.get(key)
+            if genre_id is None:
+                if bounded and len(self._names) >= self.max_size:
+                    DROPPED.labels("vocabulary").inc()
+                    return None
+                genre_id = len(self._names)
+                self._names.append(name)
+                self._ids[key] = genre_id
+            return genre_id
+
+    def clean_ids(self, subjects: Iterable[Any]) -> List[int]:
+        ids: List[int] = []
+        for subject in subjects:
+            name = normalize(subject, self.max_length)
+            if name is None:
+                continue
+            if len(ids) >= self.max_per_book:
+                # Fazlası sözlüğe de girmez
+                DROPPED.labels("per_book").inc()
+                break
+            genre_id = self.intern(name)
+            if genre_id is not None and genre_id not in ids:
+                ids.append(genre_id)
+        return ids
+
+    def clean(self, subjects: Iterable[Any]) -> List[str]:
+        """Normalized, de-duplicated, capped genre names (shared ``str`` objects)."""
+        return [self._names[i] for i in self.clean_ids(subjects)]
+
+    def adopt(self, names: Iterable[Any]) -> List[Any]:
+        """Intern already stored genres as they are: no normalization, cap or size limit.
+
+        A name equal to the known one is swapped for the shared ``str``;
+        other spellings and non-string entries are kept unchanged.
+        """
+        adopted: List[Any] = []
+        for name in names:
+            if isinstance(name, str) and name:
+                canonical = self._names[self.intern(name, bounded=False)]
+                if canonical == name:
+                    name = canonical
+            adopted.append(name)
+        return adopted
+
+
+def encode_records(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """``[{..., "genres": [names]}]`` -> ``{"genres": table, "books": [{..., "genres": [ids]}]}``."""
+    table: List[str] = []
+    ids: Dict[str, int] = {}
+    books: List[Dict[str, Any]] = []
+    for record in records:
+        names = record.get("genres")
+        if names:
+            encoded = []
+            for name in names:
+                if not isinstance(name, str):
+                    continue  # metin olmayan bozuk kayıt tabloya giremez
+                genre_id = ids.get(name)
+                if genre_id is None:
+                    genre_id = ids[name] = len(table)
+                    table.append(name)
+                encoded.append(genre_id)
+            record = dict(record, genres=encoded)
+        books.append(record)
+    return {"genres": table, "books": books}
+
+
+def decode_records(raw: Any) -> List[Dict[str, Any]]:
+    """Inverse of ``encode_records``; a plain list (the original format) is returned as is."""
+    if isinstance(raw, list):
+        return [item for item in raw if isinstance(item, dict)]
+    if not isinstance(raw, dict) or not isinstance(raw.get("books"), list):
+        return []
+    table = raw.get("genres") or []
+    return [decode_genres(item, table) for item in raw["books"] if isinstance(item, dict)]
+
+
+def decode_genres(record: Dict[str, Any], table: List[str]) -> Dict[str, Any]:
+    genres = record.get("genres")
+    if genres and isinstance(genres[0], int):
+        record["genres"] = [table[i] for i in genres if 0 <= i < len(table)]
+    return record
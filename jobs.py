@@ -0,0 +1,168 @@
+"""Arka plan zenginleştirme kuyruğu (``POST /books?async=true``).
+
+İstek yalnızca ISBN'i doğrulayıp kuyruğa bir iş ekler ve hemen 202 döner;
+Open Library sorgusu, yazar çözümleme ve ekleme ``workers`` adet arka plan
+thread'inde yapılır. Böylece yavaş bir upstream yanıtı isteği (ve tarama
+arayüzünü) bekletmez.
+
+- Kuyruk ``max_pending`` ile sınırlıdır; doluysa ``QueueFull`` yükseltilir
+  (API 503 + ``Retry-After`` döner), bellek sınırsız büyümez.
+- Aynı anahtar (ISBN) için bekleyen/çalışan bir iş varsa yenisi açılmaz,
+  mevcut iş döner.
+- Biten işler ``keep`` adet saklanır (``GET /jobs/{id}``); eskiler atılır.
+"""
+
+from __future__ import annotations
+
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from metrics import REGISTRY
+
+
+JOBS = REGISTRY.counter("jobs_total", "Arka plan zenginleştirme işleri", ["result"])
+QUEUE_DEPTH = REGISTRY.gauge("jobs_queue_depth", "Kuyrukta bekleyen işler")
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+
+class QueueFull(Exception):
+    """Raised by ``JobQueue.submit`` when ``max_pending`` jobs are waiting."""
+
+
+@dataclass
+class Job:
+    key: str
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = QUEUED
+    result: Any = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "isbn": self.key,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobQueue:
+    """Bounded queue of ``handler(key)`` calls run by a small worker pool.
+
+    Workers start on the first ``submit`` and stop in ``close``; a closed
+    queue starts them again on the next submit.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[str], Any],
+        workers: int = 4,
+        max_pending: int = 100,
+        keep: int = 1000,
+    ) -> None:
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.max_pending = max_pending
+        self.keep = keep
+        self._queue: "queue.Queue[Optional[Job]]" = queue.Queue(maxsize=max_pending)
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._active: Dict[str, Job] = {}  # anahtar -> bekleyen/çalışan iş
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        QUEUE_DEPTH.set_function(self._queue.qsize)
+
+    @classmethod
+    def from_env(cls, handler: Callable[[str], Any]) -> "JobQueue":
+        return cls(
+            handler,
+            workers=int(os.getenv("JOBS_WORKERS", "4")),
+            max_pending=int(os.getenv("JOBS_MAX_PENDING", "100")),
+            keep=int(os.getenv("JOBS_KEEP", "1000")),
+        )
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, key: str) -> Job:
+        """Queue ``handler(key)``; returns the already active job for ``key`` if any."""
+        with self._lock:
+            job = self._active.get(key)
+            if job is not None:
+                return job
+            job = Job(key)
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                JOBS.labels("rejected").inc()
+                raise QueueFull(f"Kuyruk dolu ({self.max_pending} iş bekliyor)") from None
+            self._active[key] = job
+            self._remember(job)
+            if not self._threads:
+                self._start_locked()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def _remember(self, job: Job) -> None:
+        self._jobs[job.id] = job
+        # En eski işler atılır; henüz bitmemiş bir işte durulur
+        while len(self._jobs) > self.keep and next(iter(self._jobs.values())).done:
+            self._jobs.popitem(last=False)
+
+    def _start_locked(self) -> None:
+        for i in range(self.workers):
+            t = threading.Thread(target=self._run, name=f"jobs-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            job.status = RUNNING
+            try:
+                job.result = self.handler(job.key)
+                result = SUCCEEDED
+            except Exception as e:
+                job.error = str(e) or type(e).__name__
+                result = FAILED
+            job.finished_at = time.time()
+            # Durum en son yazılır; "succeeded" gören istemci sonucu da görür
+            job.status = result
+            JOBS.labels(result).inc()
+            with self._lock:
+                if self._active.get(job.key) is job:
+                    del self._active[job.key]
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """Let the workers finish the queued jobs, then stop them.
+
+        Returns ``False`` if jobs were still running after ``timeout``.
+        """
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            # Durdurma işaretleri bekleyen işlerin arkasına eklenir; kuyruk doluysa yer açılması beklenir
+            self._queue.put(None)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for t in threads:
+            t.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        return not any(t.is_alive() for t in threads)
@@ -6,12 +6,23 @@ OOP Kütüphane Uygulaması (Aşama 1 ve 2 gereksinimleri)
 
 from __future__ import annotations
 
+import heapq
 import json
 import os
-from dataclasses import dataclass, asdict, field
-from typing import List, Optional, Tuple
+import threading
+from dataclasses import dataclass, field, fields
+from typing import Dict, Iterable, List, Optional, Tuple
+from catalog_stats import CatalogStats, split_authors
+from genres import GenreVocabulary
 from storage import Storage, JsonFileStorage
+from text_search import PrefixIndex, TrigramIndex
 from datetime import datetime, timezone
+from metrics import REGISTRY
+from tracing import span
+
+
+STORAGE_DURATION = REGISTRY.histogram("library_storage_duration_seconds", "Kitap listesinin okunma/yazılma süresi", ["op"])
+CATALOG_SIZE = REGISTRY.gauge("library_books", "Kütüphanedeki kitap sayısı")
 
 
 @dataclass
@@ -25,64 +36,341 @@ class Book(LibraryItem):
     isbn: str
     created_at: Optional[str] = None  # ISO 8601
     genres: List[str] = field(default_factory=list)
+    updated_at: Optional[str] = None  # son Open Library yenilemesi (ISO 8601)
 
     def __str__(self) -> str:
         return f"{self.title} by {self.author} (ISBN: {self.isbn})"
 
+    def to_dict(self) -> dict:
+        # asdict() her alanı özyinelemeli kopyalar; her kayıtta tüm katalog için çağrıldığından
+        # düz alanlı Book için sığ kopya kullanılır (~15 kat hızlı)
+        return {name: getattr(self, name) for name in _BOOK_FIELDS}
+
+
+_BOOK_FIELDS = tuple(f.name for f in fields(Book))
+
 
 class Library:
     def __init__(self, storage_path: str = "library.json", storage: Optional[Storage] = None):
         self.storage_path = storage_path
         self.storage: Storage = storage or JsonFileStorage(storage_path)
-        self._books: List[Book] = []
+        # ISBN -> Book; sözlük ekleme sırasını koruduğu için liste sırası da korunur
+        self._by_isbn: Dict[str, Book] = {}
+        # Ortak tür sözlüğü (normalleştirme + kitap başı sınır) ve tür id -> ISBN kümesi
+        self.vocabulary = GenreVocabulary.from_env()
+        # Yazar/tür/tarih sayaçları; her ekleme/silmede güncellenir.
+        # Türler sözlükteki ortak adla sayılır: "Roman" ve "roman " tek tür
+        self.catalog_stats = CatalogStats(genre_name=self.vocabulary.canonical)
+        self._by_genre: Dict[int, Dict[str, None]] = {}
+        # Başlık + yazar trigram indeksi; ilk fuzzy_search çağrısında kurulur
+        self._text_index: Optional[TrigramIndex] = None
+        # Otomatik tamamlama için başlık/yazar önek indeksleri; ilk autocomplete çağrısında kurulur
+        self._prefix_index: Optional[Dict[str, PrefixIndex]] = None
+        # Son kayıttan beri değişen ISBN -> Book (silindiyse None); None = bilinmiyor, tam yazma
+        self._changes: Optional[Dict[str, Optional[Book]]] = None
+        # API endpoint'leri thread havuzunda çalışır; değişiklikler ve okumalar bu kilidi alır
+        self._lock = threading.RLock()
+        # Kayıtları sıraya koyar: görüntü sırasıyla yazılır, okumalar disk yazımını beklemez
+        self._save_lock = threading.Lock()
         self.load_books()
 
+    @property
+    def _books(self) -> List[Book]:
+        return self.list_books()
+
+    @_books.setter
+    def _books(self, books: List[Book]) -> None:
+        # Testler kitap listesini doğrudan sıfırlayabiliyor; indeksleri yeniden kur
+        with self._lock:
+            self._by_isbn = {}
+            self.catalog_stats.clear()
+            self._by_genre = {}
+            self._text_index = None
+            self._prefix_index = None
+            self._changes = None
+            for b in books:
+                self._discard(b.isbn)
+                self._insert(b)
+
+    def _insert(self, book: Book) -> None:
+        # Tüm indeksler yalnızca _insert/_discard üzerinden güncellenir
+        if isinstance(book.genres, list) and book.genres:
+            # Kitap henüz katalogda değil; türler sözlükteki ortak str nesneleriyle değiştirilir.
+            # Temizleme/sınır book_from_info'da; kayıtlı türler burada kırpılmaz
+            book.genres = self.vocabulary.adopt(book.genres)
+            for name in book.genres:
+                if isinstance(name, str) and name:
+                    self._by_genre.setdefault(self.vocabulary.lookup(name), {})[book.isbn] = None
+        self._by_isbn[book.isbn] = book
+        self.catalog_stats.add(book)
+        if self._changes is not None:
+            self._changes[book.isbn] = book
+        if self._text_index is not None:
+            self._text_index.add(book.isbn, f"{book.title} {book.author}")
+        if self._prefix_index is not None:
+            self._prefix_index["title"].add(book.title)
+            for author in split_authors(book.author):
+                self._prefix_index["author"].add(author)
+
+    def _discard(self, isbn: str) -> Optional[Book]:
+        book = self._by_isbn.pop(isbn, None)
+        if book is not None:
+            self._unindex(book)
+            if self._changes is not None:
+                self._changes[isbn] = None
+        return book
+
+    def _unindex(self, book: Book) -> None:
+        self.catalog_stats.remove(book)
+        if isinstance(book.genres, list):
+            for name in book.genres:
+                if not isinstance(name, str) or not name:
+                    continue
+                members = self._by_genre.get(self.vocabulary.lookup(name))
+                if members is not None:
+                    members.pop(book.isbn, None)
+        if self._text_index is not None:
+            self._text_index.remove(book.isbn)
+        if self._prefix_index is not None:
+            self._prefix_index["title"].remove(book.title)
+            for author in split_authors(book.author):
+                self._prefix_index["author"].remove(author)
+
+    def __len__(self) -> int:
+        return len(self._by_isbn)
+
+    def __contains__(self, isbn: object) -> bool:
+        return isbn in self._by_isbn
+
+    def isbns(self):
+        """Live, O(1)-membership view of the ISBNs in the library."""
+        return self._by_isbn.keys()
+
     # Aşama 1
     def add_book(self, book: Book) -> None:
-        if self.find_book(book.isbn):
-            raise ValueError(f"Book with ISBN {book.isbn} already exists")
-        self._books.append(book)
+        with self._lock:
+            if book.isbn in self._by_isbn:
+                raise ValueError(f"Book with ISBN {book.isbn} already exists")
+            self._insert(book)
         self.save_books()
 
     def remove_book(self, isbn: str) -> bool:
-        for i, b in enumerate(self._books):
-            if b.isbn == isbn:
-                self._books.pop(i)
-                self.save_books()
-                return True
-        return False
+        with self._lock:
+            if self._discard(isbn) is None:
+                return False
+        self.save_books()
+        return True
 
     def remove_books(self, isbns: List[str]) -> Tuple[List[str], List[str]]:
-        """Remove multiple books by ISBN. Returns (deleted, not_found)."""
+        """Remove multiple books by ISBN with a single save. Returns (deleted, not_found)."""
         deleted: List[str] = []
         not_found: List[str] = []
-        for isbn in isbns:
-            if self.remove_book(isbn):
-                deleted.append(isbn)
-            else:
-                not_found.append(isbn)
+        with self._lock:
+            for isbn in isbns:
+                if self._discard(isbn) is not None:
+                    deleted.append(isbn)
+                else:
+                    not_found.append(isbn)
+        if deleted:
+            self.save_books()
         return deleted, not_found
 
+    def update_books(self, books: Iterable[Book], expected: Optional[Dict[str, Book]] = None) -> List[Book]:
+        """Replace existing books (matched by ISBN) with a single save; returns the replaced ones.
+
+        Books are swapped for the new objects, never changed in place, so a
+        reader holding the old object keeps a consistent record. ISBNs that
+        are no longer in the library are skipped, as are those whose current
+        object is not ``expected[isbn]`` (changed since it was read).
+        """
+        updated: List[Book] = []
+        with self._lock:
+            for book in books:
+                current = self._by_isbn.get(book.isbn)
+                if current is None or (expected is not None and expected.get(book.isbn) is not current):
+                    continue
+                self._unindex(current)
+                # Var olan anahtara atama sözlükteki sırayı korur
+                self._insert(book)
+                updated.append(book)
+        if updated:
+            self.save_books()
+        return updated
+
     def list_books(self) -> List[Book]:
-        return list(self._books)
+        with self._lock:
+            return list(self._by_isbn.values())
 
     def find_book(self, isbn: str) -> Optional[Book]:
-        for b in self._books:
-            if b.isbn == isbn:
-                return b
-        return None
+        return self._by_isbn.get(isbn)
+
+    def books_by_genre(self, genre: str) -> List[Book]:
+        """Books tagged with ``genre`` (case/diacritic-insensitive), in insertion order."""
+        with self._lock:
+            genre_id = self.vocabulary.lookup(genre)
+            members = self._by_genre.get(genre_id, {}) if genre_id is not None else {}
+            return [self._by_isbn[isbn] for isbn in members]
+
+    def stats(self, top: int = 10, daily: bool = False) -> dict:
+        """Counts by author, genre and added date, kept up to date incrementally."""
+        with self._lock:
+            return self.catalog_stats.snapshot(top, daily)
+
+    def fuzzy_search(self, query: str, limit: int = 10, min_score: float = 0.5) -> List[Tuple[Book, float]]:
+        """Typo-tolerant title/author search; returns (book, score) pairs, best first."""
+        with self._lock:
+            hits = self._ensure_text_index().search(query, limit, min_score)
+            return [(self._by_isbn[isbn], score) for isbn, score in hits]
+
+    def _ensure_text_index(self) -> TrigramIndex:
+        if self._text_index is None:
+            index = TrigramIndex()
+            for b in self._by_isbn.values():
+                index.add(b.isbn, f"{b.title} {b.author}")
+            self._text_index = index
+        return self._text_index
+
+    def _ensure_prefix_index(self) -> Dict[str, PrefixIndex]:
+        if self._prefix_index is None:
+            titles, authors = PrefixIndex(), PrefixIndex()
+            titles.bulk_load(b.title for b in self._by_isbn.values())
+            authors.bulk_load(a for b in self._by_isbn.values() for a in split_authors(b.author))
+            self._prefix_index = {"title": titles, "author": authors}
+        return self._prefix_index
+
+    def preload(self) -> None:
+        """Build the lazily created search/autocomplete indexes now (e.g. at server start)."""
+        with self._lock:
+            self._ensure_text_index()
+            self._ensure_prefix_index()
+
+    def autocomplete(self, prefix: str, limit: int = 10, field: Optional[str] = None) -> List[dict]:
+        """Title/author completions for ``prefix`` (word starts match too).
+
+        Returns the top ``limit`` ``{"text", "field", "count"}`` dicts, ranked
+        by ``text_search.rank`` (text-start matches first, then by book
+        count); ``field`` limits the results to ``"title"`` or ``"author"``.
+        """
+        with self._lock:
+            index = self._ensure_prefix_index()
+            fields = (field,) if field else ("title", "author")
+            candidates = [
+                (key, text, f, count)
+                for f in fields
+                for key, text, count in index[f].ranked(prefix, limit)
+            ]
+        return [{"text": text, "field": f, "count": count}
+                for _, text, f, count in heapq.nsmallest(limit, candidates)]
 
     def load_books(self) -> None:
-        raw = self.storage.read()
-        self._books = [Book(**item) for item in raw]
+        with span("library.load_books"), STORAGE_DURATION.labels("load").time():
+            raw = self.storage.read()
+            self._books = [Book(**item) for item in raw]
+            self._changes = {}
+        CATALOG_SIZE.set(len(self._by_isbn))
 
     def save_books(self) -> None:
-        data = [asdict(b) for b in self._books]
-        self.storage.write(data)
+        # Anlık görüntü _lock altında kopyalanır, diske yazma yalnızca _save_lock altında
+        # yapılır: okumalar ve değişiklikler yazmayı beklemez. Görüntü alma + yazma
+        # _save_lock ile sıralıdır, eski bir görüntü yenisinin üzerine yazılamaz.
+        # Write-behind "ack" modunda diske yazılmayı kilitler dışında bekleriz ki
+        # eşzamanlı istekler aynı yazmayı paylaşabilsin
+        with span("library.save_books") as s:
+            with self._save_lock, STORAGE_DURATION.labels("save").time():
+                with self._lock:
+                    # Kitap nesneleri yerinde değiştirilmez; listenin kopyası tutarlı bir görüntüdür
+                    books = list(self._by_isbn.values())
+                    changes, self._changes = self._changes, {}
+                s.set("books", len(books))
+                # Parçalı depolama yalnızca değişen kayıtları kullanır, diğerleri tam görüntüyü
+                records = None if changes is None else {
+                    isbn: (b.to_dict() if b is not None else None) for isbn, b in changes.items()
+                }
+                try:
+                    self.storage.write_snapshot(lambda: [b.to_dict() for b in books], records)
+                except BaseException:
+                    with self._lock:
+                        # Hangi kayıtların yazılmadığı bilinmiyor; sonraki kayıt tam yazılır
+                        self._changes = None
+                    raise
+                CATALOG_SIZE.set(len(books))
+            self.storage.sync()
+
+    def close(self) -> None:
+        """Flush pending writes (write-behind storage) and release the backend."""
+        self.storage.close()
+
+    def add_books(self, books: Iterable[Book]) -> Tuple[List[Book], List[str]]:
+        """Add many books with a single save. Returns (added, duplicate_isbns)."""
+        added: List[Book] = []
+        duplicates: List[str] = []
+        with self._lock:
+            for book in books:
+                if book.isbn in self._by_isbn:
+                    duplicates.append(book.isbn)
+                    continue
+                self._insert(book)
+                added.append(book)
+        if added:
+            self.save_books()
+        return added, duplicates
 
     # Aşama 2
     def add_book_by_isbn(self, isbn: str, client: "OpenLibraryClient") -> Book:
-        info = client.fetch_by_isbn(isbn)
+        with span("library.add_book_by_isbn", isbn=isbn):
+            info = client.fetch_by_isbn(isbn)
+            book = self.book_from_info(isbn, info)
+            self.add_book(book)
+        return book
+
+    def add_books_by_isbn(
+        self, isbns: Iterable[str], client: "OpenLibraryClient", workers: int = 1
+    ) -> Tuple[List[Book], Dict[str, str]]:
+        """Fetch and add many ISBNs, persisting once at the end.
+
+        Returns (added, failed) where ``failed`` maps ISBN -> error message.
+        ISBNs already in the library are reported as failed without a fetch,
+        as are ISBNs another caller added while they were being fetched.
+        With ``workers > 1`` fetches run concurrently (the client's scheduler
+        still enforces the upstream rate budget); results keep input order.
+        """
+        failed: Dict[str, str] = {}
+        todo: List[str] = []
+        seen = set()
+        for isbn in isbns:
+            if isbn in seen or isbn in self._by_isbn:
+                failed[isbn] = f"Book with ISBN {isbn} already exists"
+                continue
+            seen.add(isbn)
+            todo.append(isbn)
+
+        def fetch(isbn: str) -> Optional[Book]:
+            try:
+                return self.book_from_info(isbn, client.fetch_by_isbn(isbn))
+            except Exception as e:
+                failed[isbn] = str(e)
+                return None
+
+        if workers > 1 and len(todo) > 1:
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max_workers=min(workers, len(todo))) as pool:
+                fetched = list(pool.map(fetch, todo))
+        else:
+            fetched = [fetch(isbn) for isbn in todo]
+        added, duplicates = self.add_books(b for b in fetched if b is not None)
+        # Ön kontrolden sonra (ör. eşzamanlı bir API isteğiyle) eklenenler raporda kaybolmasın
+        for isbn in duplicates:
+            failed[isbn] = f"Book with ISBN {isbn} already exists"
+        return added, failed
+
+    def book_from_info(self, isbn: str, info: dict) -> Book:
+        """Build a ``Book`` from an Open Library record (``OpenLibraryClient.fetch_by_isbn``).
+
+        Subjects are cleaned through the library's genre vocabulary; the
+        book is not added.
+        """
+        # Open Library'den yeni gelen konu başlıkları burada normalleştirilip sınırlanır
         title = info["title"]
         authors: List[str] = info.get("authors", [])
         author = ", ".join(authors) if authors else "Unknown"
@@ -95,8 +383,6 @@ class Library:
                 elif isinstance(s, dict) and "name" in s and isinstance(s["name"], str):
                     subjects.append(s["name"]) 
         created_at = datetime.now(timezone.utc).isoformat()
-        book = Book(title=title, author=author, isbn=isbn, created_at=created_at, genres=subjects)
-        self.add_book(book)
-        return book
+        return Book(title=title, author=author, isbn=isbn, created_at=created_at, genres=self.vocabulary.clean(subjects))
 
     
\ No newline at end of file
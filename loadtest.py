@@ -0,0 +1,131 @@
+"""Uçtan uca yük testi: gerçek API süreci + yerel Open Library taklidi.
+
+``fake_openlibrary.FakeOpenLibrary`` bu süreçte başlatılır, API
+``run_api.py --prod`` ile ayrı bir süreçte ``OPENLIBRARY_BASE_URL`` taklide
+yönlendirilerek açılır. Ardından akışlar gerçek HTTP üzerinden sürülür:
+
+- ``preview``: ``GET /books/preview/{isbn}`` (Open Library sorgusu, kayıt yok)
+- ``add``: ``POST /books`` (sorgu + yazar çözümleme + ekleme ve kayıt)
+
+Her akış için verim, p50/p90/p99 gecikme, durum kodu dağılımı ve taklidin
+gördüğü upstream istekleri (yönlendirme, 429, 500 dahil) raporlanır.
+Upstream gecikmesi ve hata oranları ``fake_openlibrary.py`` ile aynı
+seçeneklerle verilir.
+
+Kullanım:
+    python loadtest.py --requests 500 --concurrency 16 --latency lognormal:80,0.5
+    python loadtest.py --flows add --error-rate 0.05 --throttle-rate 0.05 --redirect-rate 1 --out yuk.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional
+
+from benchmark import Result, drive, free_port, git_commit, start_server, stop_server, make_books, make_isbn
+from fake_openlibrary import FakeOpenLibrary, add_fault_arguments, fake_from_args
+from storage import JsonFileStorage
+
+
+FLOWS = ("preview", "add")
+# Akışlar ayrı ISBN aralıkları kullanır; ön doldurulan katalogla çakışmaz
+_ISBN_OFFSET = {"preview": 1_000_000, "add": 2_000_000}
+
+
+def flow_requests(flow: str, n: int) -> List[Dict[str, Any]]:
+    isbns = [make_isbn(_ISBN_OFFSET[flow] + i) for i in range(n)]
+    if flow == "preview":
+        return [{"method": "GET", "url": f"/books/preview/{isbn}"} for isbn in isbns]
+    return [{"method": "POST", "url": "/books", "json": {"isbn": isbn}, "expect": 201} for isbn in isbns]
+
+
+def _delta(before: Dict[str, int], after: Dict[str, int]) -> Dict[str, int]:
+    return {k: v - before.get(k, 0) for k, v in after.items() if v - before.get(k, 0)}
+
+
+def run(
+    fake: FakeOpenLibrary,
+    flows: List[str],
+    requests: int = 200,
+    concurrency: int = 16,
+    size: int = 1000,
+    upstream_rate: float = 1000.0,
+    timeout: float = 60.0,
+) -> Dict[str, Any]:
+    results: List[Result] = []
+    env = {
+        "OPENLIBRARY_BASE_URL": fake.start(),
+        # Varsayılan bütçe (5 istek/s) gerçek Open Library içindir; taklitte sistemin kendisi ölçülür
+        "OPENLIBRARY_RATE": str(upstream_rate),
+        "OPENLIBRARY_MAX_RATE": str(upstream_rate),
+    }
+    try:
+        with tempfile.TemporaryDirectory(prefix="kutuphane-load-") as workdir:
+            JsonFileStorage(os.path.join(workdir, "library.json")).write([b.to_dict() for b in make_books(size)])
+            port = free_port()
+            # api:app yalnızca tek worker ile çalışır (run_api.SINGLE_PROCESS_APPS)
+            proc = start_server(workdir, ["--prod"], port, env=env)
+            try:
+                for flow in flows:
+                    before = fake.stats()
+                    stats = asyncio.run(drive(f"http://127.0.0.1:{port}", flow_requests(flow, requests), concurrency, timeout))
+                    seconds = stats.pop("seconds")
+                    stats.update(concurrency=concurrency, upstream=_delta(before, fake.stats()))
+                    results.append(Result(f"e2e.{flow}", size, requests, seconds, stats))
+            finally:
+                stop_server(proc)
+    finally:
+        fake.stop()
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "cpu_count": os.cpu_count(),
+            "upstream": asdict(fake.config),
+            "upstream_rate": upstream_rate,
+        },
+        "results": [r.as_dict() for r in results],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Uçtan uca yük testi (yerel Open Library taklidiyle)")
+    parser.add_argument("--flows", default=",".join(FLOWS), help=f"Çalıştırılacak akışlar: {','.join(FLOWS)}")
+    parser.add_argument("--requests", type=int, default=200, help="Akış başına istek sayısı")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--size", type=int, default=1000, help="Başlangıç katalog boyutu")
+    parser.add_argument("--upstream-rate", type=float, default=1000.0, help="İstemcinin upstream istek bütçesi (istek/s)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="İstek başına zaman aşımı (s)")
+    parser.add_argument("--out", default=None, help="Sonuç JSON dosyası (varsayılan: stdout)")
+    add_fault_arguments(parser)
+    args = parser.parse_args(argv)
+
+    flows = [f for f in args.flows.split(",") if f]
+    if set(flows) - set(FLOWS):
+        parser.error(f"Bilinmeyen akış: {', '.join(sorted(set(flows) - set(FLOWS)))}")
+    try:
+        fake = fake_from_args(args)
+    except ValueError as e:
+        parser.error(str(e))
+
+    report = run(fake, flows, args.requests, args.concurrency, args.size, args.upstream_rate, args.timeout)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    for r in report["results"]:
+        extra = r["extra"]
+        print(f"{r['name']:<12} {r['ops_per_second']:>8.1f} istek/s  p50 {extra['p50_ms']:>8.1f} ms  "
+              f"p99 {extra['p99_ms']:>8.1f} ms  hata {extra['errors']}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
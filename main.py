@@ -1,11 +1,52 @@
 """Komut satırı uygulaması (Aşama 1 ve 2)
-Menü tabanlı basit CLI.
+Argümansız çalıştırılınca menü tabanlı basit CLI; alt komutlarla betiklenebilir:
+
+    python main.py add 9789750719387 9786053609421 --workers 4
+    cat isbns.txt | python main.py add -
+    python main.py remove -f silinecekler.txt
+    python main.py list --limit 20
+    python main.py list --genre "Turkish fiction"
+    python main.py find 9789750719387
+    python main.py search "sabahattin"
+    python main.py search "sabahatin ali" --fuzzy
+    python main.py export --out yedek.json
+    python main.py import yedek.json
+    python main.py stats
+    python main.py refresh --limit 100 --rate 1
+
+Çıktı varsayılan olarak JSON'dur (``--format text`` ile okunabilir metin).
+Kısmi hata durumunda çıkış kodu 1'dir; okunamayan girdi (ör. bozuk JSON)
+ve geçersiz seçenekler 2 ile çıkar. ``add`` zaten katalogda olan ISBN'leri
+``skipped`` altında raporlar; aynı listeyi yeniden çalıştırmak hata değildir.
 """
 
 from __future__ import annotations
 
-from library import Library
+import argparse
+import json
+import sys
+from dataclasses import asdict
+from typing import Any, Iterable, List, Optional, TextIO
+
+from library import Book, Library
 from open_library import OpenLibraryClient
+from storage import storage_from_env
+from refresher import Refresher
+from text_search import fold
+
+
+class CommandError(Exception):
+    """Unusable input for a subcommand; reported on stderr with exit code 2."""
+
+
+def _positive_int(value: str) -> int:
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"tam sayı olmalı: {value}") from None
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"1 veya daha büyük olmalı: {value}")
+    return number
 
 
 def print_menu() -> None:
@@ -18,9 +59,7 @@ def print_menu() -> None:
     print("6. Çıkış")
 
 
-def main() -> None:
-    lib = Library()
-    client = OpenLibraryClient()
+def run_menu(lib: Library, client: OpenLibraryClient) -> None:
 
     while True:
         print_menu()
@@ -55,7 +94,263 @@ def main() -> None:
             print("Geçersiz seçim")
 
 
+# ===== Alt komutlar =====
+
+def read_isbns(values: Iterable[str], files: Iterable[str], stdin: TextIO) -> List[str]:
+    """ISBNs from arguments, ``-f`` files and stdin (``-``), in order, de-duplicated.
+
+    Lines may hold several ISBNs separated by commas or whitespace; ``#`` starts a comment.
+    """
+    chunks: List[str] = []
+    for value in values:
+        if value == "-":
+            chunks.extend(stdin)
+        else:
+            chunks.append(value)
+    for path in files:
+        if path == "-":
+            chunks.extend(stdin)
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            chunks.extend(f)
+    out: List[str] = []
+    for chunk in chunks:
+        chunk = chunk.split("#", 1)[0]
+        out.extend(token for token in chunk.replace(",", " ").split() if token)
+    return list(dict.fromkeys(out))
+
+
+def _normalize(isbns: List[str], failed: dict) -> List[str]:
+    valid: List[str] = []
+    for code in isbns:
+        try:
+            norm = OpenLibraryClient.normalize_isbn_or_barcode(code)
+        except ValueError as e:
+            failed[code] = str(e)
+            continue
+        if not OpenLibraryClient.has_valid_checksum(norm):
+            failed[code] = "Geçersiz ISBN (kontrol hanesi hatalı)"
+            continue
+        valid.append(norm)
+    return list(dict.fromkeys(valid))
+
+
+def _book_dict(book: Book) -> dict:
+    return asdict(book)
+
+
+def cmd_add(args: argparse.Namespace, lib: Library, client: Optional[OpenLibraryClient]) -> Any:
+    failed: dict = {}
+    isbns = _normalize(read_isbns(args.isbns, args.file, args.stdin), failed)
+    # Katalogda olanlar istenen son durumdadır; tekrar çalıştırma hata sayılmaz
+    skipped = [isbn for isbn in isbns if isbn in lib]
+    isbns = [isbn for isbn in isbns if isbn not in lib]
+    client = client or OpenLibraryClient.from_env()
+    added: List[Book] = []
+    # Her parti tek seferde kaydedilir; büyük içe aktarmalar yarıda kesilse de ilerleme korunur
+    for start in range(0, len(isbns), args.batch_size):
+        batch_added, batch_failed = lib.add_books_by_isbn(isbns[start:start + args.batch_size], client, workers=args.workers)
+        added.extend(batch_added)
+        failed.update(batch_failed)
+    return {"added": [_book_dict(b) for b in added], "skipped": skipped, "failed": failed}, bool(failed)
+
+
+def cmd_remove(args: argparse.Namespace, lib: Library, client: Optional[OpenLibraryClient]) -> Any:
+    deleted, not_found = lib.remove_books(read_isbns(args.isbns, args.file, args.stdin))
+    return {"deleted": deleted, "not_found": not_found}, bool(not_found)
+
+
+def cmd_list(args: argparse.Namespace, lib: Library, client: Optional[OpenLibraryClient]) -> Any:
+    books = lib.books_by_genre(args.genre) if args.genre else lib.list_books()
+    if args.limit is not None:
+        books = books[args.offset:args.offset + args.limit]
+    else:
+        books = books[args.offset:]
+    return [_book_dict(b) for b in books], False
+
+
+def cmd_find(args: argparse.Namespace, lib: Library, client: Optional[OpenLibraryClient]) -> Any:
+    found = {}
+    missing = []
+    for isbn in read_isbns(args.isbns, args.file, args.stdin):
+        book = lib.find_book(isbn)
+        if book is None:
+            missing.append(isbn)
+        else:
+            found[isbn] = _book_dict(book)
+    return {"found": found, "not_found": missing}, bool(missing)
+
+
+def cmd_search(args: argparse.Namespace, lib: Library, client: Optional[OpenLibraryClient]) -> Any:
+    if args.fuzzy:
+        return [dict(_book_dict(b), score=score) for b, score in lib.fuzzy_search(args.query, limit=args.limit)], False
+    # Türkçe harfler ve aksanlar katlanır: "cok gezenti" -> "Çok Gezenti"
+    query = fold(args.query)
+    fields = ("title", "author") if args.field == "any" else (args.field,)
+    hits = [b for b in lib.list_books() if any(query in fold(getattr(b, f)) for f in fields)]
+    return [_book_dict(b) for b in hits[: args.limit]], False
+
+
+def cmd_export(args: argparse.Namespace, lib: Library, client: Optional[OpenLibraryClient]) -> Any:
+    data = [_book_dict(b) for b in lib.list_books()]
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        return {"exported": len(data), "path": args.out}, False
+    return data, False
+
+
+def cmd_import(args: argparse.Namespace, lib: Library, client: Optional[OpenLibraryClient]) -> Any:
+    """Import books from a JSON list (``export`` format) or JSON lines; no network access."""
+    try:
+        stream = args.stdin if args.path == "-" else open(args.path, "r", encoding="utf-8")
+    except OSError as e:
+        raise CommandError(f"{args.path} okunamadı: {e.strerror or e}") from e
+    try:
+        text = stream.read()
+    finally:
+        if stream is not args.stdin:
+            stream.close()
+    if text.lstrip().startswith("["):
+        try:
+            items = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise CommandError(f"{args.path}: geçersiz JSON (satır {e.lineno}, sütun {e.colno}): {e.msg}") from e
+    else:
+        items = []
+        for number, line in enumerate(text.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                raise CommandError(f"{args.path}: geçersiz JSON (satır {number}, sütun {e.colno}): {e.msg}") from e
+    books: List[Book] = []
+    invalid: dict = {}
+    for i, item in enumerate(items):
+        try:
+            books.append(Book(**item))
+        except TypeError as e:
+            invalid[str(item.get("isbn", i)) if isinstance(item, dict) else str(i)] = str(e)
+    added, duplicates = lib.add_books(books)
+    return {"added": len(added), "duplicates": duplicates, "invalid": invalid}, bool(invalid)
+
+
+def cmd_stats(args: argparse.Namespace, lib: Library, client: Optional[OpenLibraryClient]) -> Any:
+    return lib.stats(top=args.top, daily=args.daily), False
+
+
+def cmd_refresh(args: argparse.Namespace, lib: Library, client: Optional[OpenLibraryClient]) -> Any:
+    refresher = Refresher(lib, client or OpenLibraryClient.from_env(), rate=args.rate, batch_size=args.batch_size)
+    stats = refresher.run_once(limit=args.limit)
+    return asdict(stats), bool(stats.errors)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    # Ortak seçenekler alt komuttan önce veya sonra yazılabilir
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--storage", default=argparse.SUPPRESS, help="Kitap dosyası (varsayılan: library.json)")
+    common.add_argument("--format", choices=("json", "text"), default=argparse.SUPPRESS, help="Çıktı biçimi (varsayılan: json)")
+
+    parser = argparse.ArgumentParser(prog="main.py", description="Kütüphane komut satırı aracı")
+    parser.add_argument("--storage", default="library.json", help="Kitap dosyası (varsayılan: library.json)")
+    parser.add_argument("--format", choices=("json", "text"), default="json", help="Çıktı biçimi")
+    sub = parser.add_subparsers(dest="command", metavar="KOMUT")
+
+    def isbn_args(p: argparse.ArgumentParser) -> None:
+        p.add_argument("isbns", nargs="*", help="ISBN'ler ('-' = stdin)")
+        p.add_argument("-f", "--file", action="append", default=[], help="Her satırda ISBN bulunan dosya ('-' = stdin)")
+
+    p = sub.add_parser("add", parents=[common], help="ISBN ile Open Library'den kitap ekle")
+    isbn_args(p)
+    p.add_argument("--workers", type=_positive_int, default=4, help="Eşzamanlı Open Library isteği")
+    p.add_argument("--batch-size", type=_positive_int, default=500, help="Kaç kitapta bir kaydedilsin")
+    p.set_defaults(handler=cmd_add)
+
+    p = sub.add_parser("remove", parents=[common], help="Kitap sil")
+    isbn_args(p)
+    p.set_defaults(handler=cmd_remove)
+
+    p = sub.add_parser("list", parents=[common], help="Kitapları listele")
+    p.add_argument("--limit", type=int, default=None)
+    p.add_argument("--offset", type=int, default=0)
+    p.add_argument("--genre", default=None, help="Yalnızca bu türdeki kitaplar")
+    p.set_defaults(handler=cmd_list)
+
+    p = sub.add_parser("find", parents=[common], help="ISBN ile kitap bul")
+    isbn_args(p)
+    p.set_defaults(handler=cmd_find)
+
+    p = sub.add_parser("search", parents=[common], help="Başlık/yazar içinde ara")
+    p.add_argument("query")
+    p.add_argument("--field", choices=("any", "title", "author"), default="any")
+    p.add_argument("--limit", type=int, default=50)
+    p.add_argument("--fuzzy", action="store_true", help="Yazım hatalarına dayanıklı, benzerliğe göre sıralı arama")
+    p.set_defaults(handler=cmd_search)
+
+    p = sub.add_parser("export", parents=[common], help="Tüm kitapları JSON olarak dışa aktar")
+    p.add_argument("--out", default=None, help="Dosya (varsayılan: stdout)")
+    p.set_defaults(handler=cmd_export)
+
+    p = sub.add_parser("import", parents=[common], help="JSON / JSON lines dosyasından kitap içe aktar (ağ kullanmaz)")
+    p.add_argument("path", help="Dosya ('-' = stdin)")
+    p.set_defaults(handler=cmd_import)
+
+    p = sub.add_parser("stats", parents=[common], help="Katalog istatistikleri")
+    p.add_argument("--top", type=int, default=10)
+    p.add_argument("--daily", action="store_true", help="Gün bazında eklenme sayıları")
+    p.set_defaults(handler=cmd_stats)
+
+    p = sub.add_parser("refresh", parents=[common], help="Eksik/eski kitap bilgilerini Open Library'den yenile")
+    p.add_argument("--limit", type=int, default=None, help="En fazla kaç kitap")
+    p.add_argument("--rate", type=float, default=1.0, help="Saniyede en fazla istek")
+    p.add_argument("--batch-size", type=_positive_int, default=50, help="Kaç kitapta bir kaydedilsin")
+    p.set_defaults(handler=cmd_refresh)
+    return parser
+
+
+def _print_text(result: Any, out: TextIO) -> None:
+    if isinstance(result, list):
+        for item in result:
+            print(f"- {item['title']} by {item['author']} (ISBN: {item['isbn']})" if isinstance(item, dict) else f"- {item}", file=out)
+        return
+    for key, value in result.items():
+        print(f"{key}: {json.dumps(value, ensure_ascii=False) if not isinstance(value, (int, str)) else value}", file=out)
+
+
+def main(
+    argv: Optional[List[str]] = None,
+    client: Optional[OpenLibraryClient] = None,
+    stdin: Optional[TextIO] = None,
+    stdout: Optional[TextIO] = None,
+) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    # API ile aynı depolama (STORAGE_SHARDS, STORAGE_WRITE_BEHIND, ...); aksi halde CLI eski dosyayı okur
+    lib = Library(args.storage, storage=storage_from_env(args.storage))
+    try:
+        if args.command is None:
+            run_menu(lib, client or OpenLibraryClient.from_env())
+            return 0
+        args.stdin = stdin or sys.stdin
+        result, partial = args.handler(args, lib, client)
+    except CommandError as e:
+        print(f"{parser.prog} {args.command}: hata: {e}", file=sys.stderr)
+        return 2
+    finally:
+        # Write-behind bekleyen kayıtları diske yazar
+        lib.close()
+    out = stdout or sys.stdout
+    if args.format == "json":
+        json.dump(result, out, ensure_ascii=False)
+        out.write("\n")
+    else:
+        _print_text(result, out)
+    return 1 if partial else 0
+
+
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
 
 
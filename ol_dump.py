@@ -0,0 +1,246 @@
+"""Open Library toplu dump dosyalarından yerel ISBN indeksi oluşturma.
+
+Open Library dump satırları sekmeyle ayrılmış beş sütundan oluşur:
+``type  key  revision  last_modified  json``. Dosyalar gzip'li ya da düz
+olabilir; her satırı yalnızca JSON olan (JSON Lines) dosyalar da kabul edilir.
+
+Yalnızca kullandığımız alanlar saklanır (title, authors, subjects,
+by_statement, ISBN-10/13). Yazar anahtarları indeks kurulurken isimlere
+çözülür, böylece sorgu anında ek adım gerekmez.
+
+Kullanım:
+    python ol_dump.py build --editions ol_dump_editions.txt.gz \\
+        --authors ol_dump_authors.txt.gz --out ol_index.sqlite
+    python ol_dump.py lookup --index ol_index.sqlite 9789753141345
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+_BATCH = 5000
+
+_SCHEMA = """
+CREATE TABLE authors (key TEXT PRIMARY KEY, name TEXT NOT NULL) WITHOUT ROWID;
+CREATE TABLE editions (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    authors TEXT NOT NULL,
+    subjects TEXT NOT NULL,
+    by_statement TEXT,
+    isbn_10 TEXT NOT NULL,
+    isbn_13 TEXT NOT NULL
+);
+CREATE TABLE isbns (isbn TEXT PRIMARY KEY, edition_id INTEGER NOT NULL) WITHOUT ROWID;
+"""
+
+
+def _open(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def iter_dump(path: str, record_type: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Stream JSON records from a (gzip) TSV or JSON Lines dump."""
+    with _open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                raw = line
+            else:
+                parts = line.split("\t", 4)
+                if len(parts) != 5:
+                    continue
+                if record_type and parts[0] != record_type:
+                    continue
+                raw = parts[4]
+            try:
+                rec = json.loads(raw)
+            except ValueError:
+                continue
+            if isinstance(rec, dict):
+                yield rec
+
+
+def _clean_isbns(values: Any) -> List[str]:
+    out: List[str] = []
+    if isinstance(values, list):
+        for v in values:
+            if isinstance(v, str):
+                digits = re.sub(r"[^0-9Xx]", "", v).upper()
+                if len(digits) in (10, 13) and digits not in out:
+                    out.append(digits)
+    return out
+
+
+def _subjects(values: Any) -> List[str]:
+    out: List[str] = []
+    if isinstance(values, list):
+        for s in values:
+            if isinstance(s, str) and s.strip():
+                out.append(s.strip())
+    return out
+
+
+def _author_keys(values: Any) -> List[str]:
+    keys: List[str] = []
+    if isinstance(values, list):
+        for a in values:
+            # Edition kayıtlarında {"key": ...}, bazı eski kayıtlarda {"author": {"key": ...}}
+            if isinstance(a, dict):
+                key = a.get("key")
+                if not isinstance(key, str) and isinstance(a.get("author"), dict):
+                    key = a["author"].get("key")
+                if isinstance(key, str):
+                    keys.append(key)
+    return keys
+
+
+def build_index(editions_path: str, out_path: str, authors_path: Optional[str] = None) -> Dict[str, int]:
+    """Build the SQLite lookup index. Returns simple counters."""
+    tmp_path = out_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    conn.executescript("PRAGMA journal_mode=OFF; PRAGMA synchronous=OFF;" + _SCHEMA)
+    stats = {"authors": 0, "editions": 0, "isbns": 0}
+
+    if authors_path:
+        batch: List[Tuple[str, str]] = []
+        for rec in iter_dump(authors_path, "/type/author"):
+            key, name = rec.get("key"), rec.get("name")
+            if isinstance(key, str) and isinstance(name, str) and name.strip():
+                batch.append((key, name.strip()))
+            if len(batch) >= _BATCH:
+                conn.executemany("INSERT OR REPLACE INTO authors VALUES (?, ?)", batch)
+                stats["authors"] += len(batch)
+                batch.clear()
+        conn.executemany("INSERT OR REPLACE INTO authors VALUES (?, ?)", batch)
+        stats["authors"] += len(batch)
+
+    author_stmt = "SELECT name FROM authors WHERE key = ?"
+    edition_rows: List[Tuple[Any, ...]] = []
+    isbn_rows: List[Tuple[str, int]] = []
+    edition_id = 0
+
+    def flush() -> None:
+        conn.executemany("INSERT INTO editions VALUES (?, ?, ?, ?, ?, ?, ?)", edition_rows)
+        conn.executemany("INSERT OR IGNORE INTO isbns VALUES (?, ?)", isbn_rows)
+        edition_rows.clear()
+        isbn_rows.clear()
+
+    for rec in iter_dump(editions_path, "/type/edition"):
+        title = rec.get("title")
+        isbn_10 = _clean_isbns(rec.get("isbn_10"))
+        isbn_13 = _clean_isbns(rec.get("isbn_13"))
+        if not isinstance(title, str) or not (isbn_10 or isbn_13):
+            continue
+        names: List[str] = []
+        for key in _author_keys(rec.get("authors")):
+            row = conn.execute(author_stmt, (key,)).fetchone()
+            if row:
+                names.append(row[0])
+        by_stmt = rec.get("by_statement")
+        edition_id += 1
+        edition_rows.append((
+            edition_id,
+            title.strip(),
+            json.dumps(names, ensure_ascii=False),
+            json.dumps(_subjects(rec.get("subjects")), ensure_ascii=False),
+            by_stmt.strip() if isinstance(by_stmt, str) and by_stmt.strip() else None,
+            ",".join(isbn_10),
+            ",".join(isbn_13),
+        ))
+        for isbn in isbn_10 + isbn_13:
+            isbn_rows.append((isbn, edition_id))
+        stats["isbns"] += len(isbn_10) + len(isbn_13)
+        if len(edition_rows) >= _BATCH:
+            flush()
+    flush()
+    stats["editions"] = edition_id
+
+    # Yazar tablosu yalnızca kurulum sırasında gerekli
+    conn.executescript("DROP TABLE authors; VACUUM;")
+    conn.commit()
+    conn.close()
+    os.replace(tmp_path, out_path)
+    return stats
+
+
+class OfflineIndex:
+    """Read-only ISBN lookups against an index built by :func:`build_index`."""
+
+    def __init__(self, path: str) -> None:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Offline indeks bulunamadı: {path}")
+        self.path = path
+        uri = "file:" + os.path.abspath(path) + "?mode=ro&immutable=1"
+        self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        self._lock = threading.Lock()
+
+    def lookup(self, isbn: str) -> Optional[Dict[str, Any]]:
+        """Return a record shaped like ``OpenLibraryClient.fetch_by_isbn`` output, or None."""
+        key = re.sub(r"[^0-9Xx]", "", isbn or "").upper()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT e.title, e.authors, e.subjects, e.by_statement, e.isbn_10, e.isbn_13 "
+                "FROM isbns i JOIN editions e ON e.id = i.edition_id WHERE i.isbn = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+        title, authors, subjects, by_stmt, isbn_10, isbn_13 = row
+        names = json.loads(authors)
+        if not names and by_stmt:
+            names = [by_stmt]
+        return {
+            "title": title,
+            "authors": names,
+            "subjects": json.loads(subjects),
+            "by_statement": by_stmt,
+            "isbn_10": isbn_10.split(",") if isbn_10 else [],
+            "isbn_13": isbn_13.split(",") if isbn_13 else [],
+        }
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Open Library dump -> yerel ISBN indeksi")
+    sub = parser.add_subparsers(dest="command", required=True)
+    b = sub.add_parser("build", help="Dump dosyalarından indeks oluştur")
+    b.add_argument("--editions", required=True)
+    b.add_argument("--authors")
+    b.add_argument("--out", default="ol_index.sqlite")
+    q = sub.add_parser("lookup", help="İndekste ISBN ara")
+    q.add_argument("--index", default="ol_index.sqlite")
+    q.add_argument("isbn")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        stats = build_index(args.editions, args.out, authors_path=args.authors)
+        print(json.dumps(stats))
+        return 0
+    rec = OfflineIndex(args.index).lookup(args.isbn)
+    if rec is None:
+        print("Bulunamadı", file=sys.stderr)
+        return 1
+    print(json.dumps(rec, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,133 @@
 """Open Library API client (Aşama 2)
-Uses httpx to fetch book details by ISBN.
+Uses httpx to fetch book details by ISBN. httpx is imported on the first
+network call, so CLI commands and offline lookups do not pay for it.
+All upstream calls go through a RequestScheduler (rate budget, retry, circuit breaker).
 """
 
 from __future__ import annotations
 
-import httpx
+import os
 import re
+import threading
+import time
+from typing import TYPE_CHECKING, Optional, Union
+
+from metrics import REGISTRY
+from throttle import RequestScheduler
+from tracing import span
+
+if TYPE_CHECKING:
+    import httpx
+
+
+UPSTREAM_LATENCY = REGISTRY.histogram(
+    "openlibrary_request_duration_seconds",
+    "Open Library çağrı süresi (zamanlayıcı beklemesi ve retry'lar dahil)",
+    ["endpoint"],
+)
+UPSTREAM_RESPONSES = REGISTRY.counter("openlibrary_responses_total", "Open Library yanıtları", ["endpoint", "status"])
+UPSTREAM_ERRORS = REGISTRY.counter("openlibrary_errors_total", "Yanıt alınamayan Open Library çağrıları", ["endpoint", "error"])
+OFFLINE_LOOKUPS = REGISTRY.counter("openlibrary_offline_lookups_total", "Yerel indeks sorguları", ["result"])
 
 
 class OpenLibraryClient:
     BASE_URL = "https://openlibrary.org"
+    COVERS_URL = "https://covers.openlibrary.org"
+    USER_AGENT = "python-oop-kutuphane/1.0 (+https://github.com/ipekbulgurcu/python_opp_kutuphane)"
 
-    def __init__(self, timeout_seconds: float = 10.0):
+    def __init__(
+        self,
+        timeout_seconds: float = 10.0,
+        scheduler: Optional[RequestScheduler] = None,
+        transport: Optional[httpx.BaseTransport] = None,
+        offline_index: Union[str, "OfflineIndex", None] = None,
+        offline_only: bool = False,
+        base_url: Optional[str] = None,
+        covers_url: Optional[str] = None,
+    ):
         self._timeout = timeout_seconds
+        # Yük testlerinde yerel sahte sunucuya (fake_openlibrary.py) yönlendirilebilir
+        self.base_url = (base_url or self.BASE_URL).rstrip("/")
+        self.covers_url = (covers_url or self.COVERS_URL).rstrip("/")
+        self.scheduler = scheduler or RequestScheduler()
+        self._transport = transport
+        self._http: Optional[httpx.Client] = None
+        self._http_lock = threading.Lock()
+        if isinstance(offline_index, str):
+            from ol_dump import OfflineIndex
+
+            offline_index = OfflineIndex(offline_index)
+        self.offline_index = offline_index
+        self.offline_only = offline_only
+        if offline_only and offline_index is None:
+            raise ValueError("offline_only için offline_index gerekli")
+
+    @classmethod
+    def from_env(cls) -> "OpenLibraryClient":
+        """OPENLIBRARY_OFFLINE_INDEX=<sqlite> enables the local index,
+        OPENLIBRARY_OFFLINE=1 disables network fallback.
+        OPENLIBRARY_BASE_URL / OPENLIBRARY_COVERS_URL point at another server,
+        OPENLIBRARY_RATE / OPENLIBRARY_MAX_RATE set the request budget (req/s)."""
+        index = os.getenv("OPENLIBRARY_OFFLINE_INDEX") or None
+        scheduler = None
+        if os.getenv("OPENLIBRARY_RATE") or os.getenv("OPENLIBRARY_MAX_RATE"):
+            rate = float(os.getenv("OPENLIBRARY_RATE", "5"))
+            scheduler = RequestScheduler(rate=rate, max_rate=max(rate, float(os.getenv("OPENLIBRARY_MAX_RATE", "20"))))
+        return cls(
+            scheduler=scheduler,
+            offline_index=index,
+            offline_only=bool(index) and os.getenv("OPENLIBRARY_OFFLINE") == "1",
+            base_url=os.getenv("OPENLIBRARY_BASE_URL") or None,
+            covers_url=os.getenv("OPENLIBRARY_COVERS_URL") or None,
+        )
+
+    def with_scheduler(self, scheduler: RequestScheduler) -> "OpenLibraryClient":
+        """Same server, timeout and offline index, but its own request budget and connection pool."""
+        return OpenLibraryClient(
+            timeout_seconds=self._timeout,
+            scheduler=scheduler,
+            transport=self._transport,
+            offline_index=self.offline_index,
+            offline_only=self.offline_only,
+            base_url=self.base_url,
+            covers_url=self.covers_url,
+        )
+
+    def _client(self) -> httpx.Client:
+        # Bağlantı havuzu tüm çağrılarda (ve thread'lerde) paylaşılır
+        if self._http is None:
+            import httpx
+
+            with self._http_lock:
+                if self._http is None:
+                    self._http = httpx.Client(
+                        timeout=self._timeout,
+                        follow_redirects=True,
+                        transport=self._transport,
+                        headers={"User-Agent": self.USER_AGENT},
+                    )
+        return self._http
+
+    def _get(self, url: str) -> httpx.Response:
+        client = self._client()
+        endpoint = "cover" if url.startswith(self.covers_url) else "author" if "/authors/" in url else "isbn"
+        started = time.perf_counter()
+        with span("openlibrary.get", endpoint=endpoint, url=url) as s:
+            try:
+                resp = self.scheduler.execute(lambda: client.get(url))
+            except Exception as e:
+                UPSTREAM_ERRORS.labels(endpoint, type(e).__name__).inc()
+                raise
+            finally:
+                UPSTREAM_LATENCY.labels(endpoint).observe(time.perf_counter() - started)
+            s.set("status", resp.status_code)
+        UPSTREAM_RESPONSES.labels(endpoint, str(resp.status_code)).inc()
+        return resp
+
+    def close(self) -> None:
+        if self._http is not None:
+            self._http.close()
+            self._http = None
 
     @staticmethod
     def normalize_isbn_or_barcode(code: str) -> str:
@@ -30,6 +145,20 @@ class OpenLibraryClient:
             return digits
         raise ValueError("Geçersiz ISBN/Barkod")
 
+    @staticmethod
+    def has_valid_checksum(isbn: str) -> bool:
+        """Check digit test for a normalized ISBN-10 (mod 11) or ISBN-13 (mod 10).
+
+        For large batches use isbn_batch.validate_isbns.
+        """
+        code = isbn.upper()
+        if len(code) == 13 and code.isdigit():
+            return sum(int(ch) * (3 if i % 2 else 1) for i, ch in enumerate(code)) % 10 == 0
+        if len(code) == 10 and code[:9].isdigit() and (code[9].isdigit() or code[9] == "X"):
+            total = sum((10 - i) * (10 if ch == "X" else int(ch)) for i, ch in enumerate(code))
+            return total % 11 == 0
+        return False
+
     @staticmethod
     def isbn13_to_isbn10(isbn13: str) -> str:
         digits = re.sub(r"[^0-9]", "", isbn13)
@@ -48,18 +177,53 @@ class OpenLibraryClient:
             check = str(remainder)
         return core + check
 
+    def fetch_cover(self, isbn: str, size: str = "L") -> Optional[bytes]:
+        """Cover image bytes for ``isbn`` (``S``/``M``/``L``), or ``None`` if Open Library has none."""
+        import httpx
+
+        norm = self.normalize_isbn_or_barcode(isbn)
+        # default=false: kapak yoksa boş görsel yerine 404 döner
+        url = f"{self.covers_url}/b/isbn/{norm}-{size}.jpg?default=false"
+        with span("openlibrary.fetch_cover", isbn=norm):
+            try:
+                resp = self._get(url)
+            except httpx.RequestError as e:
+                raise RuntimeError(f"Ağ hatası: {e}")
+            if resp.status_code == 404:
+                return None
+            resp.raise_for_status()
+            return resp.content
+
     def fetch_by_isbn(self, isbn: str) -> dict:
+        with span("openlibrary.fetch_by_isbn", isbn=isbn):
+            return self._fetch_by_isbn(isbn)
+
+    def _fetch_by_isbn(self, isbn: str) -> dict:
         norm = self.normalize_isbn_or_barcode(isbn)
-        url = f"{self.BASE_URL}/isbn/{norm}.json"
+        if not self.has_valid_checksum(norm):
+            # Yanlış okunan/yazılan kodlar için ağa hiç çıkma
+            raise ValueError("Geçersiz ISBN (kontrol hanesi hatalı)")
+        if self.offline_index is not None:
+            local = self.offline_index.lookup(norm)
+            if local is None and len(norm) == 13 and norm.startswith("978"):
+                local = self.offline_index.lookup(self.isbn13_to_isbn10(norm))
+            OFFLINE_LOOKUPS.labels("hit" if local is not None else "miss").inc()
+            if local is not None:
+                return local
+            if self.offline_only:
+                raise ValueError("Kitap bulunamadı")
+        import httpx
+
+        url = f"{self.base_url}/isbn/{norm}.json"
         try:
             # Bazı ISBN uçları 302 ile /books/.. kaynağına yönlendirir.
             # Yönlendirmeleri takip ederek nihai JSON'u al.
-            resp = httpx.get(url, timeout=self._timeout, follow_redirects=True)
+            resp = self._get(url)
             if resp.status_code == 404 and len(norm) == 13 and norm.startswith("978"):
                 # Bir de ISBN-10 olarak dene
                 alt = self.isbn13_to_isbn10(norm)
-                url10 = f"{self.BASE_URL}/isbn/{alt}.json"
-                resp = httpx.get(url10, timeout=self._timeout, follow_redirects=True)
+                url10 = f"{self.base_url}/isbn/{alt}.json"
+                resp = self._get(url10)
             if resp.status_code == 404:
                 raise ValueError("Kitap bulunamadı")
             resp.raise_for_status()
@@ -75,15 +239,15 @@ class OpenLibraryClient:
                             author_names.append(a["name"].strip())
                         # Çoğunlukla sadece key gelir: "/authors/OL...A"
                         elif "key" in a and isinstance(a["key"], str):
-                            author_url = f"{self.BASE_URL}{a['key']}.json"
+                            author_url = f"{self.base_url}{a['key']}.json"
                             try:
-                                a_resp = httpx.get(author_url, timeout=self._timeout, follow_redirects=True)
+                                a_resp = self._get(author_url)
                                 if a_resp.status_code == 200:
                                     a_data = a_resp.json()
                                     name = a_data.get("name")
                                     if isinstance(name, str) and name.strip():
                                         author_names.append(name.strip())
-                            except httpx.RequestError:
+                            except (httpx.RequestError, RuntimeError):
                                 # Yazar adı çözümlenemese de akışı bozmayalım
                                 pass
 
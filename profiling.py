@@ -0,0 +1,337 @@
+"""İsteğe bağlı profil çıkarma: yavaş istekleri yakalama.
+
+Varsayılan olarak kapalıdır; açıkken eşik süresini (``threshold_ms``) aşan
+her istek için ``output_dir`` altına şunlar yazılır:
+
+- ``<ad>.folded``: istek süresince örneklenen yığınlar, "collapsed stack"
+  formatında (flamegraph.pl / speedscope ile açılabilir)
+- ``<ad>.prof``: ``Library`` çağrılarının cProfile çıktısı (``pstats`` ile okunur)
+- ``<ad>.json``: istek bilgileri (yöntem, yol, durum, süre, eşzamanlı istek sayısı)
+
+Ortam değişkenleri: ``PROFILE_ENABLED=1``, ``PROFILE_THRESHOLD_MS``,
+``PROFILE_DIR``, ``PROFILE_MODE`` (``sample``, ``cprofile`` veya ``both``),
+``PROFILE_INTERVAL_MS``, ``PROFILE_ADMIN_TOKEN`` (çalışma anında açıp
+kapatmak için yönetim endpoint'i).
+
+Örnekleyici tüm thread'lerin yığınlarını toplar; aynı anda başka istekler
+de çalışıyorsa onların yığınları da dosyaya girer (``concurrent`` alanı).
+
+cProfile süreç başına tek profil çalıştırabilir (Python 3.12+ ikincisini
+``ValueError`` ile reddeder). Başka bir istek profillenirken gelen
+``Library`` çağrıları profilsiz çalışır ve ``library_calls_skipped`` alanında
+sayılır; profil çıkarma isteğin sonucunu hiçbir zaman değiştirmez. Dosyalar
+olay döngüsünü bekletmemek için thread havuzunda yazılır.
+"""
+
+from __future__ import annotations
+
+import collections
+import contextvars
+import cProfile
+import functools
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import anyio.to_thread
+
+from tracing import current_request_id
+
+
+MODES = ("sample", "cprofile", "both")
+
+# Library üzerinde cProfile ile sarılan metotlar
+LIBRARY_METHODS = (
+    "list_books", "find_book", "add_book", "add_books", "remove_book", "remove_books",
+    "load_books", "save_books", "add_book_by_isbn", "add_books_by_isbn",
+)
+
+
+@dataclass
+class RequestProfile:
+    started: float
+    profiles: List[cProfile.Profile] = field(default_factory=list)
+    skipped: int = 0
+
+
+_current: contextvars.ContextVar[Optional[RequestProfile]] = contextvars.ContextVar("profiling_request", default=None)
+_thread_state = threading.local()
+# Aynı anda yalnızca bir cProfile etkin olabilir (3.12+: sys.monitoring aracı süreç geneli)
+_cprofile_lock = threading.Lock()
+
+
+def _frame_stack(frame: Any) -> str:
+    parts: List[str] = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
+
+
+class StackSampler:
+    """Background thread sampling every thread's stack at a fixed interval.
+
+    Samples are only taken while ``active()`` returns true and are kept in a
+    bounded ring buffer of ``(timestamp, [collapsed stack, ...])``.
+    """
+
+    def __init__(self, interval: float = 0.005, history_seconds: float = 60.0,
+                 active: Callable[[], bool] = lambda: True) -> None:
+        self.interval = interval
+        self.active = active
+        self._samples: Deque[Tuple[float, List[str]]] = collections.deque(maxlen=max(1, int(history_seconds / interval)))
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="profiling-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(1.0)
+            self._thread = None
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            if not self.active():
+                continue
+            now = time.perf_counter()
+            stacks = [_frame_stack(f) for tid, f in sys._current_frames().items() if tid != me]
+            with self._lock:
+                self._samples.append((now, stacks))
+
+    def collapsed(self, start: float, end: float) -> Dict[str, int]:
+        counts: Dict[str, int] = collections.Counter()
+        with self._lock:
+            window = [stacks for t, stacks in self._samples if start <= t <= end]
+        for stacks in window:
+            for stack in stacks:
+                counts[stack] += 1
+        return dict(counts)
+
+
+class Profiler:
+    def __init__(
+        self,
+        enabled: bool = False,
+        threshold_ms: float = 500.0,
+        output_dir: str = "profiles",
+        mode: str = "both",
+        interval_ms: float = 5.0,
+        max_dumps: int = 200,
+        admin_token: Optional[str] = None,
+    ) -> None:
+        if mode not in MODES:
+            raise ValueError(f"Geçersiz profil modu: {mode}")
+        self.threshold_ms = threshold_ms
+        self.output_dir = output_dir
+        self.mode = mode
+        self.max_dumps = max_dumps
+        self.admin_token = admin_token
+        self.dumps = 0
+        self._active = 0
+        self._lock = threading.Lock()
+        self.sampler = StackSampler(interval_ms / 1000.0, active=lambda: self._active > 0)
+        self.enabled = False
+        if enabled:
+            self.enable()
+
+    @classmethod
+    def from_env(cls) -> "Profiler":
+        return cls(
+            enabled=os.getenv("PROFILE_ENABLED") == "1",
+            threshold_ms=float(os.getenv("PROFILE_THRESHOLD_MS", "500")),
+            output_dir=os.getenv("PROFILE_DIR", "profiles"),
+            mode=os.getenv("PROFILE_MODE", "both"),
+            interval_ms=float(os.getenv("PROFILE_INTERVAL_MS", "5")),
+            admin_token=os.getenv("PROFILE_ADMIN_TOKEN") or None,
+        )
+
+    # ----- Çalışma anında yapılandırma -----
+
+    def enable(self) -> None:
+        self.enabled = True
+        if self.mode in ("sample", "both"):
+            self.sampler.start()
+
+    def disable(self) -> None:
+        self.enabled = False
+        self.sampler.stop()
+
+    def configure(self, enabled: Optional[bool] = None, threshold_ms: Optional[float] = None,
+                  mode: Optional[str] = None) -> Dict[str, Any]:
+        if mode is not None:
+            if mode not in MODES:
+                raise ValueError(f"Geçersiz profil modu: {mode}")
+            self.mode = mode
+        if threshold_ms is not None:
+            self.threshold_ms = threshold_ms
+        if enabled is True or (enabled is None and self.enabled):
+            self.disable()
+            self.enable()
+        elif enabled is False:
+            self.disable()
+        return self.status()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "threshold_ms": self.threshold_ms,
+            "mode": self.mode,
+            "output_dir": self.output_dir,
+            "dumps": self.dumps,
+        }
+
+    # ----- İstek yaşam döngüsü -----
+
+    def begin(self) -> RequestProfile:
+        with self._lock:
+            self._active += 1
+        profile = RequestProfile(time.perf_counter())
+        return profile
+
+    def end(self, profile: RequestProfile, meta: Dict[str, Any]) -> Optional[str]:
+        """Finish a request; dumps and returns the file stem if it was slow."""
+        claimed = self._claim(profile, meta)
+        return self._dump(profile, *claimed) if claimed is not None else None
+
+    def _claim(self, profile: RequestProfile, meta: Dict[str, Any]) -> Optional[Tuple[Dict[str, Any], float, int]]:
+        """Cheap part of :meth:`end`: ``(meta, ended, number)`` if this request gets a dump."""
+        ended = time.perf_counter()
+        duration_ms = (ended - profile.started) * 1000
+        with self._lock:
+            concurrent = self._active
+            self._active -= 1
+            # Sınır kontrolü ve artış aynı kilit altında; eşzamanlı yavaş istekler max_dumps'ı aşamaz
+            if duration_ms < self.threshold_ms or self.dumps >= self.max_dumps:
+                return None
+            self.dumps += 1
+            number = self.dumps
+        meta = dict(meta, duration_ms=round(duration_ms, 3), threshold_ms=self.threshold_ms,
+                    concurrent=concurrent, mode=self.mode, pid=os.getpid())
+        return meta, ended, number
+
+    def _dump(self, profile: RequestProfile, meta: Dict[str, Any], ended: float, number: int) -> str:
+        os.makedirs(self.output_dir, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", meta.get("path", "")).strip("_") or "root"
+        stem = os.path.join(
+            self.output_dir,
+            f"{time.strftime('%Y%m%d-%H%M%S')}_{meta.get('method', 'X')}_{slug}_{int(meta['duration_ms'])}ms_{number}",
+        )
+        if self.mode in ("sample", "both"):
+            stacks = self.sampler.collapsed(profile.started, ended)
+            meta["samples"] = sum(stacks.values())
+            with open(stem + ".folded", "w", encoding="utf-8") as f:
+                for stack, count in sorted(stacks.items(), key=lambda kv: -kv[1]):
+                    f.write(f"{stack} {count}\n")
+        if profile.profiles:
+            stats = pstats.Stats(profile.profiles[0])
+            for p in profile.profiles[1:]:
+                stats.add(p)
+            stats.dump_stats(stem + ".prof")
+            meta["library_calls"] = len(profile.profiles)
+        if profile.skipped:
+            meta["library_calls_skipped"] = profile.skipped
+        with open(stem + ".json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        return stem
+
+    # ----- Library kancası -----
+
+    def attach_library(self, lib: Any, methods: Tuple[str, ...] = LIBRARY_METHODS) -> None:
+        """Wrap ``lib``'s methods so that, during a profiled request, each
+        outermost call runs under cProfile. Outside profiled requests the
+        wrapper costs one context variable lookup."""
+        for name in methods:
+            if hasattr(type(lib), name):
+                setattr(lib, name, self._wrap(lib, name))
+
+    def _wrap(self, lib: Any, name: str) -> Callable[..., Any]:
+        # Metot her çağrıda sınıftan çözülür; sınıf üzerindeki sonradan yapılan
+        # değişiklikler (ör. testlerde monkeypatch) etkisini korur
+        @functools.wraps(getattr(type(lib), name))
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            func = getattr(type(lib), name).__get__(lib)
+            profile = _current.get()
+            if profile is None or self.mode == "sample" or getattr(_thread_state, "active", False):
+                return func(*args, **kwargs)
+            _thread_state.active = True
+            try:
+                # Başka bir istek profillenirken beklemeden profilsiz çalışılır
+                if not _cprofile_lock.acquire(blocking=False):
+                    profile.skipped += 1
+                    return func(*args, **kwargs)
+                try:
+                    prof = cProfile.Profile()
+                    try:
+                        prof.enable()
+                    except ValueError:
+                        # Süreçte başka bir profil aracı (ör. coverage) etkin
+                        profile.skipped += 1
+                        return func(*args, **kwargs)
+                    try:
+                        return func(*args, **kwargs)
+                    finally:
+                        prof.disable()
+                        profile.profiles.append(prof)
+                finally:
+                    _cprofile_lock.release()
+            finally:
+                _thread_state.active = False
+
+        return wrapper
+
+
+class ProfilingMiddleware:
+    """ASGI middleware; a no-op attribute check while the profiler is disabled."""
+
+    def __init__(self, app: Any, profiler: Profiler) -> None:
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or not self.profiler.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        profile = self.profiler.begin()
+        token = _current.set(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            headers = dict(scope.get("headers") or [])
+            meta = {
+                "method": scope.get("method"),
+                "path": scope.get("path"),
+                "query": scope.get("query_string", b"").decode("latin-1"),
+                "status": status_code,
+                "request_id": current_request_id() or headers.get(b"x-request-id", b"").decode("latin-1") or None,
+                "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            }
+            claimed = self.profiler._claim(profile, meta)
+            if claimed is not None:
+                # Disk yazımı ve pstats birleştirme olay döngüsünde değil, thread'de
+                await anyio.to_thread.run_sync(self.profiler._dump, profile, *claimed)
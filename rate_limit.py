@@ -0,0 +1,409 @@
+"""GCRA (token bucket) tabanlı rate limiter.
+
+Durum bir backend'de tutulur; böylece birden fazla uvicorn worker'ı aynı
+kotayı paylaşabilir:
+
+- ``memory://``            -> süreç içi sözlük (tek worker)
+- ``shm://<ad>``           -> aynı makinedeki worker'lar arası paylaşımlı bellek
+- ``redis://host:port/db`` -> yerel Redis uyumlu sunucu (Lua script ile atomik)
+
+Her anahtar için yalnızca tek bir sayı (TAT, "theoretical arrival time")
+saklanır. İstek yolunda kilit tutulmaz: bellek ve shm backend'leri
+oku-hesapla-yaz yapar; aynı anahtarı aynı anda güncelleyen N istekten
+en kötü ihtimalle N-1 tanesi fazladan geçebilir (sınır kesin değil,
+yaklaşıktır). Kesin sınır gerekiyorsa atomik Redis backend'i kullanılır.
+
+Ağ üzerinden giden (``blocking``) backend'ler async endpoint'lerde olay
+döngüsünü bekletmemek için thread havuzunda çağrılır.
+
+API anahtarı başına kota ``RATE_LIMIT_KEY_LIMITS`` ile verilir:
+``RATE_LIMIT_KEY_LIMITS="ic-servis-anahtari=600/minute,rapor=10/second"``.
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import inspect
+import math
+import os
+import re
+import struct
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import anyio.to_thread
+from fastapi import HTTPException, Request, status
+
+from metrics import REGISTRY
+
+
+REJECTIONS = REGISTRY.counter("rate_limit_rejections_total", "Rate limit nedeniyle reddedilen istekler", ["scope"])
+
+
+_UNITS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+_RATE_RE = re.compile(r"^\s*(\d+)\s*(?:/|per)\s*(\d+)?\s*(second|minute|hour|day)s?\s*$")
+
+
+@dataclass(frozen=True)
+class Rate:
+    limit: int
+    period: float  # saniye
+
+    @property
+    def emission_interval(self) -> float:
+        return self.period / self.limit
+
+    def __str__(self) -> str:
+        return f"{self.limit}/{self.period:g}s"
+
+
+def parse_rate(value: str) -> Rate:
+    """Parse ``"5/minute"``, ``"10 per second"`` or ``"100/2hours"``."""
+    m = _RATE_RE.match(value or "")
+    if not m:
+        raise ValueError(f"Geçersiz rate ifadesi: {value!r}")
+    limit = int(m.group(1))
+    multiplier = int(m.group(2) or 1)
+    if limit <= 0 or multiplier <= 0:
+        raise ValueError(f"Geçersiz rate ifadesi: {value!r}")
+    return Rate(limit=limit, period=float(_UNITS[m.group(3)] * multiplier))
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float  # saniye; izin verildiyse 0
+
+
+def _gcra(tat: float, now: float, rate: Rate) -> Tuple[bool, float, int, float]:
+    """Return (allowed, new_tat, remaining, retry_after) for a stored TAT."""
+    interval = rate.emission_interval
+    base = max(tat, now)
+    new_tat = base + interval
+    allow_at = new_tat - rate.period
+    if now < allow_at:
+        remaining = 0
+        return False, tat, remaining, allow_at - now
+    remaining = int((now - allow_at) / interval + 1e-9)
+    return True, new_tat, min(remaining, rate.limit - 1), 0.0
+
+
+class RateLimitBackend:
+    """Abstract storage for GCRA state."""
+
+    # True: update() ağ gidiş-dönüşü yapar; async endpoint'lerde thread'de çağrılır
+    blocking = False
+
+    def update(self, key: str, rate: Rate, now: float) -> RateLimitResult:
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        raise NotImplementedError
+
+
+class MemoryBackend(RateLimitBackend):
+    """Per-process backend; every worker enforces its own limit.
+
+    Keys are kept in last-update order. Past ``max_keys`` the least recently
+    updated tenth is dropped in one go, so a flood of new keys costs O(1)
+    amortized per request instead of a full scan each time.
+    """
+
+    def __init__(self, max_keys: int = 100_000) -> None:
+        self.max_keys = max_keys
+        self._tats: Dict[str, float] = {}
+
+    def update(self, key: str, rate: Rate, now: float) -> RateLimitResult:
+        tat = self._tats.pop(key, None)
+        allowed, new_tat, remaining, retry_after = _gcra(tat or 0.0, now, rate)
+        # Sona taşı: sözlük sırası son istek sırasıdır; reddedilen anahtar da
+        # durumunu korur, yoksa sık deneyen istemci silinip yeniden geçebilirdi
+        if allowed:
+            self._tats[key] = new_tat
+        elif tat is not None:
+            self._tats[key] = tat
+        if len(self._tats) > self.max_keys:
+            self._evict()
+        return RateLimitResult(allowed, rate.limit, remaining, retry_after)
+
+    def _evict(self) -> None:
+        # En uzun süredir güncellenmeyen %10; bunların TAT'ı çoğunlukla çoktan geçmiştir.
+        # list(dict) tek adımda kopyalar; eşzamanlı güncellemeler yinelemeyi bozmaz
+        for k in list(self._tats)[: max(1, self.max_keys // 10)]:
+            self._tats.pop(k, None)
+
+    def reset(self) -> None:
+        self._tats.clear()
+
+
+# Bu süreçte oluşturulan segment adları
+_OWNED_SEGMENTS: set = set()
+
+
+class SharedMemoryBackend(RateLimitBackend):
+    """Fixed-size hash table in ``multiprocessing.shared_memory``.
+
+    Each slot is 16 bytes: an 8-byte key fingerprint and an 8-byte TAT.
+    The first worker creates the segment, the others attach to it by name.
+    When all probed slots are taken the one with the oldest TAT is reused.
+
+    Updates are an unlocked read-modify-write: when N workers update the
+    same key at the same instant, up to N-1 of them may be admitted over
+    the limit. Use ``RedisBackend`` where the limit must be exact.
+    """
+
+    _SLOT = struct.Struct("<Qd")
+    _PROBES = 8
+
+    def __init__(self, name: str = "library-ratelimit", slots: int = 65536) -> None:
+        from multiprocessing import resource_tracker, shared_memory
+
+        self.name = name
+        self.slots = slots
+        size = slots * self._SLOT.size
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            self.owner = True
+            _OWNED_SEGMENTS.add(name)
+        except FileExistsError:
+            self._shm = shared_memory.SharedMemory(name=name, create=False)
+            self.owner = False
+            # Bağlanan süreç çıkarken segmenti silmesin (bpo-39959). Segment bu
+            # süreçte oluşturulduysa kayıt sahibine aittir, dokunma.
+            if name not in _OWNED_SEGMENTS:
+                try:
+                    resource_tracker.unregister(self._shm._name, "shared_memory")
+                except Exception:
+                    pass
+        self.slots = min(slots, self._shm.size // self._SLOT.size)
+        self._buf = self._shm.buf
+
+    @staticmethod
+    def _fingerprint(key: str) -> int:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "little") or 1  # 0 = boş slot
+
+    def _slot_for(self, fp: int, now: float) -> Tuple[int, float]:
+        start = fp % self.slots
+        victim, victim_tat = start, math.inf
+        for i in range(self._PROBES):
+            idx = (start + i) % self.slots
+            slot_fp, tat = self._SLOT.unpack_from(self._buf, idx * self._SLOT.size)
+            if slot_fp == fp:
+                return idx, tat
+            if slot_fp == 0 or tat <= now:
+                return idx, 0.0
+            if tat < victim_tat:
+                victim, victim_tat = idx, tat
+        return victim, 0.0
+
+    def update(self, key: str, rate: Rate, now: float) -> RateLimitResult:
+        fp = self._fingerprint(key)
+        idx, tat = self._slot_for(fp, now)
+        allowed, new_tat, remaining, retry_after = _gcra(tat, now, rate)
+        if allowed:
+            self._SLOT.pack_into(self._buf, idx * self._SLOT.size, fp, new_tat)
+        return RateLimitResult(allowed, rate.limit, remaining, retry_after)
+
+    def reset(self) -> None:
+        self._buf[: self.slots * self._SLOT.size] = bytes(self.slots * self._SLOT.size)
+
+    def close(self, unlink: bool = False) -> None:
+        self._buf = None
+        self._shm.close()
+        if unlink:
+            self._shm.unlink()
+            _OWNED_SEGMENTS.discard(self.name)
+
+
+# KEYS[1] = anahtar, ARGV = now, emission_interval, period, limit
+_REDIS_GCRA = """
+local tat = tonumber(redis.call('GET', KEYS[1]) or '0')
+local now = tonumber(ARGV[1])
+local interval = tonumber(ARGV[2])
+local period = tonumber(ARGV[3])
+local limit = tonumber(ARGV[4])
+local base = math.max(tat, now)
+local new_tat = base + interval
+local allow_at = new_tat - period
+if now < allow_at then
+  return {0, 0, tostring(allow_at - now)}
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil(period * 1000))
+local remaining = math.floor((now - allow_at) / interval + 1e-9)
+return {1, math.min(remaining, limit - 1), '0'}
+"""
+
+
+class RedisBackend(RateLimitBackend):
+    """Backend for a local Redis-compatible server; the update runs as one Lua script."""
+
+    blocking = True
+
+    def __init__(self, client: Any, prefix: str = "rl:") -> None:
+        self._client = client
+        self._prefix = prefix
+        self._sha: Optional[str] = None
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisBackend":
+        try:
+            import redis  # type: ignore
+        except ImportError as e:
+            raise RuntimeError("redis:// backend için 'redis' paketi gerekli") from e
+        return cls(redis.Redis.from_url(url))
+
+    def _eval(self, key: str, *args: Any) -> Any:
+        if self._sha is None:
+            self._sha = self._client.script_load(_REDIS_GCRA)
+        try:
+            return self._client.evalsha(self._sha, 1, key, *args)
+        except Exception as e:
+            if "NOSCRIPT" not in str(e):
+                raise
+            self._sha = None
+            return self._client.eval(_REDIS_GCRA, 1, key, *args)
+
+    def update(self, key: str, rate: Rate, now: float) -> RateLimitResult:
+        allowed, remaining, retry_after = self._eval(
+            self._prefix + key, repr(now), repr(rate.emission_interval), repr(rate.period), rate.limit
+        )
+        return RateLimitResult(bool(int(allowed)), rate.limit, int(remaining), float(retry_after))
+
+    def reset(self) -> None:
+        for key in self._client.scan_iter(match=self._prefix + "*"):
+            self._client.delete(key)
+
+
+def backend_from_url(url: Optional[str]) -> RateLimitBackend:
+    """Create a backend from ``memory://``, ``shm://<name>`` or ``redis://...``."""
+    url = (url or "memory://").strip()
+    if url.startswith("memory://"):
+        return MemoryBackend()
+    if url.startswith("shm://"):
+        return SharedMemoryBackend(name=url[len("shm://"):] or "library-ratelimit")
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend.from_url(url)
+    raise ValueError(f"Desteklenmeyen rate limit backend'i: {url}")
+
+
+def parse_key_limits(value: str) -> Dict[str, str]:
+    """``"key1=600/minute,key2=10/second"`` -> ``{"key1": "600/minute", ...}``."""
+    limits: Dict[str, str] = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        # Rate ifadesi "=" içermez; anahtarın kendisi içerebilir
+        key, sep, rate = item.strip().rpartition("=")
+        if not sep or not key:
+            raise ValueError(f"Geçersiz anahtar kotası: {item!r}")
+        parse_rate(rate)
+        limits[key] = rate.strip()
+    return limits
+
+
+def api_key_or_remote_address(request: Request) -> str:
+    """Bucket key: the API key when one is sent, otherwise the client address."""
+    api_key = request.headers.get("x-api-key")
+    if api_key:
+        return "key:" + hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+    host = request.client.host if request.client else "unknown"
+    return "ip:" + host
+
+
+class RateLimitExceeded(HTTPException):
+    def __init__(self, result: RateLimitResult, rate: Rate) -> None:
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Rate limit aşıldı: {rate}",
+            headers={
+                "Retry-After": str(max(1, math.ceil(result.retry_after))),
+                "X-RateLimit-Limit": str(result.limit),
+                "X-RateLimit-Remaining": "0",
+            },
+        )
+
+
+class RateLimiter:
+    """Per-route, per-client GCRA limiter.
+
+    ``key_limits`` maps an API key to a rate that replaces the route rate
+    for that key (e.g. a higher quota for an internal service).
+    """
+
+    def __init__(
+        self,
+        backend: Optional[RateLimitBackend] = None,
+        key_func: Callable[[Request], str] = api_key_or_remote_address,
+        key_limits: Optional[Dict[str, str]] = None,
+        clock: Callable[[], float] = time.time,
+        enabled: bool = True,
+    ) -> None:
+        self.backend = backend or MemoryBackend()
+        self.key_func = key_func
+        self.key_limits = {k: parse_rate(v) for k, v in (key_limits or {}).items()}
+        self.clock = clock
+        self.enabled = enabled
+
+    @classmethod
+    def from_env(cls, **kwargs: Any) -> "RateLimiter":
+        """Backend from ``RATE_LIMIT_STORAGE``, per-key quotas from ``RATE_LIMIT_KEY_LIMITS``."""
+        kwargs.setdefault("key_limits", parse_key_limits(os.getenv("RATE_LIMIT_KEY_LIMITS", "")))
+        return cls(backend=backend_from_url(os.getenv("RATE_LIMIT_STORAGE")), **kwargs)
+
+    def hit(self, key: str, rate: Rate) -> RateLimitResult:
+        return self.backend.update(key, rate, self.clock())
+
+    def check(self, request: Request, rate: Rate, scope: str) -> RateLimitResult:
+        if not self.enabled:
+            return RateLimitResult(True, rate.limit, rate.limit, 0.0)
+        api_key = request.headers.get("x-api-key")
+        if api_key and api_key in self.key_limits:
+            rate = self.key_limits[api_key]
+        result = self.hit(f"{scope}:{self.key_func(request)}", rate)
+        if not result.allowed:
+            REJECTIONS.labels(scope).inc()
+            raise RateLimitExceeded(result, rate)
+        return result
+
+    def limit(self, rate: str, scope: Optional[str] = None) -> Callable[[Callable], Callable]:
+        """Endpoint decorator; the endpoint must accept a ``request: Request`` parameter."""
+        parsed = parse_rate(rate)
+
+        def decorator(func: Callable) -> Callable:
+            route_scope = scope or func.__name__
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                    request = _find_request(args, kwargs)
+                    if self.backend.blocking and self.enabled:
+                        # Redis gidiş-dönüşü olay döngüsünü bekletmesin
+                        await anyio.to_thread.run_sync(self.check, request, parsed, route_scope)
+                    else:
+                        self.check(request, parsed, route_scope)
+                    return await func(*args, **kwargs)
+
+                return async_wrapper
+
+            @functools.wraps(func)
+            def sync_wrapper(*args: Any, **kwargs: Any) -> Any:
+                self.check(_find_request(args, kwargs), parsed, route_scope)
+                return func(*args, **kwargs)
+
+            return sync_wrapper
+
+        return decorator
+
+
+def _find_request(args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Request:
+    request = kwargs.get("request")
+    if isinstance(request, Request):
+        return request
+    for value in list(args) + list(kwargs.values()):
+        if isinstance(value, Request):
+            return value
+    raise RuntimeError("Rate limit uygulanan endpoint 'request: Request' parametresi almalı")
@@ -0,0 +1,188 @@
+"""Kitap bilgilerinin arka planda yenilenmesi (stale-while-revalidate).
+
+``Refresher`` kataloğu sırayla dolaşır ve eksik ya da eskimiş kayıtları
+Open Library'den yeniden sorgular:
+
+- eksik: ``created_at`` boş, ``genres`` boş veya yazar "Unknown" olan ve hiç
+  yenilenmemiş kayıtlar,
+- eskimiş: son yenilemesi (``updated_at``) ``max_age`` saniyeden eski
+  kayıtlar (``max_age=0`` ile kapalı).
+
+İstekler ``rate`` (saniyede istek) ile sınırlanır; istemcinin kendi
+zamanlayıcısı ayrıca geçerlidir. Sonuçlar ``batch_size`` kayıtlık partiler
+halinde ``Library.update_books`` ile tek kayıtta yazılır. Kitaplar yerinde
+değiştirilmez, yeni nesnelerle değiştirilir; yenileme sürerken okumalar
+mevcut veriden kesintisiz yapılır.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from library import Book, Library
+from metrics import REGISTRY
+from open_library import OpenLibraryClient
+
+
+logger = logging.getLogger(__name__)
+
+REFRESHED = REGISTRY.counter("library_refresh_total", "Arka planda yenilenen kitaplar", ["result"])
+
+
+@dataclass
+class RefreshStats:
+    checked: int = 0
+    updated: int = 0
+    not_found: int = 0
+    errors: int = 0
+
+
+def _parse_time(value: Optional[str]) -> Optional[float]:
+    try:
+        return datetime.fromisoformat(value).timestamp() if value else None
+    except ValueError:
+        return None
+
+
+class Refresher:
+    """Walks the catalog and re-fetches stale or incomplete books under a request budget."""
+
+    def __init__(
+        self,
+        lib: Library,
+        client: OpenLibraryClient,
+        rate: float = 0.2,
+        max_age: float = 30 * 86400,
+        batch_size: int = 50,
+        interval: float = 3600.0,
+        retry_after: float = 86400.0,
+    ) -> None:
+        self.lib = lib
+        self.client = client
+        self.rate = rate
+        self.max_age = max_age
+        self.batch_size = batch_size
+        self.interval = interval
+        self.retry_after = retry_after
+        self._failed: Dict[str, float] = {}  # ISBN -> son başarısız deneme
+        self._next_request = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls, lib: Library, client: OpenLibraryClient) -> "Refresher":
+        return cls(
+            lib,
+            client,
+            rate=float(os.getenv("REFRESH_RATE", "0.2")),
+            max_age=float(os.getenv("REFRESH_MAX_AGE_DAYS", "30")) * 86400,
+            batch_size=int(os.getenv("REFRESH_BATCH", "50")),
+            interval=float(os.getenv("REFRESH_INTERVAL", "3600")),
+        )
+
+    def is_stale(self, book: Book, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        refreshed = _parse_time(book.updated_at)
+        if refreshed is None:
+            if not book.created_at or not book.genres or book.author == "Unknown":
+                return True
+            return self.max_age > 0
+        return self.max_age > 0 and now - refreshed > self.max_age
+
+    def stale_books(self, now: Optional[float] = None) -> List[Book]:
+        now = time.time() if now is None else now
+        return [
+            b for b in self.lib.list_books()
+            if self.is_stale(b, now) and now - self._failed.get(b.isbn, -self.retry_after) >= self.retry_after
+        ]
+
+    def refreshed(self, book: Book, info: dict) -> Book:
+        """New ``Book`` with ``info`` merged over ``book``; missing fields keep their old values."""
+        fetched = self.lib.book_from_info(book.isbn, info)
+        return replace(
+            book,
+            title=fetched.title or book.title,
+            author=fetched.author if fetched.author != "Unknown" else book.author,
+            # Eklenme zamanı bilinmeyen eski kayıtlar ilk yenileme zamanını alır
+            created_at=book.created_at or fetched.created_at,
+            genres=fetched.genres or list(book.genres or []),
+            updated_at=fetched.created_at,
+        )
+
+    def _pace(self) -> bool:
+        if self.rate <= 0:
+            return not self._stop.is_set()
+        delay = self._next_request - time.monotonic()
+        if delay > 0 and self._stop.wait(delay):
+            return False
+        self._next_request = max(self._next_request, time.monotonic()) + 1.0 / self.rate
+        return not self._stop.is_set()
+
+    def run_once(self, limit: Optional[int] = None) -> RefreshStats:
+        """Refresh up to ``limit`` stale books, writing every ``batch_size`` results."""
+        stats = RefreshStats()
+        todo = self.stale_books()
+        if limit is not None:
+            todo = todo[:limit]
+        batch: List[Book] = []
+        expected: Dict[str, Book] = {}
+
+        def flush() -> None:
+            # Okunduktan sonra silinen ya da değişen kitaplar atlanır
+            stats.updated += len(self.lib.update_books(batch, expected))
+            batch.clear()
+            expected.clear()
+
+        for book in todo:
+            if not self._pace():
+                break
+            stats.checked += 1
+            try:
+                info = self.client.fetch_by_isbn(book.isbn)
+            except ValueError:
+                stats.not_found += 1
+                REFRESHED.labels("not_found").inc()
+                self._failed[book.isbn] = time.time()
+                continue
+            except Exception:
+                stats.errors += 1
+                REFRESHED.labels("error").inc()
+                self._failed[book.isbn] = time.time()
+                continue
+            REFRESHED.labels("fetched").inc()
+            self._failed.pop(book.isbn, None)
+            batch.append(self.refreshed(book, info))
+            expected[book.isbn] = book
+            if len(batch) >= self.batch_size:
+                flush()
+        if batch:
+            flush()
+        return stats
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="refresher", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                # Kayıt hatası bir sonraki turda tekrar denenir; yenileyici durmaz
+                logger.error("Arka plan yenilemesi başarısız: %s", e)
+            self._stop.wait(self.interval)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
@@ -2,13 +2,19 @@
 """
 🚀 Kütüphane Yönetim API Başlatıcı
 Bu script API'yi başlatır ve dokümantasyon URL'lerini gösterir.
+
+    python run_api.py                                   # geliştirme: reload + tarayıcı
+    python run_api.py --prod --app api:app --workers 4  # üretim
 """
 
+import argparse
+import importlib.util
+import os
 import uvicorn
 import webbrowser
 import time
 import threading
-from pathlib import Path
+from typing import Any, Dict, List, Optional
 
 def print_banner():
     """API başlangıç banner'ını yazdırır."""
@@ -18,53 +24,125 @@ def print_banner():
     print("🚀 API başlatılıyor...")
     print()
 
-def print_urls():
+def print_urls(base_url: str = "http://127.0.0.1:8000"):
     """Erişim URL'lerini yazdırır."""
     print("🌐 API Erişim URL'leri:")
     print("-" * 40)
-    print("📖 Ana Sayfa:           http://127.0.0.1:8000/")
-    print("📚 Swagger UI:          http://127.0.0.1:8000/docs")
-    print("📋 ReDoc:               http://127.0.0.1:8000/redoc")
-    print("🔧 OpenAPI JSON:        http://127.0.0.1:8000/openapi.json")
-    print("💚 Sağlık Kontrolü:     http://127.0.0.1:8000/health")
+    print(f"📖 Ana Sayfa:           {base_url}/")
+    print(f"📚 Swagger UI:          {base_url}/docs")
+    print(f"📋 ReDoc:               {base_url}/redoc")
+    print(f"🔧 OpenAPI JSON:        {base_url}/openapi.json")
+    print(f"💚 Sağlık Kontrolü:     {base_url}/health")
     print()
     print("🔑 Güvenli endpoint'ler için API Key: SECRET_API_KEY_12345")
     print("📝 Header: X-API-Key: SECRET_API_KEY_12345")
     print()
     print("=" * 60)
 
-def open_browser():
+def open_browser(url: str):
     """Tarayıcıda dokümantasyon sayfasını açar."""
     time.sleep(2)  # API'nin başlaması için bekle
     try:
-        webbrowser.open("http://127.0.0.1:8000/docs")
+        webbrowser.open(url)
         print("🌐 Tarayıcıda Swagger UI açıldı!")
     except Exception as e:
         print(f"⚠️  Tarayıcı açılamadı: {e}")
 
-def main():
+
+# Kataloğu, iş kuyruğunu ve kapak önbelleği sayaçlarını süreç belleğinde tutan uygulamalar
+SINGLE_PROCESS_APPS = frozenset({"api:app"})
+
+
+def _available(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Kütüphane API başlatıcı")
+    parser.add_argument("--prod", action="store_true", default=os.getenv("API_ENV") == "production",
+                        help="Üretim modu: çoklu worker, reload yok, uvloop/httptools (API_ENV=production)")
+    parser.add_argument("--app", default=os.getenv("API_APP", "fastapi_main:app"), help="ASGI uygulaması (modül:nesne)")
+    parser.add_argument("--host", default=os.getenv("API_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("API_PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "1")),
+                        help="Üretim modunda worker süreç sayısı (WEB_CONCURRENCY)")
+    parser.add_argument("--keep-alive", type=int, default=int(os.getenv("API_KEEP_ALIVE", "5")),
+                        help="Boştaki keep-alive bağlantıların açık kalacağı saniye")
+    parser.add_argument("--backlog", type=int, default=int(os.getenv("API_BACKLOG", "2048")),
+                        help="Kabul edilmeyi bekleyen bağlantı kuyruğu")
+    parser.add_argument("--graceful-timeout", type=int, default=int(os.getenv("API_GRACEFUL_TIMEOUT", "30")),
+                        help="Kapanışta açık isteklerin bitmesi için beklenecek saniye")
+    parser.add_argument("--no-browser", action="store_true", help="Geliştirme modunda tarayıcı açma")
+    parser.add_argument("--log-level", default=os.getenv("API_LOG_LEVEL", "info"))
+    return parser
+
+
+def server_config(args: argparse.Namespace) -> Dict[str, Any]:
+    """Keyword arguments for ``uvicorn.run`` in development or production mode."""
+    config: Dict[str, Any] = {
+        "host": args.host,
+        "port": args.port,
+        "log_level": args.log_level,
+        "timeout_keep_alive": args.keep_alive,
+        "backlog": args.backlog,
+        "timeout_graceful_shutdown": args.graceful_timeout,
+    }
+    if not args.prod:
+        # Geliştirme: dosya değişince yeniden başlat, her isteği logla
+        config.update(reload=True, access_log=True)
+        return config
+    config.update(
+        reload=False,
+        # workers=1 uvicorn'un süreç yöneticisini atlar; tek süreç doğrudan çalışır
+        workers=max(1, args.workers),
+        # C tabanlı olay döngüsü ve HTTP ayrıştırıcı, yoksa saf Python karşılıkları
+        loop="uvloop" if _available("uvloop") else "asyncio",
+        http="httptools" if _available("httptools") else "h11",
+        # İstek başına log satırı yerine /metrics kullanılır
+        access_log=False,
+        server_header=False,
+        proxy_headers=True,
+    )
+    return config
+
+
+def main(argv: Optional[List[str]] = None):
     """Ana fonksiyon."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.prod and args.workers > 1 and args.app in SINGLE_PROCESS_APPS:
+        # Paylaşılan durum olmadan çoklu worker veri kaybettirir; uyarıyla geçiştirilmez
+        parser.error(
+            f"{args.app} yalnızca tek worker ile çalışır: her worker library.json'u kendi kopyasıyla "
+            "üzerine yazar (diğer worker'ların eklemeleri kaybolur), GET /jobs/{id} başka worker'a "
+            "düşünce 404 döner ve kapak önbelleği boyut sınırını aşar. --workers 1 kullanın."
+        )
+    config = server_config(args)
+    base_url = f"http://{args.host}:{args.port}"
     print_banner()
-    print_urls()
-    
-    # Tarayıcıyı arka planda aç
-    browser_thread = threading.Thread(target=open_browser)
-    browser_thread.daemon = True
-    browser_thread.start()
-    
+    print_urls(base_url)
+
+    if args.prod:
+        # Worker'lar açılışta kataloğu ve arama/tamamlama indekslerini kurar; ilk istek beklemez
+        os.environ.setdefault("API_PRELOAD", "1")
+        print(f"🏭 Üretim modu: {config['workers']} worker, loop={config['loop']}, http={config['http']}")
+        if config["workers"] > 1:
+            print("⚠️  Worker'lar bellek paylaşmaz: bellekteki veriler (ör. kitap listesi, hız sınırı "
+                  "sayaçları) her worker'da ayrıdır; bir istekte yapılan değişiklik başka worker'a "
+                  "düşen isteklerde görünmez.")
+    elif not args.no_browser:
+        # Tarayıcıyı arka planda aç
+        browser_thread = threading.Thread(target=open_browser, args=(f"{base_url}/docs",))
+        browser_thread.daemon = True
+        browser_thread.start()
+
     print("🔄 API çalışıyor... (Durdurmak için Ctrl+C)")
     print()
-    
+
     try:
-        # FastAPI uygulamasını başlat
-        uvicorn.run(
-            "fastapi_main:app",
-            host="127.0.0.1",
-            port=8000,
-            reload=True,
-            log_level="info",
-            access_log=True
-        )
+        # SIGINT/SIGTERM'de uvicorn açık istekleri bitirir ve lifespan kapanışını çalıştırır
+        # (api.py: iş kuyruğu boşaltılır, bekleyen kayıtlar diske yazılır)
+        uvicorn.run(args.app, **config)
     except KeyboardInterrupt:
         print("\n")
         print("👋 API kapatılıyor...")
@@ -0,0 +1,135 @@
+"""Barkod okuma oturumu: debounce ve tekrar bastırma.
+
+Kamera bir barkodu gördüğü her karede sonuç üretir; bir saniyelik bekleme
+onlarca aynı okuma demektir. ``ScanSession`` bu okumaları süzer:
+
+1. Kod normalize edilir ve kontrol hanesi doğrulanır.
+2. Aynı kod ``confirm_frames`` ardışık karede görülmeden kabul edilmez
+   (kareler arası boşluk ``max_gap`` saniyeyi geçerse sayaç sıfırlanır).
+3. Kabul edilen kod ``cooldown`` saniye boyunca tekrar kabul edilmez.
+4. Kütüphanede zaten olan veya bu oturumda gönderilmiş ISBN'ler tekrar
+   Open Library sorgusuna gönderilmez.
+
+Yalnızca gerçekten yeni kodlar ``dispatch`` callback'ine iletilir.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Container, Dict, Iterable, List, Optional, Set
+
+from open_library import OpenLibraryClient
+
+
+@dataclass
+class _Candidate:
+    count: int
+    last_seen: float
+
+
+@dataclass
+class SessionStats:
+    frames: int = 0
+    invalid: int = 0
+    accepted: int = 0
+    known: int = 0
+    dispatched: int = 0
+
+
+class ScanSession:
+    def __init__(
+        self,
+        known: Container[str],
+        dispatch: Callable[[str], Any],
+        confirm_frames: int = 3,
+        cooldown: float = 5.0,
+        max_gap: float = 0.5,
+        on_known: Optional[Callable[[str], Any]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """``known`` is any container of existing ISBNs, e.g. ``Library.isbns()``
+        (a live view, so books added during the session are seen immediately)."""
+        self.known = known
+        self.dispatch = dispatch
+        self.confirm_frames = confirm_frames
+        self.cooldown = cooldown
+        self.max_gap = max_gap
+        self.on_known = on_known
+        self._clock = clock
+        self._candidates: Dict[str, _Candidate] = {}
+        self._cooldown_until: Dict[str, float] = {}
+        self._dispatched: Set[str] = set()
+        self._lock = threading.Lock()
+        self.stats = SessionStats()
+
+    @staticmethod
+    def _normalize(code: str) -> Optional[str]:
+        try:
+            isbn = OpenLibraryClient.normalize_isbn_or_barcode(code)
+        except ValueError:
+            return None
+        return isbn if OpenLibraryClient.has_valid_checksum(isbn) else None
+
+    def feed(self, codes: Iterable[str], now: Optional[float] = None) -> List[str]:
+        """Feed the codes decoded from one frame. Returns the newly dispatched ISBNs."""
+        now = self._clock() if now is None else now
+        # Bir karede birden çok kod kabul edilebilir (ör. raf fotoğrafı)
+        to_dispatch: List[str] = []
+        known_hits: List[str] = []
+        with self._lock:
+            self.stats.frames += 1
+            for code in codes:
+                isbn = self._normalize(code)
+                if isbn is None:
+                    self.stats.invalid += 1
+                    continue
+                if self._cooldown_until.get(isbn, 0.0) > now:
+                    continue
+                cand = self._candidates.get(isbn)
+                if cand is None or now - cand.last_seen > self.max_gap:
+                    cand = self._candidates[isbn] = _Candidate(0, now)
+                cand.count += 1
+                cand.last_seen = now
+                if cand.count < self.confirm_frames:
+                    continue
+
+                # Kabul edildi: sayaç sıfırlanır, bekleme süresi başlar
+                del self._candidates[isbn]
+                self._cooldown_until[isbn] = now + self.cooldown
+                self.stats.accepted += 1
+                if isbn in self._dispatched or isbn in self.known:
+                    self.stats.known += 1
+                    known_hits.append(isbn)
+                    continue
+                self._dispatched.add(isbn)
+                self.stats.dispatched += 1
+                to_dispatch.append(isbn)
+            self._expire(now)
+
+        # Callback'ler kilit dışında çağrılır (Open Library sorgusu yavaş olabilir)
+        if self.on_known is not None:
+            for isbn in known_hits:
+                self.on_known(isbn)
+        for isbn in to_dispatch:
+            self.dispatch(isbn)
+        return to_dispatch
+
+    def on_scan_result(self, result: Any) -> None:
+        """Adapter for ``ScanPipeline(on_result=...)``; uses the frame capture time."""
+        self.feed([result.data], now=result.captured_at)
+
+    def forget(self, isbn: str) -> None:
+        """Allow ``isbn`` to be dispatched again (e.g. after a failed lookup)."""
+        with self._lock:
+            self._dispatched.discard(isbn)
+            self._cooldown_until.pop(isbn, None)
+
+    def _expire(self, now: float) -> None:
+        if len(self._candidates) > 256:
+            for isbn in [k for k, c in self._candidates.items() if now - c.last_seen > self.max_gap]:
+                del self._candidates[isbn]
+        if len(self._cooldown_until) > 256:
+            for isbn in [k for k, t in self._cooldown_until.items() if t <= now]:
+                del self._cooldown_until[isbn]
@@ -0,0 +1,182 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from barcode_scanner import Detection, ImageFileSource, ScanPipeline, TrackingDecoder
+
+
+class FakeSource:
+    """Stands in for cv2.VideoCapture: yields ``count`` frames then reports end of stream."""
+
+    def __init__(self, count, delay=0.0):
+        self.count = count
+        self.delay = delay
+        self.read_calls = 0
+
+    def read(self):
+        if self.read_calls >= self.count:
+            return False, None
+        if self.delay:
+            time.sleep(self.delay)
+        frame = np.full((4, 4), self.read_calls, dtype=np.uint8)
+        self.read_calls += 1
+        return True, frame
+
+
+def every_third_frame(frame):
+    n = int(frame[0, 0])
+    return [Detection("9789753141345", "EAN13", (n, 0, 10, 10))] if n % 3 == 0 else []
+
+
+def test_pipeline_decodes_all_frames_when_queue_keeps_up():
+    callback_results = []
+    pipeline = ScanPipeline(
+        FakeSource(30), decoder=every_third_frame, workers=3, queue_size=64,
+        on_result=callback_results.append, stop_at_end=True,
+    )
+    with pipeline:
+        results = list(pipeline.results(timeout=5))
+
+    assert sorted(r.frame_id for r in results) == list(range(0, 30, 3))
+    assert len(callback_results) == len(results)
+    assert pipeline.frames_captured == 30
+    assert pipeline.frames_decoded == 30
+    assert pipeline.frames_dropped == 0
+
+
+def test_capture_is_not_blocked_by_slow_decoder():
+    gate = threading.Event()
+
+    def slow_decoder(frame):
+        gate.wait(5)
+        return []
+
+    source = FakeSource(50)
+    pipeline = ScanPipeline(source, decoder=slow_decoder, workers=1, queue_size=2, stop_at_end=True)
+    pipeline.start()
+    deadline = time.time() + 5
+    while source.read_calls < 50 and time.time() < deadline:
+        time.sleep(0.01)
+    # Decoder takılı kalsa da kamera okunmaya devam eder, eski kareler atılır
+    assert source.read_calls == 50
+    assert pipeline.frames_dropped >= 45
+    gate.set()
+    assert list(pipeline.results(timeout=5)) == []
+    pipeline.stop()
+    assert pipeline.frames_decoded <= 5
+
+
+class BrightBlockDecoder:
+    """Fake pyzbar: reports the bounding box of 255-valued pixels as one barcode."""
+
+    def __init__(self):
+        self.shapes = []
+
+    def __call__(self, image):
+        assert image.ndim == 2  # TrackingDecoder gri tonlamalı görüntü verir
+        self.shapes.append(image.shape)
+        ys, xs = np.nonzero(image == 255)
+        if len(xs) == 0:
+            return []
+        x, y = int(xs.min()), int(ys.min())
+        return [Detection("9789753141345", "EAN13", (x, y, int(xs.max()) - x + 1, int(ys.max()) - y + 1))]
+
+
+def make_frame(x, y, size=(480, 640)):
+    frame = np.zeros(size + (3,), dtype=np.uint8)
+    if x is not None:
+        frame[y:y + 40, x:x + 120] = 255
+    return frame
+
+
+def test_tracking_decoder_uses_downscale_then_roi(tmp_path):
+    # Kayıtlı bir oturumu taklit eden görüntü dosyaları
+    paths = []
+    for i, (x, y) in enumerate([(100, 200), (104, 202), (108, 204), (400, 50), (None, None)]):
+        path = tmp_path / f"frame_{i}.png"
+        cv2.imwrite(str(path), make_frame(x, y))
+        paths.append(str(path))
+    source = ImageFileSource(paths)
+
+    fake = BrightBlockDecoder()
+    decoder = TrackingDecoder(decoder=fake, downscale=0.5, roi_margin=0.5, full_scan_every=10)
+
+    ok, frame = source.read()
+    first = decoder(frame)
+    assert first[0].rect == (100, 200, 120, 40)
+    assert fake.shapes[-1] == (240, 320)  # ilk deneme küçültülmüş karede
+    assert decoder.downscaled_hits == 1
+
+    for expected_x in (104, 108):
+        ok, frame = source.read()
+        found = decoder(frame)
+        assert found[0].rect[0] == expected_x
+        # Yalnızca ROI decode edildi
+        assert fake.shapes[-1][0] < 100 and fake.shapes[-1][1] < 250
+    assert decoder.roi_scans == 2
+
+    # Barkod ROI dışına çıktı: tam kare taramasına düşülür
+    ok, frame = source.read()
+    found = decoder(frame)
+    assert found[0].rect[:2] == (400, 50)
+    assert decoder.full_scans == 2
+
+    ok, frame = source.read()
+    assert decoder(frame) == []
+    assert source.read() == (False, None)
+
+
+def test_tracking_decoder_forces_periodic_full_scan():
+    fake = BrightBlockDecoder()
+    decoder = TrackingDecoder(decoder=fake, downscale=0.5, full_scan_every=3)
+    for _ in range(8):
+        decoder(make_frame(100, 200))
+    # 1 tam tarama + 3 ROI + 1 tam tarama + 3 ROI
+    assert decoder.full_scans == 2
+    assert decoder.roi_scans == 6
+
+
+def test_worker_survives_decoder_and_callback_errors(caplog):
+    failed = []
+
+    def flaky_decoder(frame):
+        n = int(frame[0, 0])
+        if n == 4 and not failed:
+            failed.append(n)
+            raise RuntimeError("bozuk kare")
+        return every_third_frame(frame)
+
+    def callback(result):
+        if result.frame_id == 0:
+            raise ValueError("callback hatası")
+
+    pipeline = ScanPipeline(
+        FakeSource(12), decoder=flaky_decoder, workers=1, queue_size=64,
+        on_result=callback, stop_at_end=True,
+    )
+    with pipeline:
+        results = list(pipeline.results(timeout=5))
+
+    # Tek worker hatadan sonra da sonraki kareleri işler
+    assert sorted(r.frame_id for r in results) == [0, 3, 6, 9]
+    assert (pipeline.frames_failed, pipeline.frames_decoded, pipeline.callback_errors) == (1, 11, 1)
+    assert "Kare çözülemedi" in caplog.text and "bozuk kare" in caplog.text
+
+
+def test_source_error_ends_the_stream(caplog):
+    class BrokenSource(FakeSource):
+        def read(self):
+            if self.read_calls == 4:
+                raise OSError("kamera bağlantısı koptu")
+            return super().read()
+
+    # stop_at_end=False: hata olmasa akış hiç bitmezdi
+    pipeline = ScanPipeline(BrokenSource(100), decoder=every_third_frame, workers=2, queue_size=64)
+    with pipeline:
+        results = list(pipeline.results())
+
+    assert sorted(r.frame_id for r in results) == [0, 3]
+    assert isinstance(pipeline.capture_error, OSError) and pipeline.frames_captured == 4
+    assert "kamera bağlantısı koptu" in caplog.text
@@ -0,0 +1,120 @@
+import cv2
+import numpy as np
+
+from barcode_scanner import Detection
+from batch_scan import BatchReport, extract_isbns, import_into_library, scan_file
+from library import Library
+
+
+# Görüntüdeki beyaz bloğun x konumu hangi "barkodun" okunduğunu belirler
+CODES_BY_COLUMN = {0: "978-975-314-134-5", 1: "9786050201802", 2: "9789753141346"}
+
+
+def column_decoder(image):
+    """Picklable fake pyzbar used inside pool workers."""
+    ys, xs = np.nonzero(image == 255)
+    if len(xs) == 0:
+        return []
+    x, y = int(xs.min()), int(ys.min())
+    column = x * 3 // image.shape[1]
+    return [Detection(CODES_BY_COLUMN[column], "EAN13", (x, y, int(xs.max()) - x + 1, int(ys.max()) - y + 1))]
+
+
+def frame_with_code(column, size=(120, 300)):
+    frame = np.zeros(size + (3,), dtype=np.uint8)
+    if column is not None:
+        x = column * size[1] // 3 + 10
+        frame[40:80, x:x + 60] = 255
+    return frame
+
+
+def make_fixtures(tmp_path):
+    shelf = tmp_path / "shelf"
+    shelf.mkdir()
+    cv2.imwrite(str(shelf / "a.png"), frame_with_code(0))
+    cv2.imwrite(str(shelf / "b.png"), frame_with_code(1))
+    cv2.imwrite(str(shelf / "bad_checksum.png"), frame_with_code(2))
+    cv2.imwrite(str(shelf / "empty.png"), frame_with_code(None))
+    (shelf / "notes.txt").write_text("yok sayılır")
+
+    video = cv2.VideoWriter(str(tmp_path / "scan.avi"), cv2.VideoWriter_fourcc(*"MJPG"), 10, (300, 120))
+    for column in [0, 0, 0, None, 1, 1]:
+        video.write(frame_with_code(column))
+    video.release()
+    return [str(shelf), str(tmp_path / "scan.avi")]
+
+
+def test_extract_dedupes_and_validates(tmp_path):
+    paths = make_fixtures(tmp_path)
+    report = BatchReport()
+    isbns = list(extract_isbns(paths, workers=0, decoder=column_decoder, report=report))
+
+    assert sorted(isbns) == ["9786050201802", "9789753141345"]
+    assert report.files == 5
+    assert report.frames == 4 + 6
+    assert report.invalid_codes == 1
+    assert report.frames_per_second > 0
+
+
+def test_extract_with_process_pool(tmp_path):
+    paths = make_fixtures(tmp_path)
+    isbns = list(extract_isbns(paths, workers=2, decoder=column_decoder))
+    assert sorted(isbns) == ["9786050201802", "9789753141345"]
+
+
+def test_still_images_find_small_codes_next_to_large_ones(tmp_path):
+    path = str(tmp_path / "raf.png")
+    cv2.imwrite(path, frame_with_code(0))
+
+    def decoder(image):
+        # Büyük kod her ölçekte, küçük kod yalnızca tam çözünürlükte okunur
+        found = [Detection("9789753141345", "EAN13", (0, 0, 10, 10))]
+        if image.shape[1] >= 300:
+            found.append(Detection("9786050201802", "EAN13", (200, 0, 5, 5)))
+        return found
+
+    assert scan_file(path, decoder=decoder).codes == ["9789753141345", "9786050201802"]
+
+
+class FakeClient:
+    def __init__(self):
+        self.calls = []
+
+    def fetch_by_isbn(self, isbn):
+        self.calls.append(isbn)
+        return {"title": f"Kitap {isbn}", "authors": ["Yazar"]}
+
+
+def test_import_streams_into_library_with_batched_saves(tmp_path, monkeypatch):
+    lib = Library(storage_path=str(tmp_path / "library.json"))
+    saves = []
+    original_save = lib.save_books
+    monkeypatch.setattr(lib, "save_books", lambda: (saves.append(1), original_save()))
+
+    client = FakeClient()
+    report = import_into_library(["9789753141345", "9786050201802", "9789754341966"], lib, client, batch_size=2)
+
+    assert report.added == 3
+    assert len(saves) == 2
+    assert {b.isbn for b in Library(storage_path=str(tmp_path / "library.json")).list_books()} == {
+        "9789753141345", "9786050201802", "9789754341966"
+    }
+    # Zaten kayıtlı ISBN'ler için tekrar istek atılmaz
+    import_into_library(["9789753141345"], lib, client)
+    assert client.calls.count("9789753141345") == 1
+
+
+def test_import_fetches_each_batch_concurrently(tmp_path):
+    import threading
+
+    lib = Library(storage_path=str(tmp_path / "library.json"))
+    both_in_flight = threading.Barrier(2, timeout=5)
+
+    class ConcurrentClient(FakeClient):
+        def fetch_by_isbn(self, isbn):
+            # İki sorgu aynı anda sürmezse bariyer zaman aşımına uğrar
+            both_in_flight.wait()
+            return super().fetch_by_isbn(isbn)
+
+    report = import_into_library(["9789753141345", "9786050201802"], lib, ConcurrentClient(), workers=2)
+    assert report.added == 2 and report.failed == {}
@@ -0,0 +1,26 @@
+import json
+
+import benchmark
+from open_library import OpenLibraryClient
+
+
+def test_synthetic_isbns_are_valid_and_unique():
+    isbns = [benchmark.make_isbn(i) for i in range(2000)]
+    assert len(set(isbns)) == 2000
+    assert all(OpenLibraryClient.has_valid_checksum(i) for i in isbns)
+
+
+def test_run_writes_comparable_json(tmp_path):
+    out = tmp_path / "bench.json"
+    assert benchmark.main(["--sizes", "50", "--only", "library,storage,api", "--api-requests", "5",
+                           "--concurrency", "2", "--out", str(out)]) == 0
+    report = json.loads(out.read_text(encoding="utf-8"))
+
+    names = {r["name"] for r in report["results"]}
+    assert {"library.add_books", "library.find_book", "storage.write", "api.create_book", "fastapi_main.list_books"} <= names
+    assert all(r["ops"] > 0 and r["seconds"] >= 0 for r in report["results"])
+    assert all(r["extra"]["errors"] == 0 for r in report["results"] if "errors" in r["extra"])
+    assert report["meta"]["sizes"] == [50]
+
+    lines = benchmark.compare(report, report)
+    assert lines and all(line.endswith("x1.00") for line in lines)
@@ -0,0 +1,71 @@
+from fastapi.testclient import TestClient
+
+from library import Book, Library
+
+
+def make_book(isbn, author, genres, created_at):
+    return Book(title=f"Kitap {isbn}", author=author, isbn=isbn, created_at=created_at, genres=genres)
+
+
+def test_stats_follow_adds_and_removes(tmp_path):
+    lib = Library(str(tmp_path / "lib.json"))
+    lib.add_books([
+        make_book("1", "Orhan Pamuk", ["Roman", "Türk Edebiyatı"], "2024-01-05T10:00:00+00:00"),
+        make_book("2", "Orhan Pamuk, Yaşar Kemal", ["Roman"], "2024-01-20T10:00:00+00:00"),
+        make_book("3", "Sait Faik", ["Öykü"], "2024-02-01T10:00:00+00:00"),
+        make_book("4", "Unknown", [], None),
+    ])
+
+    stats = lib.stats(top=2, daily=True)
+    assert stats["books"] == 4 and stats["authors"] == 4 and stats["genres"] == 3
+    assert stats["top_authors"][0] == {"name": "Orhan Pamuk", "count": 2}
+    assert stats["top_genres"][0] == {"name": "Roman", "count": 2}
+    assert stats["by_month"] == {"2024-01": 2, "2024-02": 1, "unknown": 1}
+    assert stats["by_day"]["2024-01-20"] == 1
+
+    lib.remove_books(["2", "4"])
+    stats = lib.stats()
+    assert stats["books"] == 2
+    assert {a["name"] for a in stats["top_authors"]} == {"Orhan Pamuk", "Sait Faik"}
+    assert sorted(g["name"] for g in stats["top_genres"]) == ["Roman", "Türk Edebiyatı", "Öykü"]
+    assert stats["by_month"] == {"2024-01": 1, "2024-02": 1}
+
+    # Dosyadan yeniden yüklenince aynı sayılar
+    assert Library(str(tmp_path / "lib.json")).stats() == stats
+
+
+def test_stats_endpoint(monkeypatch, tmp_path):
+    import api
+
+    lib = Library(str(tmp_path / "lib.json"))
+    lib.add_book(make_book("1", "Oğuz Atay", ["Roman"], "2023-12-31T23:59:00+00:00"))
+    monkeypatch.setattr(api, "lib", lib)
+    client = TestClient(api.app)
+
+    resp = client.get("/books/stats")
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["books"] == 1 and body["by_month"] == {"2023-12": 1} and "by_day" not in body
+    assert client.get("/books/stats?daily=true").json()["by_day"] == {"2023-12-31": 1}
+    assert client.get("/books/stats?top=0").status_code == 422
+
+
+def test_ranked_and_sorted_counters_match_a_full_recount():
+    import random
+    from collections import Counter
+
+    from catalog_stats import RankedCounter, SortedCounter
+
+    rng = random.Random(7)
+    ranked, ordered, expected = RankedCounter(), SortedCounter(), Counter()
+    for _ in range(3000):
+        key = f"k{rng.randrange(60):02d}"
+        delta = 1 if rng.random() < 0.6 or not expected[key] else -1
+        ranked.update([key], delta)
+        ordered.update(key, delta)
+        expected[key] += delta
+        expected += Counter()  # sıfırları at
+        full = sorted(expected.items(), key=lambda kv: (-kv[1], kv[0]))
+        assert ranked.most_common(5) == full[:5]
+        assert list(ordered.items()) == sorted(expected.items())
+    assert ranked.most_common(1000) == full and len(ranked) == len(expected)
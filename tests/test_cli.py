@@ -0,0 +1,114 @@
+import io
+import json
+import threading
+
+import pytest
+
+import main
+
+
+class StubClient:
+    def __init__(self, missing=()):
+        self.missing = set(missing)
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def fetch_by_isbn(self, isbn):
+        with self.lock:
+            self.calls.append(isbn)
+        if isbn in self.missing:
+            raise ValueError("Kitap bulunamadı")
+        return {"title": f"Kitap {isbn}", "authors": ["Yazar"], "subjects": ["Roman"]}
+
+
+def run(tmp_path, *argv, stdin="", client=None):
+    out = io.StringIO()
+    code = main.main(["--storage", str(tmp_path / "lib.json"), *argv], client=client, stdin=io.StringIO(stdin), stdout=out)
+    return code, out.getvalue()
+
+
+def test_add_reads_args_files_and_stdin_and_saves_once(tmp_path, monkeypatch):
+    listfile = tmp_path / "isbns.txt"
+    listfile.write_text("9789750719387  # yorum\n9786053609421\n", encoding="utf-8")
+    client = StubClient(missing={"9780306406157"})
+    saves = []
+    monkeypatch.setattr(main.Library, "save_books", lambda self, _orig=main.Library.save_books: (saves.append(1), _orig(self)))
+
+    code, out = run(tmp_path, "add", "978-0-306-40615-7", "-", "-f", str(listfile), "--workers", "3",
+                    stdin="9789750719387, 0306406152\nbozuk\n", client=client)
+
+    result = json.loads(out)
+    assert code == 1  # kısmi hata
+    assert sorted(b["isbn"] for b in result["added"]) == ["0306406152", "9786053609421", "9789750719387"]
+    assert set(result["failed"]) == {"9780306406157", "bozuk"}
+    assert sorted(client.calls) == ["0306406152", "9780306406157", "9786053609421", "9789750719387"]
+    assert len(saves) == 1
+
+
+def test_list_find_search_export_import_stats(tmp_path):
+    run(tmp_path, "add", "9789750719387", "9786053609421", client=StubClient())
+
+    code, out = run(tmp_path, "list", "--limit", "1")
+    assert code == 0 and [b["isbn"] for b in json.loads(out)] == ["9789750719387"]
+
+    code, out = run(tmp_path, "find", "9786053609421", "123")
+    assert code == 1 and list(json.loads(out)["found"]) == ["9786053609421"]
+
+    code, out = run(tmp_path, "search", "KITAP 978605", "--field", "title")
+    assert [b["isbn"] for b in json.loads(out)] == ["9786053609421"]
+
+    export = tmp_path / "yedek.json"
+    assert run(tmp_path, "export", "--out", str(export))[0] == 0
+    assert run(tmp_path, "remove", "9789750719387")[0] == 0
+    code, out = run(tmp_path, "import", str(export))
+    assert json.loads(out) == {"added": 1, "duplicates": ["9786053609421"], "invalid": {}}
+
+    code, out = run(tmp_path, "stats")
+    stats = json.loads(out)
+    assert stats["books"] == 2 and stats["top_genres"] == [{"name": "Roman", "count": 2}]
+
+
+def test_text_format(tmp_path):
+    run(tmp_path, "add", "9789750719387", client=StubClient())
+    code, out = run(tmp_path, "list", "--format", "text")
+    assert out.strip() == "- Kitap 9789750719387 by Yazar (ISBN: 9789750719387)"
+
+
+def test_cli_uses_storage_from_env(tmp_path, monkeypatch):
+    # API ile aynı parçalı + write-behind depolama; kapanışta bekleyen yazma diske iner
+    monkeypatch.setenv("STORAGE_SHARDS", "2")
+    monkeypatch.setenv("STORAGE_WRITE_BEHIND", "1")
+    monkeypatch.setenv("STORAGE_FLUSH_WINDOW_MS", "60000")
+    assert run(tmp_path, "add", "9789750719387", client=StubClient())[0] == 0
+    assert (tmp_path / "lib_shards").is_dir() and not (tmp_path / "lib.json").exists()
+
+    monkeypatch.delenv("STORAGE_WRITE_BEHIND")
+    code, out = run(tmp_path, "list")
+    assert [b["isbn"] for b in json.loads(out)] == ["9789750719387"]
+
+
+def test_rerunning_add_skips_existing_isbns(tmp_path):
+    assert run(tmp_path, "add", "9789750719387", client=StubClient())[0] == 0
+    client = StubClient()
+    code, out = run(tmp_path, "add", "9789750719387", "9786053609421", client=client)
+    result = json.loads(out)
+    assert code == 0 and result["skipped"] == ["9789750719387"] and result["failed"] == {}
+    assert [b["isbn"] for b in result["added"]] == ["9786053609421"] and client.calls == ["9786053609421"]
+
+
+def test_bad_import_file_and_batch_size_exit_2(tmp_path, capsys):
+    bad = tmp_path / "bozuk.jsonl"
+    bad.write_text('{"title": "A", "author": "B", "isbn": "1"}\n\n{"title": "C", \n', encoding="utf-8")
+    assert run(tmp_path, "import", str(bad)) == (2, "")
+    assert "satır 3" in capsys.readouterr().err
+
+    bad.write_text('[{"title": "A"},\n oops]', encoding="utf-8")
+    assert run(tmp_path, "import", str(bad))[0] == 2
+    assert "satır 2" in capsys.readouterr().err
+    assert run(tmp_path, "import", str(tmp_path / "yok.json"))[0] == 2
+
+    for value in ("0", "abc"):
+        with pytest.raises(SystemExit) as exc:
+            run(tmp_path, "add", "9789750719387", "--batch-size", value)
+        assert exc.value.code == 2
+    assert "1 veya daha büyük" in capsys.readouterr().err
@@ -0,0 +1,164 @@
+import os
+import threading
+
+import cv2
+import httpx
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from covers import CoverCache, DiskLRU, make_thumbnail
+from library import Book, Library
+from open_library import OpenLibraryClient
+
+
+def make_image(width, height, color=(30, 120, 200), ext=".png"):
+    image = np.zeros((height, width, 3), dtype=np.uint8)
+    image[:] = color
+    ok, data = cv2.imencode(ext, image)
+    assert ok
+    return data.tobytes()
+
+
+def decode(data):
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+def test_thumbnail_has_fixed_size_and_keeps_aspect():
+    thumb = decode(make_thumbnail(make_image(600, 300), 160, 240))
+    assert thumb.shape == (240, 160, 3)
+    # Yatay görsel ortalanır; üst/alt boşluk beyazdır
+    assert thumb[5, 80].tolist() == [255, 255, 255]
+    assert abs(int(thumb[120, 80][0]) - 30) < 10
+
+    assert decode(make_thumbnail(make_image(20, 30), 160, 240)).shape == (240, 160, 3)
+    with pytest.raises(ValueError):
+        make_thumbnail(b"resim degil")
+
+
+def test_disk_lru_evicts_least_recently_used(tmp_path):
+    store = DiskLRU(str(tmp_path / "c"), max_bytes=250)
+    for key in "abc":
+        store.put(key, bytes(100))
+    # "a" en eskiydi
+    assert "a" not in store and store.total_bytes == 200
+    assert store.get("b") is not None
+    store.put("d", bytes(100))
+    assert "c" not in store and "b" in store and "d" in store
+    assert sorted(os.listdir(tmp_path / "c")) == ["b.jpg", "d.jpg"]
+
+    # Yeniden açılışta kullanım sırası dosya zamanlarından okunur
+    os.utime(tmp_path / "c" / "b.jpg", (1, 1))
+    reopened = DiskLRU(str(tmp_path / "c"), max_bytes=250)
+    assert len(reopened) == 2 and reopened.total_bytes == 200
+    reopened.put("e", bytes(100))
+    assert "b" not in reopened and "d" in reopened
+
+
+class CoverTransport(httpx.BaseTransport):
+    def __init__(self, covers):
+        self.covers = covers
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def handle_request(self, request):
+        with self.lock:
+            self.requests.append(str(request.url))
+        isbn = request.url.path.rsplit("/", 1)[-1].split("-")[0]
+        if isbn in self.covers and request.url.params.get("default") == "false":
+            return httpx.Response(200, content=self.covers[isbn], headers={"Content-Type": "image/jpeg"})
+        return httpx.Response(404)
+
+
+def test_cover_cache_fetches_once_and_remembers_missing(tmp_path):
+    transport = CoverTransport({"9789750719387": make_image(400, 600, ext=".jpg")})
+    cache = CoverCache(OpenLibraryClient(transport=transport), directory=str(tmp_path / "covers"))
+
+    first = cache.get("978-975-07-1938-7")
+    assert decode(first.data).shape == (240, 160, 3)
+    assert transport.requests == ["https://covers.openlibrary.org/b/isbn/9789750719387-L.jpg?default=false"]
+    assert cache.get("9789750719387").etag == first.etag
+    assert cache.get("9786053609421") is None and cache.get("9786053609421") is None
+    assert len(transport.requests) == 2
+
+    # Yeni süreç aynı diski kullanır, upstream'e gitmez
+    again = CoverCache(OpenLibraryClient(transport=transport), directory=str(tmp_path / "covers"))
+    assert again.get("9789750719387").data == first.data and len(transport.requests) == 2
+
+
+def test_cover_endpoint_etag_and_cache_headers(monkeypatch, tmp_path):
+    import api
+
+    lib = Library(str(tmp_path / "lib.json"))
+    lib.add_books([Book("Kapaklı", "Yazar", "9789750719387"), Book("Kapaksız", "Yazar", "9786053609421")])
+    transport = CoverTransport({"9789750719387": make_image(300, 450, ext=".jpg")})
+    monkeypatch.setattr(api, "lib", lib)
+    monkeypatch.setattr(api, "covers", CoverCache(OpenLibraryClient(transport=transport), directory=str(tmp_path / "covers")))
+    client = TestClient(api.app)
+
+    resp = client.get("/books/9789750719387/cover")
+    assert resp.status_code == 200 and resp.headers["content-type"] == "image/jpeg"
+    assert "max-age=" in resp.headers["cache-control"]
+    etag = resp.headers["etag"]
+
+    resp = client.get("/books/9789750719387/cover", headers={"If-None-Match": etag})
+    assert resp.status_code == 304 and resp.content == b"" and resp.headers["etag"] == etag
+    assert client.get("/books/9789750719387/cover", headers={"If-None-Match": '"baska"'}).status_code == 200
+    assert len(transport.requests) == 1
+
+    assert client.get("/books/9786053609421/cover").status_code == 404
+    assert client.get("/books/0000000000/cover").status_code == 404
+
+
+def test_from_env_fetches_covers_on_a_separate_budget(monkeypatch, tmp_path):
+    monkeypatch.setenv("COVERS_DIR", str(tmp_path / "covers"))
+    monkeypatch.setenv("COVERS_RATE", "2")
+    client = OpenLibraryClient(covers_url="http://127.0.0.1:9/")
+    cache = CoverCache.from_env(client)
+    assert cache.client is not client and cache.client.scheduler is not client.scheduler
+    assert cache.client.covers_url == "http://127.0.0.1:9"
+    assert (cache.client.scheduler.rate, cache.client.scheduler.max_rate) == (2, 2)
+    # Kapak isteği katalog bütçesinden slot almaz
+    client.scheduler._next_slot = before = 0.0
+    cache.client.scheduler._acquire()
+    assert client.scheduler._next_slot == before
+
+
+def test_concurrent_misses_share_one_download_and_release_the_lock(tmp_path):
+    started, release = threading.Event(), threading.Event()
+
+    class SlowTransport(CoverTransport):
+        def handle_request(self, request):
+            started.set()
+            release.wait(5)
+            return super().handle_request(request)
+
+    transport = SlowTransport({"9789750719387": make_image(300, 450, ext=".jpg")})
+    cache = CoverCache(OpenLibraryClient(transport=transport), directory=str(tmp_path / "covers"))
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("9789750719387"))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    assert started.wait(5)
+    # İndirme sürerken tüm bekleyenler aynı kaydı paylaşır
+    assert len(cache._inflight) == 1
+    release.set()
+    for t in threads:
+        t.join()
+    assert len(results) == 4 and len({r.etag for r in results}) == 1
+    assert len(transport.requests) == 1 and cache._inflight == {}
+
+
+def test_missing_cover_cache_is_bounded(tmp_path):
+    transport = CoverTransport({})
+    cache = CoverCache(OpenLibraryClient(transport=transport), directory=str(tmp_path / "covers"), max_missing=2)
+    for isbn in ("9789750719387", "9786053609421", "9780306406157"):
+        assert cache.get(isbn) is None
+    # En eski kayıt atıldı; tekrar sorulunca upstream'e gidilir
+    assert list(cache._missing) == ["9786053609421", "9780306406157"]
+    assert cache.get("9789750719387") is None and len(transport.requests) == 4
+
+    cache.missing_ttl = 0
+    assert cache.get("9786053609421") is None and len(transport.requests) == 5
+    # Süresi dolan kayıtlar yeni bir kayıt eklenirken temizlenir (ttl=0: hepsi)
+    assert len(cache._missing) == 0
@@ -0,0 +1,95 @@
+import json
+import random
+
+import httpx
+import pytest
+
+import loadtest
+from fake_openlibrary import FakeConfig, FakeOpenLibrary, parse_latency
+from open_library import OpenLibraryClient
+from throttle import RequestScheduler
+
+
+def client_for(fake, **scheduler):
+    options = dict(rate=1000, max_rate=1000, backoff_base=0)
+    options.update(scheduler)
+    return OpenLibraryClient(base_url=fake.url, scheduler=RequestScheduler(**options))
+
+
+def test_latency_specs():
+    rng = random.Random(0)
+    assert parse_latency("0")(rng) == 0 and parse_latency("fixed:20")(rng) == 0.02 and parse_latency("15")(rng) == 0.015
+    assert all(0.01 <= parse_latency("uniform:10,50")(rng) <= 0.05 for _ in range(100))
+    samples = sorted(parse_latency("lognormal:40,0.5")(rng) for _ in range(2000))
+    assert 0.035 < samples[1000] < 0.045 and samples[-20] > 0.1  # medyan ~40 ms, uzun kuyruk
+    assert parse_latency("exp:0")(rng) == 0
+    for bad in ("gamma:1", "uniform:10", "fixed:-5", "fixed:abc"):
+        with pytest.raises(ValueError):
+            parse_latency(bad)
+
+
+def test_client_follows_redirects_and_resolves_authors():
+    with FakeOpenLibrary(FakeConfig(redirect_rate=1.0)) as fake:
+        client = client_for(fake)
+        info = client.fetch_by_isbn("978-975-07-1938-7")
+        assert info["title"] == "Tutunamayanlar" and info["authors"] == ["Oğuz Atay"]
+        # Yalnızca ISBN-10 ile kayıtlı baskı: 13 haneli sorgu 404, ISBN-10 ile bulunur
+        assert client.fetch_by_isbn("9789750802942")["authors"] == ["Ahmet Hamdi Tanpınar"]
+        # Fixture'da olmayan geçerli ISBN için deterministik kayıt üretilir
+        assert client.fetch_by_isbn("9780000000019")["title"] == "Kitap 9780000000019"
+        client.close()
+        assert fake.stats() == {
+            "authors.200": 2, "books.200": 3, "isbn.302": 3, "isbn.404": 1,
+        }
+
+    with FakeOpenLibrary(FakeConfig(synthesize=False)) as fake:
+        with pytest.raises(ValueError):
+            client_for(fake).fetch_by_isbn("9780000000019")
+
+
+def test_faults_are_retried_by_the_client():
+    config = FakeConfig(throttle_rate=1.0, retry_after=0)
+    with FakeOpenLibrary(config) as fake:
+        client = client_for(fake, max_retries=1)
+        with pytest.raises(httpx.HTTPStatusError):
+            client.fetch_by_isbn("9789750719387")
+        assert fake.stats() == {"isbn.429": 2}
+        assert client.scheduler.rate == 250  # her 429'da bütçe yarıya iner
+
+        config.throttle_rate, config.error_rate = 0.0, 1.0
+        with pytest.raises(httpx.HTTPStatusError):
+            client.fetch_by_isbn("9789750719387")
+        assert fake.stats()["isbn.500"] == 2
+        client.close()
+
+
+def test_latency_is_applied():
+    with FakeOpenLibrary(FakeConfig(latency="fixed:20")) as fake:
+        resp = httpx.get(f"{fake.url}/authors/OL101A.json")
+        assert resp.json()["name"] == "Oğuz Atay"
+        assert resp.elapsed.total_seconds() >= 0.02
+        assert httpx.get(f"{fake.url}/baska").status_code == 404
+
+
+def test_loadtest_end_to_end(tmp_path):
+    out = tmp_path / "load.json"
+    assert loadtest.main(["--requests", "4", "--concurrency", "2", "--size", "10",
+                          "--redirect-rate", "1", "--out", str(out)]) == 0
+    report = json.loads(out.read_text(encoding="utf-8"))
+    results = {r["name"]: r for r in report["results"]}
+    assert set(results) == {"e2e.preview", "e2e.add"}
+    assert results["e2e.preview"]["extra"]["statuses"] == {"200": 4}
+    assert results["e2e.add"]["extra"]["statuses"] == {"201": 4}
+    assert results["e2e.add"]["extra"]["upstream"] == {"authors.200": 4, "books.200": 4, "isbn.302": 4}
+    assert all(r["ops_per_second"] > 0 and r["extra"]["p99_ms"] >= r["extra"]["p50_ms"] for r in results.values())
+
+
+def test_client_from_env_points_at_fake(monkeypatch):
+    monkeypatch.setenv("OPENLIBRARY_BASE_URL", "http://127.0.0.1:8081/")
+    monkeypatch.setenv("OPENLIBRARY_RATE", "200")
+    client = OpenLibraryClient.from_env()
+    assert client.base_url == "http://127.0.0.1:8081" and client.covers_url == OpenLibraryClient.COVERS_URL
+    assert (client.scheduler.rate, client.scheduler.max_rate) == (200, 200)
+    monkeypatch.delenv("OPENLIBRARY_BASE_URL")
+    monkeypatch.delenv("OPENLIBRARY_RATE")
+    assert OpenLibraryClient.from_env().base_url == OpenLibraryClient.BASE_URL
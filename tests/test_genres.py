@@ -0,0 +1,147 @@
+import json
+import os
+
+from fastapi.testclient import TestClient
+
+from genres import GenreVocabulary, decode_records, encode_records, normalize
+from library import Book, Library
+from storage import JsonFileStorage, ShardedJsonStorage, storage_from_env
+
+
+def test_normalize_drops_noise_and_long_subjects():
+    assert normalize("  Turkish   fiction. ") == "Turkish fiction"
+    assert normalize("Accessible book") is None
+    assert normalize("nyt:hardcover-fiction=2008-05-04") is None
+    assert normalize("x" * 61) is None
+    assert normalize(42) is None
+
+
+def test_vocabulary_interns_and_caps_per_book():
+    vocab = GenreVocabulary(max_per_book=3)
+    first = vocab.clean(["Roman", "Türk edebiyatı", "roman", "Protected DAISY", "Aşk", "Tarih"])
+    assert first == ["Roman", "Türk edebiyatı", "Aşk"]
+    # Fazla türler sözlüğe de girmez; katlanmış eşleri ilk görülen adı paylaşır
+    assert len(vocab) == 3
+    second = vocab.clean(["TURK EDEBIYATI", "roman"])
+    assert second == ["Türk edebiyatı", "Roman"] and second[0] is first[1]
+
+    small = GenreVocabulary(max_size=1)
+    assert small.clean(["A", "B"]) == ["A"]
+
+
+def test_encode_decode_roundtrip_and_legacy_list():
+    records = [
+        {"isbn": "1", "genres": ["Roman", "Tarih"]},
+        {"isbn": "2", "genres": ["Tarih"]},
+        {"isbn": "3", "genres": []},
+    ]
+    encoded = encode_records(records)
+    assert encoded["genres"] == ["Roman", "Tarih"]
+    assert [b["genres"] for b in encoded["books"]] == [[0, 1], [1], []]
+    assert decode_records(json.loads(json.dumps(encoded))) == records
+    assert decode_records(records) == records
+    assert decode_records({"unexpected": True}) == []
+
+
+def test_compact_file_is_smaller_and_reads_back(tmp_path):
+    genres = ["Fiction", "Turkish fiction", "Historical fiction", "Love stories"]
+    data = [Book(f"Kitap {i}", "Yazar", str(i), genres=list(genres)).to_dict() for i in range(200)]
+    plain, compact = JsonFileStorage(str(tmp_path / "a.json")), JsonFileStorage(str(tmp_path / "b.json"), compact_genres=True)
+    plain.write(data)
+    compact.write(data)
+    assert os.path.getsize(compact.path) < os.path.getsize(plain.path) * 0.9
+    assert compact.read() == data
+    # Eski biçimdeki dosya sıkıştırmalı depolamayla da okunur
+    assert JsonFileStorage(plain.path, compact_genres=True).read() == data
+
+
+class StubClient:
+    def __init__(self, subjects):
+        self.subjects = subjects
+
+    def fetch_by_isbn(self, isbn):
+        return {"title": f"Kitap {isbn}", "authors": ["Yazar"], "subjects": self.subjects[isbn]}
+
+
+def test_library_cleans_fetched_genres_and_filters(tmp_path):
+    lib = Library(str(tmp_path / "lib.json"))
+    client = StubClient({"1": ["Turkish fiction", "Accessible book", "Love stories"], "2": ["turkish  FICTION."]})
+    lib.add_book_by_isbn("1", client)
+    lib.add_book_by_isbn("2", client)
+    lib.add_book(Book("Suç ve Ceza", "Dostoyevski", "3"))
+    assert lib.find_book("1").genres == ["Turkish fiction", "Love stories"]
+    assert lib.find_book("2").genres[0] is lib.find_book("1").genres[0]
+    assert [b.isbn for b in lib.books_by_genre("TURKISH fiction")] == ["1", "2"]
+    assert lib.books_by_genre("bilinmeyen") == []
+
+    lib.remove_book("1")
+    assert [b.isbn for b in lib.books_by_genre("turkish fiction")] == ["2"]
+    assert lib.books_by_genre("love stories") == []
+
+
+def test_stored_genres_are_not_truncated_on_load(tmp_path, monkeypatch):
+    monkeypatch.setenv("GENRES_MAX_VOCABULARY", "5")
+    genres = [f"Tür {i}" for i in range(27)] + ["x" * 80, "roman"]
+    JsonFileStorage(str(tmp_path / "lib.json")).write([Book("Çok türlü", "Yazar", "1", genres=genres).to_dict()])
+    lib = Library(str(tmp_path / "lib.json"))
+    assert lib.find_book("1").genres == genres
+    assert [b.isbn for b in lib.books_by_genre("TÜR 26")] == ["1"]
+
+    # İlgisiz bir ekleme kayıtlı türleri değiştirmez
+    lib.add_book(Book("Başka", "Yazar", "2", genres=["Roman"]))
+    assert Library(str(tmp_path / "lib.json")).find_book("1").genres == genres
+    assert [b.isbn for b in lib.books_by_genre("roman")] == ["1", "2"]
+
+
+def test_stored_spellings_count_as_one_genre_and_bad_entries_are_skipped(tmp_path):
+    records = [
+        Book("A", "Yazar", "1", genres=["Roman", "roman ", {"name": "bozuk"}, 5]).to_dict(),
+        Book("B", "Yazar", "2", genres=["  ROMAN", ["liste"]]).to_dict(),
+        Book("C", "Yazar", "3", genres=["Öykü"]).to_dict(),
+    ]
+    (tmp_path / "lib.json").write_text(json.dumps(records), encoding="utf-8")
+    lib = Library(str(tmp_path / "lib.json"))
+
+    stats = lib.stats()
+    assert stats["genres"] == 2
+    assert stats["top_genres"] == [{"name": "Roman", "count": 2}, {"name": "Öykü", "count": 1}]
+    assert [b.isbn for b in lib.books_by_genre("roman")] == ["1", "2"]
+    # Kayıtlı veri olduğu gibi kalır; silme sayaçları doğru düşürür
+    assert lib.find_book("1").genres[2] == {"name": "bozuk"}
+    lib.remove_book("1")
+    assert lib.stats()["top_genres"][0] == {"name": "Roman", "count": 1}
+
+    # Kompakt kayıt (STORAGE_COMPACT_GENRES) metin olmayan türleri tabloya almaz
+    assert encode_records(records)["genres"] == ["Roman", "roman ", "  ROMAN", "Öykü"]
+
+
+def test_list_endpoint_genre_filter(monkeypatch, tmp_path):
+    import api
+
+    lib = Library(str(tmp_path / "lib.json"))
+    lib.add_books([
+        Book("İnce Memed", "Yaşar Kemal", "1", genres=["Türk edebiyatı"]),
+        Book("Dune", "Frank Herbert", "2", genres=["Science fiction"]),
+    ])
+    monkeypatch.setattr(api, "lib", lib)
+    client = TestClient(api.app)
+
+    resp = client.get("/books", params={"genre": "turk edebiyati"})
+    assert resp.status_code == 200
+    assert [b["isbn"] for b in resp.json()] == ["1"]
+    assert len(client.get("/books").json()) == 2
+
+
+def test_sharded_storage_stores_genre_ids(monkeypatch, tmp_path):
+    directory = tmp_path / "shards"
+    lib = Library(storage=ShardedJsonStorage(str(directory), shards=2))
+    lib.add_books([Book(f"Kitap {i}", "Yazar", str(i), genres=["Roman", "Tarih"]) for i in range(10)])
+
+    for name in os.listdir(directory):
+        raw = json.loads((directory / name).read_text(encoding="utf-8"))
+        assert raw["genres"] == ["Roman", "Tarih"] and all(b["genres"] == [0, 1] for b in raw["books"])
+    reloaded = Library(storage=ShardedJsonStorage(str(directory), shards=2))
+    assert [b.genres for b in reloaded.list_books()] == [["Roman", "Tarih"]] * 10
+
+    monkeypatch.setenv("STORAGE_COMPACT_GENRES", "1")
+    assert storage_from_env(str(tmp_path / "library.json")).compact_genres
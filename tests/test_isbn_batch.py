@@ -0,0 +1,57 @@
+import httpx
+import pytest
+
+from isbn_batch import isbn10_to_isbn13_batch, isbn13_to_isbn10_batch, normalize_isbns, validate_isbns
+from open_library import OpenLibraryClient
+
+
+CODES = [
+    "978-975-314-134-5",  # geçerli ISBN-13
+    "9789753141346",      # kontrol hanesi hatalı
+    "0-19-953567-1",      # geçerli ISBN-10
+    "123456789x",         # geçerli ISBN-10 (X kontrol hanesi)
+    "12X4567890",         # X ortada olamaz
+    "9771234567898",      # ISSN (977) kitap değil
+    "abc",
+    "",
+    None,
+]
+
+
+def test_normalize_and_validate_batch_matches_scalar():
+    isbns, valid = normalize_isbns(CODES)
+    assert list(isbns) == ["9789753141345", "", "0199535671", "123456789X", "", "", "", "", ""]
+    assert list(valid) == [True, False, True, True, False, False, False, False, False]
+    assert list(validate_isbns(CODES)) == list(valid)
+
+    for code, ok in zip(CODES[:4], valid[:4]):
+        norm = OpenLibraryClient.normalize_isbn_or_barcode(code)
+        assert OpenLibraryClient.has_valid_checksum(norm) == bool(ok)
+
+
+def test_normalize_without_validation_keeps_shape_checks_only():
+    isbns, valid = normalize_isbns(["9789753141346", "12X4567890"], validate=False)
+    assert list(isbns) == ["9789753141346", ""]
+    assert list(valid) == [True, False]
+
+
+def test_isbn13_isbn10_round_trip():
+    isbn13 = ["9789753141345", "9780199535675", "9791234567896", "bad"]
+    isbn10 = isbn13_to_isbn10_batch(isbn13)
+    assert list(isbn10) == ["9753141343", "0199535671", "", ""]
+    assert list(isbn10)[:2] == [OpenLibraryClient.isbn13_to_isbn10(c) for c in isbn13[:2]]
+    assert list(isbn10_to_isbn13_batch(isbn10)) == ["9789753141345", "9780199535675", "", ""]
+
+
+def test_empty_batch():
+    isbns, valid = normalize_isbns([])
+    assert isbns.shape == (0,) and valid.shape == (0,)
+
+
+def test_fetch_rejects_bad_check_digit_without_network():
+    def no_network(request):
+        raise AssertionError("ağ çağrısı yapılmamalı")
+
+    client = OpenLibraryClient(transport=httpx.MockTransport(no_network))
+    with pytest.raises(ValueError, match="kontrol hanesi"):
+        client.fetch_by_isbn("9789753141346")
@@ -0,0 +1,108 @@
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from jobs import FAILED, SUCCEEDED, JobQueue, QueueFull
+from library import Book, Library
+from open_library import OpenLibraryClient
+
+
+def wait_done(job, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not job.done and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return job
+
+
+def test_queue_runs_jobs_and_reports_failures():
+    def handler(key):
+        if key == "bad":
+            raise ValueError("Kitap bulunamadı")
+        return key.upper()
+
+    q = JobQueue(handler, workers=2)
+    ok, bad = q.submit("abc"), q.submit("bad")
+    assert wait_done(ok).status == SUCCEEDED and ok.result == "ABC"
+    assert wait_done(bad).status == FAILED and bad.error == "Kitap bulunamadı"
+    assert q.get(ok.id) is ok and q.get("yok") is None
+    assert q.close(timeout=1)
+
+
+def test_bounded_queue_rejects_and_dedupes_active_keys():
+    release = threading.Event()
+    q = JobQueue(lambda key: release.wait(2), workers=1, max_pending=2)
+    first = q.submit("a")
+    while first.status != "running":
+        time.sleep(0.001)
+    # Çalışan iş kuyrukta yer tutmaz; iki iş bekleyebilir, üçüncüsü reddedilir
+    q.submit("b")
+    q.submit("c")
+    assert q.submit("b").key == "b" and len(q) == 2
+    with pytest.raises(QueueFull):
+        q.submit("d")
+
+    release.set()
+    assert q.close(timeout=2)
+    assert q.submit("a") is not first  # biten anahtar için yeni iş açılır
+    assert wait_done(q.submit("a")).status == SUCCEEDED
+    q.close(timeout=1)
+
+
+def test_finished_jobs_are_pruned():
+    q = JobQueue(lambda key: key, workers=1, keep=3)
+    done = [wait_done(q.submit(str(i))) for i in range(5)]
+    q.submit("son")
+    assert q.get(done[0].id) is None and q.get(done[-1].id) is done[-1]
+    q.close(timeout=1)
+
+
+class SlowClient:
+    def __init__(self):
+        self.release = threading.Event()
+
+    normalize_isbn_or_barcode = staticmethod(OpenLibraryClient.normalize_isbn_or_barcode)
+    has_valid_checksum = staticmethod(OpenLibraryClient.has_valid_checksum)
+
+    def fetch_by_isbn(self, isbn):
+        self.release.wait(2)
+        if isbn == "9780000000002":
+            raise ValueError("Kitap bulunamadı")
+        return {"title": "Kürk Mantolu Madonna", "authors": ["Sabahattin Ali"]}
+
+
+def test_async_create_returns_202_and_job_status(monkeypatch, tmp_path):
+    import api
+
+    lib = Library(str(tmp_path / "lib.json"))
+    lib.add_book(Book("Var", "Yazar", "9789750719387"))
+    slow = SlowClient()
+    monkeypatch.setattr(api, "lib", lib)
+    monkeypatch.setattr(api, "client", slow)
+    monkeypatch.setattr(api, "jobs", JobQueue(api._enrich, workers=1, max_pending=1))
+    client = TestClient(api.app)
+
+    # Upstream yanıt vermeden istek döner
+    resp = client.post("/books?async=true", json={"isbn": "978-605-360-942-1"})
+    assert resp.status_code == 202
+    job = resp.json()
+    assert job["isbn"] == "9786053609421" and resp.headers["location"] == f"/jobs/{job['id']}"
+    while api.jobs.get(job["id"]).status != "running":
+        time.sleep(0.001)
+    assert client.post("/books?async=true", json={"isbn": "9780000000002"}).status_code == 202
+    resp = client.post("/books?async=true", json={"isbn": "9780306406157"})
+    assert resp.status_code == 503 and resp.headers["retry-after"] == "1"
+
+    assert client.post("/books?async=true", json={"isbn": "9789750719387"}).status_code == 409
+    assert client.post("/books?async=true", json={"isbn": "9789750719388"}).status_code == 400
+    assert client.post("/books?async=true", json={"isbn": "abc"}).status_code == 400
+
+    slow.release.set()
+    assert api.jobs.close(timeout=2)
+    done = client.get(f"/jobs/{job['id']}").json()
+    assert done["status"] == "succeeded" and done["result"]["title"] == "Kürk Mantolu Madonna"
+    assert "9786053609421" in lib
+    failed = [j for j in api.jobs._jobs.values() if j.key == "9780000000002"][0]
+    assert client.get(f"/jobs/{failed.id}").json()["error"] == "Kitap bulunamadı"
+    assert client.get("/jobs/yok").status_code == 404
@@ -0,0 +1,95 @@
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import metrics
+from library import Book, Library
+from metrics import Registry
+from open_library import OpenLibraryClient
+from throttle import RequestScheduler
+
+
+def test_render_prometheus_text():
+    reg = Registry()
+    hits = reg.counter("cache_hits_total", "Önbellek isabetleri", ["kind"])
+    size = reg.gauge("queue_size", "Kuyruk")
+    latency = reg.histogram("op_seconds", "Süre", buckets=(0.1, 1.0))
+
+    hits.labels(kind='a"b').inc()
+    hits.labels("plain").inc(2)
+    size.set(3)
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+
+    text = reg.render()
+    assert "# TYPE cache_hits_total counter" in text
+    assert 'cache_hits_total{kind="a\\"b"} 1' in text
+    assert 'cache_hits_total{kind="plain"} 2' in text
+    assert "queue_size 3" in text
+    assert 'op_seconds_bucket{le="0.1"} 1' in text
+    assert 'op_seconds_bucket{le="1"} 2' in text
+    assert 'op_seconds_bucket{le="+Inf"} 3' in text
+    assert "op_seconds_count 3" in text
+    assert "op_seconds_sum 5.55" in text
+
+    with pytest.raises(ValueError):
+        hits.labels("x").inc(-1)
+    with pytest.raises(ValueError):
+        reg.gauge("cache_hits_total", "aynı ad, farklı tip")
+
+
+def test_library_storage_metrics(tmp_path):
+    saves = metrics.REGISTRY.get("library_storage_duration_seconds").labels("save")
+    written = metrics.REGISTRY.get("storage_bytes_written_total").labels("json")
+    before_saves, before_bytes = saves.count, written.value
+
+    lib = Library(str(tmp_path / "lib.json"))
+    lib.add_book(Book(title="Tutunamayanlar", author="Oğuz Atay", isbn="9789754700114"))
+
+    assert saves.count == before_saves + 1
+    assert written.value - before_bytes == (tmp_path / "lib.json").stat().st_size
+    assert metrics.REGISTRY.get("library_books").value == 1
+
+
+def test_openlibrary_metrics_count_responses_and_errors():
+    def handler(request):
+        if "/authors/" in request.url.path:
+            raise httpx.ConnectError("bağlantı yok", request=request)
+        return httpx.Response(200, json={"title": "Kitap", "authors": [{"key": "/authors/OL1A"}]})
+
+    scheduler = RequestScheduler(rate=1000, max_retries=0, sleep=lambda s: None)
+    client = OpenLibraryClient(scheduler=scheduler, transport=httpx.MockTransport(handler))
+    responses = metrics.REGISTRY.get("openlibrary_responses_total").labels("isbn", "200")
+    errors = metrics.REGISTRY.get("openlibrary_errors_total").labels("author", "ConnectError")
+    latency = metrics.REGISTRY.get("openlibrary_request_duration_seconds").labels("author")
+    before = (responses.value, errors.value, latency.count)
+
+    client.fetch_by_isbn("9789753141345")
+
+    assert (responses.value, errors.value, latency.count) == (before[0] + 1, before[1] + 1, before[2] + 1)
+
+
+def test_metrics_endpoint_reports_route_templates():
+    import api
+
+    client = TestClient(api.app)
+    client.get("/health")
+    client.delete("/books/0000000000")  # 404, şablon /books/{isbn}
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert 'http_request_duration_seconds_count{app="api",method="GET",route="/health",status="200"}' in resp.text
+    assert 'route="/books/{isbn}",status="404"' in resp.text
+    assert 'route="/metrics"' not in resp.text
+
+
+def test_rate_limit_rejections_are_counted():
+    import fastapi_main
+
+    rejections = metrics.REGISTRY.get("rate_limit_rejections_total").labels("strict_limited_endpoint")
+    before = rejections.value
+    client = TestClient(fastapi_main.app)
+    codes = [client.get("/limited-strict").status_code for _ in range(4)]
+    assert codes.count(429) >= 1
+    assert rejections.value - before == codes.count(429)
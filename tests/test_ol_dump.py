@@ -0,0 +1,77 @@
+import gzip
+import json
+
+import httpx
+import pytest
+
+from ol_dump import OfflineIndex, build_index
+from open_library import OpenLibraryClient
+
+
+AUTHORS = [
+    {"key": "/authors/OL1A", "name": "Burak Akkul"},
+    {"key": "/authors/OL2A", "name": "Eric Grzymkowski"},
+]
+EDITIONS = [
+    {
+        "key": "/books/OL1M",
+        "title": "Çok Gezenti - Boş Dünya",
+        "authors": [{"key": "/authors/OL1A"}],
+        "subjects": ["Seyahat", "Deneme"],
+        "isbn_13": ["978-975-314-134-5"],
+        "number_of_pages": 212,
+    },
+    {
+        "key": "/books/OL2M",
+        "title": "Sanat 101",
+        "authors": [{"key": "/authors/OL2A"}],
+        "isbn_10": ["6050204322"],
+        "isbn_13": ["9786050204322"],
+    },
+    {"key": "/books/OL3M", "title": "ISBN'siz kitap"},
+    {"key": "/books/OL4M", "title": "Yazarsız", "by_statement": "Kolektif", "isbn_10": ["975434196X"]},
+]
+
+
+def write_dump(path, record_type, records):
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for rec in records:
+            f.write(f"{record_type}\t{rec['key']}\t1\t2024-01-01T00:00:00\t{json.dumps(rec, ensure_ascii=False)}\n")
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    editions = tmp_path / "ol_dump_editions.txt.gz"
+    authors = tmp_path / "ol_dump_authors.txt.gz"
+    write_dump(editions, "/type/edition", EDITIONS)
+    write_dump(authors, "/type/author", AUTHORS)
+    out = tmp_path / "ol_index.sqlite"
+    stats = build_index(str(editions), str(out), authors_path=str(authors))
+    assert stats == {"authors": 2, "editions": 3, "isbns": 4}
+    return str(out)
+
+
+def test_lookup_resolves_authors_and_keeps_only_used_fields(index_path):
+    index = OfflineIndex(index_path)
+    rec = index.lookup("9789753141345")
+    assert rec["title"] == "Çok Gezenti - Boş Dünya"
+    assert rec["authors"] == ["Burak Akkul"]
+    assert rec["subjects"] == ["Seyahat", "Deneme"]
+    assert "number_of_pages" not in rec
+    # Aynı baskının ISBN-10'u da aynı kayda çıkar
+    assert index.lookup("605-020-432-2")["title"] == "Sanat 101"
+    # by_statement yazar yerine kullanılır
+    assert index.lookup("975434196x")["authors"] == ["Kolektif"]
+    assert index.lookup("9780000000000") is None
+
+
+def test_client_offline_mode_never_touches_network(index_path):
+    def no_network(request):
+        raise AssertionError("ağ çağrısı yapılmamalı")
+
+    client = OpenLibraryClient(
+        offline_index=index_path, offline_only=True, transport=httpx.MockTransport(no_network)
+    )
+    assert client.fetch_by_isbn("9786050204322")["authors"] == ["Eric Grzymkowski"]
+    with pytest.raises(ValueError):
+        client.fetch_by_isbn("9780000000002")
@@ -0,0 +1,131 @@
+import json
+import pstats
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from library import Book, Library
+from profiling import Profiler, ProfilingMiddleware
+
+
+def slow_spin(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def make_app(profiler, lib):
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, profiler=profiler)
+
+    @app.get("/fast")
+    def fast():
+        return {"ok": True}
+
+    @app.get("/slow")
+    def slow():
+        books = lib.list_books()
+        slow_spin(0.08)
+        return {"count": len(books)}
+
+    return app
+
+
+def test_only_slow_requests_are_dumped(tmp_path):
+    lib = Library(str(tmp_path / "lib.json"))
+    lib.add_book(Book(title="Saatleri Ayarlama Enstitüsü", author="Ahmet Hamdi Tanpınar", isbn="9789759955908"))
+    profiler = Profiler(enabled=True, threshold_ms=50, output_dir=str(tmp_path / "profiles"), interval_ms=2)
+    profiler.attach_library(lib)
+    client = TestClient(make_app(profiler, lib))
+    try:
+        assert client.get("/fast").status_code == 200
+        assert client.get("/slow", headers={"X-Request-ID": "abc"}).json() == {"count": 1}
+    finally:
+        profiler.disable()
+
+    files = sorted(p.name for p in (tmp_path / "profiles").iterdir())
+    assert len(files) == 3 and all("_GET_slow_" in f for f in files)
+    stem = tmp_path / "profiles" / files[0].rsplit(".", 1)[0]
+
+    meta = json.loads(stem.with_suffix(".json").read_text(encoding="utf-8"))
+    assert meta["path"] == "/slow" and meta["status"] == 200 and meta["request_id"] == "abc"
+    assert meta["duration_ms"] >= 50 and meta["samples"] > 0
+
+    folded = stem.with_suffix(".folded").read_text(encoding="utf-8")
+    assert "test_profiling.py:slow_spin" in folded
+
+    stats = pstats.Stats(str(stem.with_suffix(".prof")))
+    assert any(func[2] == "list_books" for func in stats.stats)
+
+
+def test_disabled_profiler_writes_nothing(tmp_path):
+    lib = Library(str(tmp_path / "lib.json"))
+    profiler = Profiler(enabled=False, threshold_ms=0, output_dir=str(tmp_path / "profiles"))
+    profiler.attach_library(lib)
+    client = TestClient(make_app(profiler, lib))
+    assert client.get("/slow").status_code == 200
+    assert not (tmp_path / "profiles").exists()
+
+
+def test_admin_endpoint_requires_token(monkeypatch, tmp_path):
+    import api
+
+    monkeypatch.setattr(api.profiler, "admin_token", "gizli")
+    monkeypatch.setattr(api.profiler, "output_dir", str(tmp_path))
+    client = TestClient(api.app)
+    assert client.get("/admin/profiling").status_code == 403
+    assert client.put("/admin/profiling", json={"enabled": True}, headers={"X-Admin-Token": "yanlis"}).status_code == 403
+
+    headers = {"X-Admin-Token": "gizli"}
+    try:
+        resp = client.put("/admin/profiling", json={"enabled": True, "threshold_ms": 1000, "mode": "sample"}, headers=headers)
+        assert resp.status_code == 200
+        assert resp.json()["enabled"] is True and resp.json()["mode"] == "sample"
+        assert client.put("/admin/profiling", json={"mode": "bilinmeyen"}, headers=headers).status_code == 400
+    finally:
+        client.put("/admin/profiling", json={"enabled": False, "mode": "both"}, headers=headers)
+    assert client.get("/admin/profiling", headers=headers).json()["enabled"] is False
+
+
+def test_concurrent_profiled_requests_keep_their_results(monkeypatch, tmp_path):
+    import threading
+
+    lib = Library(str(tmp_path / "lib.json"))
+    lib.add_book(Book(title="Tutunamayanlar", author="Oğuz Atay", isbn="9789754700114"))
+    both_inside = threading.Barrier(2, timeout=5)
+    original = Library.list_books
+
+    def list_books(self):
+        # İki istek aynı anda Library içinde: biri profillenir, diğeri profilsiz çalışır
+        both_inside.wait()
+        return original(self)
+
+    monkeypatch.setattr(Library, "list_books", list_books)
+    profiler = Profiler(enabled=True, threshold_ms=0, output_dir=str(tmp_path / "profiles"), mode="cprofile")
+    profiler.attach_library(lib)
+    client = TestClient(make_app(profiler, lib))
+    responses = []
+    threads = [threading.Thread(target=lambda: responses.append(client.get("/slow"))) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10)
+
+    assert [r.status_code for r in responses] == [200, 200]
+    assert all(r.json() == {"count": 1} for r in responses)
+    metas = [json.loads(p.read_text(encoding="utf-8")) for p in (tmp_path / "profiles").glob("*.json")]
+    assert len(metas) == 2 and profiler.dumps == 2
+    assert sorted(m.get("library_calls", 0) for m in metas) == [0, 1]
+    assert sorted(m.get("library_calls_skipped", 0) for m in metas) == [0, 1]
+
+
+def test_dump_limit_holds_under_concurrent_slow_requests(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    profiler = Profiler(threshold_ms=0, output_dir=str(tmp_path / "profiles"), mode="cprofile", max_dumps=3)
+    profiles = [profiler.begin() for _ in range(20)]
+    with ThreadPoolExecutor(8) as pool:
+        stems = list(pool.map(lambda p: profiler.end(p, {"path": "/x", "method": "GET"}), profiles))
+    assert profiler.dumps == 3 and len([s for s in stems if s]) == 3
+    assert len(list((tmp_path / "profiles").glob("*.json"))) == 3
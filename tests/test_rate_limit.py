@@ -0,0 +1,116 @@
+import asyncio
+import threading
+import uuid
+
+import pytest
+from fastapi import HTTPException, Request
+from fastapi.testclient import TestClient
+
+from rate_limit import MemoryBackend, RateLimiter, SharedMemoryBackend, parse_rate
+import fastapi_main
+
+
+def test_parse_rate():
+    assert parse_rate("5/minute").limit == 5
+    assert parse_rate("5/minute").period == 60
+    assert parse_rate("10 per second").period == 1
+    assert parse_rate("100/2hours").period == 7200
+    with pytest.raises(ValueError):
+        parse_rate("abc")
+
+
+def test_gcra_allows_burst_then_refills():
+    now = [1000.0]
+    limiter = RateLimiter(backend=MemoryBackend(), clock=lambda: now[0])
+    rate = parse_rate("5/minute")
+
+    results = [limiter.hit("k", rate) for _ in range(6)]
+    assert [r.allowed for r in results] == [True] * 5 + [False]
+    assert results[0].remaining == 4
+    assert results[-1].retry_after == pytest.approx(12.0)
+
+    # 12 saniyede bir token geri gelir
+    now[0] += 12
+    assert limiter.hit("k", rate).allowed
+    assert not limiter.hit("k", rate).allowed
+    # Farklı anahtarın kovası ayrıdır
+    assert limiter.hit("other", rate).allowed
+
+
+def test_shared_memory_backend_is_shared_between_instances():
+    name = "rl-test-" + uuid.uuid4().hex[:8]
+    a = SharedMemoryBackend(name=name, slots=64)
+    b = SharedMemoryBackend(name=name, slots=64)
+    try:
+        rate = parse_rate("2/minute")
+        assert a.update("k", rate, 0.0).allowed
+        assert b.update("k", rate, 0.0).allowed
+        assert not a.update("k", rate, 0.0).allowed
+        a.reset()
+        assert b.update("k", rate, 0.0).allowed
+    finally:
+        b.close()
+        a.close(unlink=True)
+
+
+def test_limited_endpoint_returns_429_per_client_key():
+    fastapi_main.limiter.backend.reset()
+    client = TestClient(fastapi_main.app)
+
+    codes = [client.get("/limited").status_code for _ in range(6)]
+    assert codes == [200] * 5 + [429]
+    resp = client.get("/limited")
+    assert int(resp.headers["Retry-After"]) >= 1
+
+    # API anahtarı ile gelen istemcinin kendi kovası vardır
+    resp = client.get("/limited", headers={"X-API-Key": fastapi_main.API_KEY})
+    assert resp.status_code == 200
+    # Diğer endpoint'lerin kotası etkilenmez
+    assert client.get("/books/").status_code == 200
+
+
+def test_key_limits_are_read_from_env(monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT_KEY_LIMITS", "ic=600/minute, a=b=10/second")
+    limiter = RateLimiter.from_env()
+    assert limiter.key_limits["ic"].limit == 600
+    assert limiter.key_limits["a=b"].period == 1
+    monkeypatch.setenv("RATE_LIMIT_KEY_LIMITS", "eksik")
+    with pytest.raises(ValueError):
+        RateLimiter.from_env()
+
+
+def test_blocking_backend_is_called_off_the_event_loop():
+    class SlowBackend(MemoryBackend):
+        blocking = True
+        threads = []
+
+        def update(self, key, rate, now):
+            self.threads.append(threading.get_ident())
+            return super().update(key, rate, now)
+
+    limiter = RateLimiter(backend=SlowBackend())
+
+    @limiter.limit("1/minute")
+    async def endpoint(request: Request):
+        return threading.get_ident()
+
+    request = Request({"type": "http", "headers": [], "client": ("10.0.0.1", 1)})
+    loop_thread = asyncio.run(endpoint(request=request))
+    assert SlowBackend.threads and SlowBackend.threads[0] != loop_thread
+    with pytest.raises(HTTPException):
+        asyncio.run(endpoint(request=request))
+
+
+def test_memory_backend_evicts_least_recently_updated_keys_in_batches():
+    backend = MemoryBackend(max_keys=100)
+    rate = parse_rate("1/minute")
+    assert backend.update("sabit", rate, 0.0).allowed
+    for i in range(100):
+        backend.update(f"k{i}", rate, 1.0 + i)
+        if i == 50:
+            # Reddedilen istek de anahtarı sona taşır; durumu korunur
+            assert not backend.update("sabit", rate, 30.0).allowed
+    # 101. anahtar sınırı aştı: en eski 10 anahtar tek seferde atıldı
+    assert len(backend._tats) == 91
+    assert "k0" not in backend._tats and "k9" not in backend._tats and "k10" in backend._tats
+    assert "sabit" in backend._tats and not backend.update("sabit", rate, 59.0).allowed
@@ -0,0 +1,96 @@
+import io
+import json
+import threading
+
+import main
+from library import Book, Library
+from refresher import Refresher
+
+
+class StubClient:
+    def __init__(self, missing=(), gate=None):
+        self.missing = set(missing)
+        self.gate = gate
+        self.calls = []
+
+    def fetch_by_isbn(self, isbn):
+        self.calls.append(isbn)
+        if self.gate is not None:
+            self.gate.wait(2)
+        if isbn in self.missing:
+            raise ValueError("Kitap bulunamadı")
+        return {"title": f"Yeni {isbn}", "authors": ["Yazar"], "subjects": ["Roman", "Accessible book"]}
+
+
+def make_lib(tmp_path):
+    lib = Library(str(tmp_path / "lib.json"))
+    lib.add_books([
+        Book("Eksik", "Unknown", "1"),
+        Book("Türsüz", "Yazar", "2", created_at="2024-01-01T00:00:00+00:00"),
+        Book("Tam", "Yazar", "3", created_at="2024-01-01T00:00:00+00:00", genres=["Tarih"],
+             updated_at="2999-01-01T00:00:00+00:00"),
+        Book("Yok", "Yazar", "4"),
+    ])
+    return lib
+
+
+def test_refresh_backfills_incomplete_books_in_batches(tmp_path, monkeypatch):
+    lib = make_lib(tmp_path)
+    saves = []
+    monkeypatch.setattr(Library, "save_books", lambda self, _orig=Library.save_books: (saves.append(1), _orig(self)))
+    client = StubClient(missing={"4"})
+    refresher = Refresher(lib, client, rate=0, batch_size=2)
+
+    old = lib.find_book("2")
+    stats = refresher.run_once()
+    assert client.calls == ["1", "2", "4"]
+    assert (stats.checked, stats.updated, stats.not_found) == (3, 2, 1)
+    assert len(saves) == 1  # iki sonuç tek partide yazılır
+
+    book = lib.find_book("1")
+    assert book.author == "Yazar" and book.genres == ["Roman"] and book.created_at and book.updated_at
+    # Eski nesne değiştirilmez; eklenme zamanı korunur, sıra aynı kalır
+    assert old.genres == [] and lib.find_book("2").created_at == "2024-01-01T00:00:00+00:00"
+    assert [b.isbn for b in lib.list_books()] == ["1", "2", "3", "4"]
+    assert [b.isbn for b in lib.books_by_genre("roman")] == ["1", "2"]
+
+    # Yenilenenler ve yakın zamanda bulunamayanlar tekrar sorgulanmaz
+    assert refresher.run_once().checked == 0
+    reloaded = Library(str(tmp_path / "lib.json"))
+    assert reloaded.find_book("1").updated_at == book.updated_at
+
+
+def test_max_age_and_limit(tmp_path):
+    lib = make_lib(tmp_path)
+    refresher = Refresher(lib, StubClient(), rate=0, max_age=0)
+    assert [b.isbn for b in refresher.stale_books()] == ["1", "2", "4"]
+    refresher.max_age = 1
+    assert [b.isbn for b in refresher.stale_books()] == ["1", "2", "4"]
+    lib.add_book(Book("Eski", "Yazar", "5", created_at="2024-01-01", genres=["Tarih"], updated_at="2020-01-01T00:00:00"))
+    assert "5" in [b.isbn for b in refresher.stale_books()]
+    assert refresher.run_once(limit=1).checked == 1
+
+
+def test_reads_are_served_and_removals_win_during_refresh(tmp_path):
+    lib = make_lib(tmp_path)
+    gate = threading.Event()
+    client = StubClient(gate=gate)
+    refresher = Refresher(lib, client, rate=0, batch_size=10)
+    worker = threading.Thread(target=refresher.run_once)
+    worker.start()
+    while not client.calls:
+        pass
+    # Yenileme upstream'i beklerken okumalar mevcut veriden döner, silme beklemez
+    assert lib.find_book("1").title == "Eksik"
+    assert lib.remove_book("2")
+    gate.set()
+    worker.join(2)
+    assert lib.find_book("1").title == "Yeni 1" and lib.find_book("2") is None
+
+
+def test_cli_refresh(tmp_path):
+    Library(str(tmp_path / "lib.json")).add_book(Book("Eksik", "Unknown", "1"))
+    out = io.StringIO()
+    code = main.main(["--storage", str(tmp_path / "lib.json"), "refresh", "--rate", "0"], client=StubClient(), stdout=out)
+    assert code == 0
+    assert json.loads(out.getvalue()) == {"checked": 1, "updated": 1, "not_found": 0, "errors": 0}
@@ -0,0 +1,63 @@
+import pytest
+
+import run_api
+from library import Book, Library
+
+
+def config(*argv):
+    return run_api.server_config(run_api.build_parser().parse_args(list(argv)))
+
+
+def test_dev_mode_keeps_reload():
+    cfg = config()
+    assert cfg["reload"] is True and "workers" not in cfg
+    assert cfg["port"] == 8000 and cfg["timeout_keep_alive"] == 5
+
+
+def test_prod_mode_uses_workers_and_fast_loop(monkeypatch):
+    monkeypatch.setattr(run_api, "_available", lambda module: True)
+    cfg = config("--prod", "--workers", "4", "--keep-alive", "30", "--backlog", "4096", "--graceful-timeout", "10")
+    assert cfg["reload"] is False and cfg["workers"] == 4
+    assert (cfg["loop"], cfg["http"]) == ("uvloop", "httptools")
+    assert (cfg["timeout_keep_alive"], cfg["backlog"], cfg["timeout_graceful_shutdown"]) == (30, 4096, 10)
+    assert cfg["access_log"] is False
+
+    monkeypatch.setattr(run_api, "_available", lambda module: False)
+    assert (config("--prod")["loop"], config("--prod")["http"]) == ("asyncio", "h11")
+
+
+def test_prod_mode_from_env(monkeypatch):
+    monkeypatch.setenv("API_ENV", "production")
+    monkeypatch.setenv("WEB_CONCURRENCY", "3")
+    assert config()["workers"] == 3
+
+
+def test_main_runs_uvicorn_without_browser_in_prod(monkeypatch):
+    calls = []
+    monkeypatch.setattr(run_api.uvicorn, "run", lambda app, **kw: calls.append((app, kw)))
+    monkeypatch.setattr(run_api.threading, "Thread", lambda *a, **kw: (_ for _ in ()).throw(AssertionError("tarayıcı açılmamalı")))
+    # setenv + delenv: testten sonra değişken yine tanımsız olsun
+    monkeypatch.setenv("API_PRELOAD", "")
+    monkeypatch.delenv("API_PRELOAD")
+    run_api.main(["--prod", "--app", "api:app", "--port", "9000"])
+    assert calls[0][0] == "api:app" and calls[0][1]["port"] == 9000
+    assert run_api.os.environ["API_PRELOAD"] == "1"
+
+
+def test_api_app_refuses_multiple_workers(monkeypatch, capsys):
+    monkeypatch.setattr(run_api.uvicorn, "run", lambda app, **kw: (_ for _ in ()).throw(AssertionError("başlamamalı")))
+    with pytest.raises(SystemExit):
+        run_api.main(["--prod", "--app", "api:app", "--workers", "2"])
+    assert "library.json" in capsys.readouterr().err
+
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    with pytest.raises(SystemExit):
+        run_api.main(["--prod", "--app", "api:app"])
+
+
+def test_library_preload_builds_indexes(tmp_path):
+    lib = Library(str(tmp_path / "lib.json"))
+    lib.add_book(Book("Tutunamayanlar", "Oğuz Atay", "1"))
+    lib.preload()
+    assert lib._text_index is not None and lib._prefix_index is not None
+    assert lib.autocomplete("tutu")[0]["text"] == "Tutunamayanlar"
@@ -0,0 +1,72 @@
+from barcode_scanner import ScanResult
+from library import Book, Library
+from scan_session import ScanSession
+
+
+ISBN = "9789753141345"
+OTHER = "9780140328721"
+
+
+def make_session(known=(), **kwargs):
+    dispatched = []
+    session = ScanSession(set(known), dispatched.append, **kwargs)
+    return session, dispatched
+
+
+def test_code_is_dispatched_once_after_confirm_frames():
+    session, dispatched = make_session(confirm_frames=3, cooldown=5.0)
+    for i in range(30):
+        session.feed([ISBN], now=i * 0.05)
+    assert dispatched == [ISBN]
+    assert session.stats.frames == 30
+    assert session.stats.dispatched == 1
+
+
+def test_several_codes_in_one_frame_are_all_dispatched():
+    session, dispatched = make_session(confirm_frames=3)
+    results = [session.feed([ISBN, OTHER], now=i * 0.05) for i in range(3)]
+    assert results[:2] == [[], []] and results[2] == [ISBN, OTHER]
+    assert dispatched == [ISBN, OTHER]
+    assert session.stats.dispatched == 2
+
+
+def test_gap_resets_consecutive_count():
+    session, dispatched = make_session(confirm_frames=3, max_gap=0.5)
+    session.feed([ISBN], now=0.0)
+    session.feed([ISBN], now=0.1)
+    session.feed([ISBN], now=1.0)  # boşluk çok uzun, sayaç sıfırlanır
+    assert dispatched == []
+    session.feed([ISBN], now=1.1)
+    session.feed([ISBN], now=1.2)
+    assert dispatched == [ISBN]
+
+
+def test_invalid_and_known_codes_are_not_dispatched():
+    known_hits = []
+    session, dispatched = make_session(known=[OTHER], confirm_frames=1, on_known=known_hits.append)
+    session.feed(["9789753141346"], now=0.0)  # kontrol hanesi hatalı
+    session.feed(["not-a-code"], now=0.0)
+    session.feed([OTHER], now=0.0)
+    assert dispatched == []
+    assert known_hits == [OTHER]
+    assert session.stats.invalid == 2
+
+
+def test_forget_allows_redispatch_after_failure():
+    session, dispatched = make_session(confirm_frames=1, cooldown=5.0)
+    session.feed([ISBN], now=0.0)
+    session.feed([ISBN], now=10.0)  # bekleme bitti ama oturumda zaten gönderildi
+    assert dispatched == [ISBN]
+    session.forget(ISBN)
+    session.feed([ISBN], now=10.1)
+    assert dispatched == [ISBN, ISBN]
+
+
+def test_library_isbns_view_tracks_additions(tmp_path):
+    lib = Library(str(tmp_path / "lib.json"))
+    dispatched = []
+    session = ScanSession(lib.isbns(), dispatched.append, confirm_frames=1, cooldown=0.0)
+    lib.add_book(Book(title="Kürk Mantolu Madonna", author="Sabahattin Ali", isbn=OTHER))
+    session.feed([OTHER], now=0.0)
+    session.on_scan_result(ScanResult(ISBN, "EAN13", (0, 0, 1, 1), 0, 1.0))
+    assert dispatched == [ISBN]
@@ -0,0 +1,73 @@
+import json
+import os
+
+from library import Book, Library
+from storage import ShardedJsonStorage, WriteBehindStorage, storage_from_env
+
+
+def books(n, start=0):
+    return [Book(f"Kitap {i}", "Yazar", f"isbn-{i}") for i in range(start, start + n)]
+
+
+def test_roundtrip_keeps_order_and_rewrites_only_touched_shard(tmp_path):
+    storage = ShardedJsonStorage(str(tmp_path / "shards"), shards=8)
+    lib = Library(storage=storage)
+    lib.add_books(books(50))
+    assert len(os.listdir(tmp_path / "shards")) == 8
+    written = storage.shards_written
+
+    lib.add_book(Book("Yeni", "Yazar", "new"))
+    lib.remove_book("isbn-7")
+    assert storage.shards_written == written + 2
+
+    reloaded = Library(storage=ShardedJsonStorage(str(tmp_path / "shards"), shards=8, executor="thread"))
+    assert [b.isbn for b in reloaded.list_books()] == [b.isbn for b in lib.list_books()]
+
+
+def test_full_write_skips_unchanged_shards(tmp_path):
+    storage = ShardedJsonStorage(str(tmp_path), shards=4)
+    data = [b.to_dict() for b in books(20)]
+    storage.write(data)
+    assert storage.shards_written == 4
+    storage.write(data + [Book("X", "Y", "x").to_dict()])
+    assert storage.shards_written == 5
+
+
+def test_reshard_and_seed_from_single_file(tmp_path):
+    seed = tmp_path / "library.json"
+    seed.write_text(json.dumps([b.to_dict() for b in books(30)]), encoding="utf-8")
+    directory = str(tmp_path / "library_shards")
+
+    lib = Library(storage=ShardedJsonStorage(directory, shards=8, seed_path=str(seed)))
+    assert len(lib) == 30
+    lib.add_book(Book("X", "Y", "x"))
+
+    # Parça sayısı değişince eski dosyalar okunur ve ilk yazmada yenileriyle değiştirilir
+    lib = Library(storage=ShardedJsonStorage(directory, shards=3, executor="process", max_workers=2))
+    assert len(lib) == 31
+    lib.remove_book("x")
+    assert sorted(os.listdir(directory)) == ["0000-of-0003.json", "0001-of-0003.json", "0002-of-0003.json"]
+    assert [b.isbn for b in Library(storage=ShardedJsonStorage(directory, shards=3)).list_books()] == [
+        f"isbn-{i}" for i in range(30)
+    ]
+
+
+def test_write_behind_merges_changes_for_sharded_storage(tmp_path):
+    ShardedJsonStorage(str(tmp_path), shards=4).write([b.to_dict() for b in books(40)])
+    sharded = ShardedJsonStorage(str(tmp_path), shards=4)
+    lib = Library(storage=WriteBehindStorage(sharded, window=60))
+    lib.remove_book("isbn-3")
+    lib.add_book(Book("X", "Y", "x"))
+    lib.close()
+    # İki değişiklik tek yazmada birleşir ve yalnızca ilgili parçalar yazılır
+    assert sharded.shards_written == len({sharded.shard_of("isbn-3"), sharded.shard_of("x")})
+
+    reloaded = Library(storage=ShardedJsonStorage(str(tmp_path), shards=4))
+    assert [b.isbn for b in reloaded.list_books()] == [b.isbn for b in lib.list_books()]
+
+
+def test_storage_from_env_shards(monkeypatch, tmp_path):
+    monkeypatch.setenv("STORAGE_SHARDS", "4")
+    storage = storage_from_env(str(tmp_path / "library.json"))
+    assert isinstance(storage, ShardedJsonStorage)
+    assert storage.directory == str(tmp_path / "library_shards") and storage.shards == 4
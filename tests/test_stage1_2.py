@@ -42,3 +42,19 @@ def test_bulk_remove(tmp_path):
     assert lib.find_book("2") is not None
 
 
+
+
+def test_bulk_add_reports_isbns_added_concurrently(tmp_path):
+    lib = Library(storage_path=str(tmp_path / "library.json"))
+
+    class RacingClient:
+        def fetch_by_isbn(self, isbn):
+            if isbn == "2":
+                # Sorgu sürerken başka bir istek aynı kitabı ekler
+                lib.add_book(Book(title="Önce gelen", author="X", isbn="2"))
+            return {"title": f"Kitap {isbn}", "authors": ["Yazar"]}
+
+    added, failed = lib.add_books_by_isbn(["1", "2"], RacingClient())
+    assert [b.isbn for b in added] == ["1"]
+    assert failed == {"2": "Book with ISBN 2 already exists"}
+    assert lib.find_book("2").title == "Önce gelen"
@@ -0,0 +1,26 @@
+import json
+import os
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def loaded_modules(code, tmp_path):
+    probe = code + "; import json, sys; print(json.dumps(sorted(sys.modules)))"
+    env = dict(os.environ, PYTHONPATH=BASE_DIR)
+    out = subprocess.run([sys.executable, "-c", probe], cwd=tmp_path, env=env, check=True, capture_output=True, text=True)
+    return set(json.loads(out.stdout.strip().splitlines()[-1]))
+
+
+def test_entry_points_do_not_import_heavy_dependencies(tmp_path):
+    modules = loaded_modules("import main, api, barcode_scanner, scan_session", tmp_path)
+    assert not {"httpx", "cv2", "pyzbar"} & modules
+
+
+def test_client_and_scanner_load_dependencies_on_use(tmp_path):
+    code = (
+        "import barcode_scanner, numpy as np; barcode_scanner.TrackingDecoder(decoder=lambda f: [])(np.zeros((4, 4, 3), np.uint8));"
+        "from open_library import OpenLibraryClient; OpenLibraryClient()._client()"
+    )
+    assert {"httpx", "cv2"} <= loaded_modules(code, tmp_path)
@@ -0,0 +1,127 @@
+from fastapi.testclient import TestClient
+
+from library import Book, Library
+from text_search import PrefixIndex, TrigramIndex, fold
+
+
+def test_fold_turkish_and_diacritics():
+    assert fold("ÇOK İYİ") == "cok iyi"
+    assert fold("IŞIK") == "isik"
+    assert fold("Suç ve Ceza!") == "suc ve ceza"
+    assert fold("Crème Brûlée") == "creme brulee"
+
+
+def test_index_ranks_typos_and_tracks_removals():
+    index = TrigramIndex()
+    index.add("a", "Çok Gezenti Evliya Çelebi")
+    index.add("b", "Suç ve Ceza Fyodor Dostoyevski")
+    index.add("c", "Çalıkuşu Reşat Nuri Güntekin")
+
+    assert index.search("cok gezneti")[0][0] == "a"
+    assert index.search("dostoyevsky")[0][0] == "b"
+    assert index.search("CALIKUSU")[0] == ("c", 1.0)
+    assert index.search("zzzz") == []
+
+    index.remove("a")
+    assert all(key != "a" for key, _ in index.search("cok gezenti", min_score=0.1))
+    index.add("b", "Tutunamayanlar Oğuz Atay")
+    assert index.search("dostoyevski") == []
+    assert index.search("tutunamayanlar")[0][0] == "b"
+    assert len(index) == 2
+
+
+def test_index_compacts_after_many_removals():
+    index = TrigramIndex()
+    for i in range(3000):
+        index.add(i, f"kitap {i}")
+    for i in range(2500):
+        index.remove(i)
+    assert len(index) == 500 and len(index._keys) <= 2 * len(index)
+    assert index.search("kitap 2999", limit=1) == [(2999, 1.0)]
+
+
+def test_library_fuzzy_search_follows_changes(tmp_path):
+    lib = Library(str(tmp_path / "lib.json"))
+    lib.add_books([
+        Book("Kürk Mantolu Madonna", "Sabahattin Ali", "1"),
+        Book("İnce Memed", "Yaşar Kemal", "2"),
+    ])
+    hits = lib.fuzzy_search("sabahatin ali")
+    assert [b.isbn for b, _ in hits] == ["1"]
+
+    # İndeks kurulduktan sonraki ekleme/silmeler de görünür
+    lib.add_book(Book("Madonna ve Ben", "Anonim", "3"))
+    assert {b.isbn for b, _ in lib.fuzzy_search("madona", min_score=0.4)} == {"1", "3"}
+    lib.remove_book("1")
+    assert [b.isbn for b, _ in lib.fuzzy_search("ince memet")] == ["2"]
+
+
+def test_search_endpoint(monkeypatch, tmp_path):
+    import api
+
+    lib = Library(str(tmp_path / "lib.json"))
+    lib.add_book(Book("Çalıkuşu", "Reşat Nuri Güntekin", "1"))
+    monkeypatch.setattr(api, "lib", lib)
+    client = TestClient(api.app)
+
+    resp = client.get("/books/search", params={"q": "calikusu resat"})
+    assert resp.status_code == 200
+    assert resp.json()[0]["isbn"] == "1" and resp.json()[0]["score"] == 1.0
+    assert client.get("/books/search").status_code == 422
+
+
+def test_prefix_index_completes_word_starts_and_counts():
+    index = PrefixIndex()
+    index.bulk_load(["Oğuz Atay", "Orhan Pamuk", "Oğuz Atay"])
+    index.add("Orhan Kemal")
+
+    assert index.complete("og") == [("Oğuz Atay", 2)]
+    assert index.complete("ORHAN") == [("Orhan Kemal", 1), ("Orhan Pamuk", 1)]
+    assert index.complete("atay") == [("Oğuz Atay", 2)]
+    assert index.complete("o", limit=2) == [("Oğuz Atay", 2), ("Orhan Kemal", 1)]
+
+    index.remove("Oğuz Atay")
+    assert index.complete("og") == [("Oğuz Atay", 1)]
+    index.remove("Oğuz Atay")
+    assert index.complete("og") == [] and index.complete("atay") == []
+    assert len(index) == 2
+
+
+def test_completions_are_ranked_not_alphabetical():
+    index = PrefixIndex()
+    # Alfabetik sırada önde gelen az kitaplı yazarlar popüler olanı kesmemeli
+    index.bulk_load([f"Sabahattin A{i:02d}" for i in range(20)] + ["Sait Faik"] * 5 + ["Ali Sait"] * 9)
+    assert index.complete("sa", limit=2) == [("Sait Faik", 5), ("Sabahattin A00", 1)]
+    # Kelime içi eşleşme, çok kitaplı olsa da metnin başıyla eşleşmenin ardından gelir
+    assert index.complete("sait", limit=3) == [("Sait Faik", 5), ("Ali Sait", 9)]
+
+
+def test_library_autocomplete_follows_changes(tmp_path):
+    lib = Library(str(tmp_path / "lib.json"))
+    lib.add_books([
+        Book("Tutunamayanlar", "Oğuz Atay", "1"),
+        Book("Tehlikeli Oyunlar", "Oğuz Atay", "2"),
+    ])
+    assert lib.autocomplete("tu") == [{"text": "Tutunamayanlar", "field": "title", "count": 1}]
+    assert lib.autocomplete("o", field="author") == [{"text": "Oğuz Atay", "field": "author", "count": 2}]
+
+    lib.add_book(Book("Saatleri Ayarlama Enstitüsü", "Ahmet Hamdi Tanpınar, Oğuz Atay", "3"))
+    assert [h["text"] for h in lib.autocomplete("a")] == ["Ahmet Hamdi Tanpınar", "Oğuz Atay", "Saatleri Ayarlama Enstitüsü"]
+    lib.remove_book("1")
+    assert lib.autocomplete("tu") == []
+    assert lib.autocomplete("oyun") == [{"text": "Tehlikeli Oyunlar", "field": "title", "count": 1}]
+
+
+def test_autocomplete_endpoint(monkeypatch, tmp_path):
+    import api
+
+    lib = Library(str(tmp_path / "lib.json"))
+    lib.add_book(Book("İnce Memed", "Yaşar Kemal", "1"))
+    monkeypatch.setattr(api, "lib", lib)
+    client = TestClient(api.app)
+
+    resp = client.get("/books/autocomplete", params={"prefix": "ince"})
+    assert resp.status_code == 200
+    assert resp.json() == [{"text": "İnce Memed", "field": "title", "count": 1}]
+    assert client.get("/books/autocomplete", params={"prefix": "ya", "field": "author"}).json()[0]["text"] == "Yaşar Kemal"
+    assert client.get("/books/autocomplete", params={"prefix": "ya", "field": "isbn"}).status_code == 422
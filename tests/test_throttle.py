@@ -0,0 +1,137 @@
+import httpx
+import pytest
+
+from open_library import OpenLibraryClient
+from throttle import CircuitBreaker, CircuitOpenError, RequestScheduler, parse_retry_after
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def make_scheduler(clock, **kwargs):
+    kwargs.setdefault("breaker", CircuitBreaker(failure_threshold=3, reset_timeout=10, clock=clock))
+    return RequestScheduler(clock=clock, sleep=clock.sleep, **kwargs)
+
+
+def make_client(handler, scheduler):
+    return OpenLibraryClient(scheduler=scheduler, transport=httpx.MockTransport(handler))
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:10 GMT", now=1445412480.0) == pytest.approx(10.0)
+    assert parse_retry_after("garbage") is None
+    assert parse_retry_after(None) is None
+
+
+def test_rate_budget_spaces_requests():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, rate=2.0, rate_step=0.0, rate_growth=0.0)
+    for _ in range(3):
+        scheduler.execute(lambda: httpx.Response(200))
+    assert clock.now == pytest.approx(1.0)
+
+
+def test_retry_after_is_honoured_and_rate_halved():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, rate=4.0, rate_step=0.0, rate_growth=0.0)
+    calls = []
+
+    def handler(request):
+        calls.append(clock.now)
+        if len(calls) == 1:
+            return httpx.Response(429, headers={"Retry-After": "5"})
+        return httpx.Response(200, json={"title": "Kitap", "authors": [{"name": "Yazar"}]})
+
+    data = make_client(handler, scheduler).fetch_by_isbn("9789753141345")
+    assert data["title"] == "Kitap"
+    assert data["authors"] == ["Yazar"]
+    assert calls[1] - calls[0] >= 5
+    assert scheduler.rate == 2.0
+
+
+def test_concurrent_throttles_halve_once_and_recovery_is_proportional():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, rate=16.0, max_rate=16.0, rate_step=0.1, rate_growth=0.1)
+    # Aynı pencerede gönderilmiş dört isteğin 429'u: yalnızca ilki hızı düşürür
+    sent = clock.now
+    clock.now += 1
+    for _ in range(4):
+        scheduler._on_throttled(sent)
+    assert scheduler.rate == 8.0
+    # Düşüşten sonra gönderilen isteğin 429'u yeni bir aşırı yük demektir
+    scheduler._on_throttled(clock.now + 0.1)
+    assert scheduler.rate == 4.0
+
+    scheduler.rate = scheduler.min_rate
+    successes = 0
+    while scheduler.rate < 16.0:
+        scheduler._on_success()
+        successes += 1
+    # Sabit +0.1 adımla ~155 başarı gerekirdi
+    assert successes < 50
+
+
+def test_network_errors_are_retried_then_reported():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, max_retries=2)
+    attempts = []
+
+    def handler(request):
+        attempts.append(1)
+        raise httpx.ConnectError("boom", request=request)
+
+    with pytest.raises(RuntimeError, match="Ağ hatası"):
+        make_client(handler, scheduler).fetch_by_isbn("9789753141345")
+    assert len(attempts) == 3
+
+
+def test_circuit_opens_after_consecutive_failures():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, max_retries=0)
+    hits = []
+
+    def handler(request):
+        hits.append(1)
+        return httpx.Response(503)
+
+    client = make_client(handler, scheduler)
+    for _ in range(3):
+        with pytest.raises(httpx.HTTPStatusError):
+            client.fetch_by_isbn("9789753141345")
+    with pytest.raises(CircuitOpenError):
+        client.fetch_by_isbn("9789753141345")
+    assert len(hits) == 3
+
+    # reset_timeout sonrası tek deneme isteğine izin verilir
+    clock.now += 10
+    assert scheduler.breaker.state == "half-open"
+
+
+def test_unexpected_error_in_half_open_trial_releases_the_breaker():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    scheduler = make_scheduler(clock, breaker=breaker, max_retries=0)
+    breaker.record_failure()
+    clock.now += 10
+
+    def broken():
+        raise KeyError("beklenmeyen")
+
+    with pytest.raises(KeyError):
+        scheduler.execute(broken)
+    # Deneme başarısız sayıldı: devre yeniden açık, ama sonsuza dek değil
+    assert breaker.state == "open"
+    clock.now += 10
+    assert scheduler.execute(lambda: httpx.Response(200)).status_code == 200
+    assert breaker.state == "closed"
@@ -0,0 +1,94 @@
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import tracing
+from library import Library
+from open_library import OpenLibraryClient
+from throttle import RequestScheduler
+
+
+@pytest.fixture
+def trace_file(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracing.configure([tracing.JsonLinesExporter(str(path))])
+    yield path
+    tracing.configure(None)
+
+
+def read_spans(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_nested_spans_share_trace_and_record_errors(trace_file):
+    with tracing.span("outer", kind="test"):
+        with tracing.span("inner"):
+            pass
+        with pytest.raises(KeyError):
+            with tracing.span("failing"):
+                raise KeyError("x")
+
+    spans = {s["name"]: s for s in read_spans(trace_file)}
+    assert len({s["trace_id"] for s in spans.values()}) == 1
+    assert spans["outer"]["parent_id"] is None
+    assert spans["inner"]["parent_id"] == spans["outer"]["span_id"]
+    assert spans["failing"]["status"] == "error" and "KeyError" in spans["failing"]["error"]
+    assert spans["outer"]["duration_ms"] >= spans["inner"]["duration_ms"]
+
+
+def test_disabled_tracer_is_a_noop(tmp_path):
+    tracing.configure(None)
+    with tracing.span("nothing") as s:
+        s.set("k", "v")
+    assert tracing.current_span() is None
+
+
+def test_post_books_is_traced_end_to_end(trace_file, tmp_path, monkeypatch):
+    import api
+
+    def handler(request):
+        if request.url.path.startswith("/authors/"):
+            return httpx.Response(200, json={"name": "Yaşar Kemal"})
+        return httpx.Response(200, json={"title": "İnce Memed", "authors": [{"key": "/authors/OL1A"}]})
+
+    scheduler = RequestScheduler(rate=1000, max_retries=0, sleep=lambda s: None)
+    monkeypatch.setattr(api, "client", OpenLibraryClient(scheduler=scheduler, transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(api, "lib", Library(str(tmp_path / "lib.json")))
+
+    resp = TestClient(api.app).post("/books", json={"isbn": "9789750807145"}, headers={"X-Request-ID": "istek-1"})
+    assert resp.status_code == 201
+    assert resp.headers["x-request-id"] == "istek-1"
+
+    root = read_spans(trace_file)[-1]
+    assert root["name"] == "POST /books" and root["attributes"]["status"] == 201
+    # Library kurulumundaki load_books isteğin dışında, ayrı bir iz
+    spans = [s for s in read_spans(trace_file) if s["trace_id"] == root["trace_id"]]
+    names = [s["name"] for s in spans]
+    for expected in ("POST /books", "library.add_book_by_isbn", "openlibrary.fetch_by_isbn",
+                     "openlibrary.get", "library.save_books", "storage.write"):
+        assert expected in names
+    assert names.count("openlibrary.get") == 2  # edition + yazar
+    assert all(s["attributes"]["request_id"] == "istek-1" for s in spans)
+
+
+def test_request_id_is_generated_without_tracing():
+    import api
+
+    tracing.configure(None)
+    resp = TestClient(api.app).get("/health")
+    assert len(resp.headers["x-request-id"]) == 32
+
+
+def test_otlp_payload_shape():
+    exporter = tracing.OTLPHttpExporter("http://collector:4318", interval=3600)
+    try:
+        span = tracing.Span("op", "a" * 32, "b" * 16, None, 1_000, {"n": 3, "ok": True, "s": "x"}, duration_ms=2.0)
+        payload = exporter._payload([span])
+        item = payload["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+        assert exporter.url == "http://collector:4318/v1/traces"
+        assert item["endTimeUnixNano"] == str(1_000 + 2_000_000)
+        assert {"key": "n", "value": {"intValue": "3"}} in item["attributes"]
+    finally:
+        exporter._stop.set()
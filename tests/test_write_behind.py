@@ -0,0 +1,126 @@
+import threading
+import time
+
+import pytest
+
+from library import Book, Library
+from storage import JsonFileStorage, Storage, WriteBehindStorage, storage_from_env
+
+
+class RecordingStorage(Storage):
+    def __init__(self, fail=0, delay=0.0):
+        self.writes = []
+        self.fail = fail
+        self.delay = delay
+
+    def read(self):
+        return self.writes[-1] if self.writes else []
+
+    def write(self, data):
+        time.sleep(self.delay)
+        if self.fail:
+            self.fail -= 1
+            raise OSError("disk dolu")
+        self.writes.append(list(data))
+
+
+def test_window_mode_coalesces_rapid_writes():
+    inner = RecordingStorage()
+    storage = WriteBehindStorage(inner, window=0.2)
+    lib = Library(storage=storage)
+    for i in range(5):
+        lib.add_book(Book(f"Kitap {i}", "Yazar", str(i)))
+    # İstek diski beklemez; değişiklik bellekte ve okuma tarafında görünür
+    assert inner.writes == []
+    assert len(storage.read()) == 5
+
+    assert storage.flush(timeout=2)
+    assert len(inner.writes) == 1 and len(inner.writes[0]) == 5
+    storage.close()
+
+
+def test_ack_mode_waits_and_groups_concurrent_writers():
+    inner = RecordingStorage(delay=0.02)
+    storage = WriteBehindStorage(inner, window=0.05, durability="ack")
+    lib = Library(storage=storage)
+    barrier = threading.Barrier(8)
+
+    def add(i):
+        barrier.wait()
+        lib.add_book(Book(f"Kitap {i}", "Yazar", str(i)))
+        # ack: add_book döndüğünde kitap diskte
+        assert any(str(i) in {b["isbn"] for b in w} for w in inner.writes)
+
+    threads = [threading.Thread(target=add, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(inner.writes[-1]) == 8
+    assert len(inner.writes) < 8
+    storage.close()
+
+
+def test_failed_write_is_reported_and_retried():
+    inner = RecordingStorage(fail=1)
+    storage = WriteBehindStorage(inner, window=0.01, durability="ack")
+    with pytest.raises(OSError):
+        storage.write([{"isbn": "1"}])
+        storage.sync()
+    assert isinstance(storage.last_error, OSError)
+    # Aynı veri tekrar denenir ve kapanışta yazılmış olur
+    storage.close()
+    assert inner.writes == [[{"isbn": "1"}]]
+
+
+def test_reads_are_not_blocked_by_a_slow_synchronous_write():
+    class GatedStorage(RecordingStorage):
+        def __init__(self):
+            super().__init__()
+            self.started, self.release = threading.Event(), threading.Event()
+
+        def write(self, data):
+            self.started.set()
+            self.release.wait(5)
+            super().write(data)
+
+    storage = GatedStorage()
+    lib = Library(storage=storage)
+    writer = threading.Thread(target=lib.add_book, args=(Book("Yavaş", "Yazar", "1"),))
+    writer.start()
+    assert storage.started.wait(2)
+    # Yazma sürerken okumalar ve başka değişiklikler beklemez
+    assert [b.isbn for b in lib.list_books()] == ["1"]
+    assert lib.stats()["books"] == 1
+    second = threading.Thread(target=lib.add_book, args=(Book("Sonraki", "Yazar", "2"),))
+    second.start()
+    while "2" not in lib:
+        time.sleep(0.01)
+    storage.release.set()
+    writer.join(2)
+    second.join(2)
+    # Kayıtlar sırayla yazılır; son yazılan en yeni görüntüdür
+    assert [[b["isbn"] for b in w] for w in storage.writes] == [["1"], ["1", "2"]]
+
+
+def test_from_env_and_api_shutdown_flush(monkeypatch, tmp_path):
+    from fastapi.testclient import TestClient
+
+    import api
+
+    monkeypatch.setenv("STORAGE_WRITE_BEHIND", "1")
+    monkeypatch.setenv("STORAGE_FLUSH_WINDOW_MS", "60000")
+    path = tmp_path / "lib.json"
+    storage = storage_from_env(str(path))
+    assert isinstance(storage, WriteBehindStorage) and storage.window == 60.0
+    monkeypatch.delenv("STORAGE_WRITE_BEHIND")
+    assert isinstance(storage_from_env(str(path)), JsonFileStorage)
+
+    lib = Library(storage=storage)
+    monkeypatch.setattr(api, "lib", lib)
+    with TestClient(api.app) as client:
+        assert client.get("/health").status_code == 200
+        lib.add_book(Book("Kitap", "Yazar", "1"))
+        assert not path.exists()
+    # Uygulama kapanırken bekleyen yazma diske geçer
+    assert JsonFileStorage(str(path)).read()[0]["isbn"] == "1"
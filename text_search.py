@@ -0,0 +1,242 @@
+"""Yazım hatalarına dayanıklı arama: Türkçe duyarlı katlama + trigram indeksi.
+
+``fold`` metni karşılaştırılabilir hale getirir: Türkçe büyük/küçük harf
+kuralları (I -> ı, İ -> i) uygulanır, aksanlar atılır (ç -> c, ğ -> g,
+ı -> i, ö -> o, ş -> s, ü -> u ...) ve harf/rakam dışı karakterler boşluğa
+çevrilir. Böylece "Cok Gezenti" ile "Çok Gezenti" aynı metne katlanır.
+
+``TrigramIndex`` her kelimenin 3'lü karakter parçalarını (trigram) ters
+indekste tutar. Sorgu, sorgunun trigramlarının en az ``min_score`` oranını
+içeren belgeleri döndürür. Posting listeleri ``array('i')`` olarak tutulur
+ve bir sorgu yalnızca kendi trigramlarının listelerini ``numpy.bincount``
+ile sayar; 1M başlıkta tipik bir sorgu birkaç milisaniye sürer.
+
+``PrefixIndex`` otomatik tamamlama içindir: başlık ve yazarlar katlanmış
+halleriyle sıralı bir dizide tutulur ve önek ``bisect`` ile bulunur.
+Eşleşmeler alfabetik değil, sıralanarak döner: metnin başıyla eşleşenler
+önce, sonra çok kitabı olanlar (``count``), eşitlikte alfabetik.
+"""
+
+from __future__ import annotations
+
+import bisect
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from array import array
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+
+_TURKISH = str.maketrans({"I": "ı", "İ": "i"})
+_ASCII = str.maketrans({"ı": "i", "ç": "c", "ğ": "g", "ö": "o", "ş": "s", "ü": "u", "â": "a", "î": "i", "û": "u"})
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+
+def fold(text: str) -> str:
+    """Turkish-aware lower-casing plus diacritic stripping, e.g. "ÇOK İYİ" -> "cok iyi"."""
+    text = text.translate(_TURKISH).lower().translate(_ASCII)
+    if not text.isascii():
+        text = "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+    return _NON_WORD.sub(" ", text).strip()
+
+
+def trigrams(folded: str) -> Set[str]:
+    grams: Set[str] = set()
+    for word in folded.split():
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return grams
+
+
+class TrigramIndex:
+    """Inverted trigram index over short texts keyed by any hashable id.
+
+    Postings are append-only ``array('i')`` lists of internal document ids, so
+    a query is scored by concatenating the query's posting lists and counting
+    them with ``numpy.bincount`` instead of intersecting Python sets. Removed
+    documents are tombstoned and the postings are rebuilt once tombstones
+    outnumber live documents.
+    """
+
+    def __init__(self) -> None:
+        self._postings: Dict[str, array] = {}
+        self._ids: Dict[Hashable, int] = {}
+        self._keys: List[Optional[Hashable]] = []  # belge id -> anahtar (silinmişse None)
+        self._texts: List[str] = []
+        self._sizes = array("i")  # belge başına trigram sayısı (Jaccard için)
+        self._alive = bytearray()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, key: Hashable, text: str) -> None:
+        folded = fold(text)
+        with self._lock:
+            if key in self._ids:
+                self._remove_locked(key)
+            self._add_locked(key, folded)
+
+    def _add_locked(self, key: Hashable, folded: str) -> None:
+        doc = len(self._keys)
+        self._ids[key] = doc
+        self._keys.append(key)
+        self._texts.append(folded)
+        self._alive.append(1)
+        grams = trigrams(folded)
+        self._sizes.append(len(grams))
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if posting is None:
+                self._postings[gram] = array("i", (doc,))
+            else:
+                posting.append(doc)
+
+    def remove(self, key: Hashable) -> None:
+        with self._lock:
+            self._remove_locked(key)
+
+    def _remove_locked(self, key: Hashable) -> None:
+        doc = self._ids.pop(key, None)
+        if doc is None:
+            return
+        self._keys[doc] = None
+        self._texts[doc] = ""
+        self._alive[doc] = 0
+        if len(self._keys) > 1024 and len(self._keys) > 2 * len(self._ids):
+            self._compact_locked()
+
+    def _compact_locked(self) -> None:
+        live = [(key, self._texts[doc]) for key, doc in self._ids.items()]
+        self._postings, self._ids, self._keys, self._texts = {}, {}, [], []
+        self._sizes, self._alive = array("i"), bytearray()
+        for key, folded in live:
+            self._add_locked(key, folded)
+
+    def search(self, query: str, limit: int = 10, min_score: float = 0.5) -> List[Tuple[Hashable, float]]:
+        """Return ``(key, score)`` pairs, best first.
+
+        ``score`` is the share of the query's trigrams found in the text;
+        ties are broken by Jaccard similarity, so shorter, closer texts win.
+        """
+        q = trigrams(fold(query))
+        if not q or limit <= 0:
+            return []
+        import numpy as np  # CLI/API açılışında yüklenmesin diye ilk aramada
+
+        need = max(1, math.ceil(min_score * len(q)))
+        with self._lock:
+            lists = [self._postings[g] for g in q if g in self._postings]
+            if len(lists) < need:
+                return []
+            # Her belgenin kaç sorgu trigramı içerdiği tek bir bincount ile sayılır;
+            # np.concatenate kopyaladığı için dizilere olan görünümler kilit içinde bırakılır
+            docs = np.concatenate([np.frombuffer(p, dtype=np.int32) for p in lists])
+            counts = np.bincount(docs, minlength=len(self._keys))
+            counts[np.frombuffer(self._alive, dtype=np.uint8) == 0] = 0
+            cand = np.flatnonzero(counts >= need)
+            if cand.size > limit:
+                # Yalnızca ilk `limit` paylaşım sayısına ulaşan adaylar sıralanır
+                shared = counts[cand]
+                kth = np.partition(shared, shared.size - limit)[shared.size - limit]
+                cand = cand[shared >= kth]
+            shared = counts[cand]
+            sizes = np.frombuffer(self._sizes, dtype=np.int32)[cand]
+            jaccard = shared / (len(q) + sizes - shared)
+            order = np.lexsort((-jaccard, -shared))[:limit]
+            return [(self._keys[int(cand[i])], round(int(shared[i]) / len(q), 4)) for i in order]
+
+
+class PrefixIndex:
+    """Sorted-array prefix index for autocomplete.
+
+    Each distinct text is stored once per word position, so "atay" completes
+    "Oğuz Atay" as well as "oguz"; ``count`` tracks how many books share the
+    text (e.g. an author's book count).
+
+    A lookup is one ``bisect`` plus a scan of the matching entries, at most
+    ``max_candidates`` of them; the top ``limit`` are then picked with
+    ``heapq.nsmallest`` by :func:`rank` (text-start matches first, then by
+    count). For very short prefixes only the first ``max_candidates``
+    matches in folded order are ranked.
+    """
+
+    max_candidates = 2000
+
+    def __init__(self) -> None:
+        self._entries: List[Tuple[str, str, int]] = []  # (katlanmış sonek, metin, kelime sırası), sıralı
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    @staticmethod
+    def _suffixes(text: str) -> List[Tuple[str, str, int]]:
+        words = fold(text).split()
+        return [(" ".join(words[i:]), text, i) for i in range(len(words))]
+
+    def add(self, text: str) -> None:
+        with self._lock:
+            count = self._counts.get(text, 0)
+            self._counts[text] = count + 1
+            if count == 0:
+                for entry in self._suffixes(text):
+                    bisect.insort(self._entries, entry)
+
+    def remove(self, text: str) -> None:
+        with self._lock:
+            count = self._counts.get(text, 0)
+            if count > 1:
+                self._counts[text] = count - 1
+                return
+            if count == 0:
+                return
+            del self._counts[text]
+            for entry in self._suffixes(text):
+                i = bisect.bisect_left(self._entries, entry)
+                if i < len(self._entries) and self._entries[i] == entry:
+                    del self._entries[i]
+
+    def bulk_load(self, texts: Iterable[str]) -> None:
+        """Replace the contents with ``texts`` using a single sort."""
+        counts: Dict[str, int] = {}
+        for text in texts:
+            counts[text] = counts.get(text, 0) + 1
+        entries = [entry for text in counts for entry in self._suffixes(text)]
+        entries.sort()
+        with self._lock:
+            self._entries, self._counts = entries, counts
+
+    def ranked(self, prefix: str, limit: int = 10) -> List[Tuple[Tuple[bool, int, str], str, int]]:
+        """Up to ``limit`` ``(rank key, text, count)``, best first; keys of several indexes compare."""
+        p = fold(prefix)
+        if not p or limit <= 0:
+            return []
+        best: Dict[str, Tuple[int, str]] = {}  # metin -> (ilk eşleşen kelime sırası, sonek)
+        with self._lock:
+            entries = self._entries
+            i = bisect.bisect_left(entries, (p,))
+            end = min(len(entries), i + self.max_candidates)
+            while i < end:
+                suffix, text, start = entries[i]
+                if not suffix.startswith(p):
+                    break
+                i += 1
+                if text not in best or start < best[text][0]:
+                    best[text] = (start, suffix)
+            candidates = [(rank(start, self._counts[text], suffix), text, self._counts[text])
+                          for text, (start, suffix) in best.items()]
+        return heapq.nsmallest(limit, candidates)
+
+    def complete(self, prefix: str, limit: int = 10) -> List[Tuple[str, int]]:
+        """Return up to ``limit`` ``(text, count)`` completions, best ranked first."""
+        return [(text, count) for _, text, count in self.ranked(prefix, limit)]
+
+
+def rank(start: int, count: int, folded: str) -> Tuple[bool, int, str]:
+    """Completion order: matches at the start of the text, then more books, then alphabetical."""
+    return (start > 0, -count, folded)
@@ -0,0 +1,223 @@
+"""Open Library çağrıları için istemci tarafı istek zamanlayıcı.
+
+- Global saniye başına istek bütçesi (AIMD: 429/503'te yarıya iner,
+  başarılı yanıtlarla yavaşça tekrar artar)
+- Jitter'lı üstel geri çekilme ve ``Retry-After`` desteği
+- Art arda hatalarda devreyi açan circuit breaker
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Optional
+
+
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+THROTTLE_STATUS = frozenset({429, 503})
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without contacting upstream while the circuit is open."""
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Parse a ``Retry-After`` header (delta seconds or HTTP date) into seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when is None:
+        return None
+    return max(0.0, when.timestamp() - (time.time() if now is None else now))
+
+
+class CircuitBreaker:
+    """closed -> open after ``failure_threshold`` consecutive failures,
+    half-open after ``reset_timeout`` (a single trial request), then closed again on success."""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+            self._trial_in_flight = False
+
+
+class RequestScheduler:
+    """Paces, retries and guards calls that return an ``httpx.Response``.
+
+    ``rate`` is the starting requests-per-second budget shared by every
+    thread using this scheduler. It is halved on 429/503 (never below
+    ``min_rate``), at most once per window: throttled responses to requests
+    sent before the last decrease are not counted again. Each success grows
+    it by ``rate_growth`` of the current rate (at least ``rate_step``) up to
+    ``max_rate``, so recovery takes a similar number of requests at any
+    rate and bulk ingest settles at the highest rate upstream accepts.
+    """
+
+    def __init__(
+        self,
+        rate: float = 5.0,
+        min_rate: float = 0.5,
+        max_rate: float = 20.0,
+        rate_step: float = 0.1,
+        rate_growth: float = 0.05,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_cap: float = 30.0,
+        max_retry_after: float = 60.0,
+        breaker: Optional[CircuitBreaker] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate_step = rate_step
+        self.rate_growth = rate_growth
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.max_retry_after = max_retry_after
+        self.breaker = breaker or CircuitBreaker(clock=clock)
+        self._clock = clock
+        self._sleep = sleep
+        self._rng = rng or random.Random()
+        self._next_slot = 0.0
+        self._paused_until = 0.0
+        self._last_decrease = float("-inf")
+        self._lock = threading.Lock()
+
+    def _acquire(self) -> None:
+        """Reserve the next send slot and sleep until it arrives."""
+        with self._lock:
+            now = self._clock()
+            slot = max(now, self._next_slot, self._paused_until)
+            self._next_slot = slot + 1.0 / self.rate
+        delay = slot - now
+        if delay > 0:
+            self._sleep(delay)
+
+    def _pause(self, seconds: float) -> None:
+        # Retry-After tüm çağıranlar için geçerlidir
+        with self._lock:
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+    def _on_throttled(self, sent_at: float) -> None:
+        with self._lock:
+            # Eşzamanlı bir patlamanın 429'ları aynı aşırı yükü bildirir; tek düşüş yeterli
+            if sent_at < self._last_decrease:
+                return
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._last_decrease = self._clock()
+
+    def _on_success(self) -> None:
+        with self._lock:
+            # Orantılı artış: düşük hızdan geri dönüş dakikalar sürmez
+            step = max(self.rate_step, self.rate * self.rate_growth)
+            self.rate = min(self.max_rate, self.rate + step)
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for retry number ``attempt`` (0-based)."""
+        return self._rng.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    def execute(self, send: Callable[[], Any]) -> Any:
+        """Call ``send()`` under the budget, retrying transient failures.
+
+        Returns the final response (possibly still a 4xx/5xx once retries are
+        exhausted). Network errors are re-raised after the last attempt; any
+        other exception from ``send()`` counts as a breaker failure and is
+        re-raised at once.
+        """
+        import httpx
+
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                raise CircuitOpenError("Open Library geçici olarak devre dışı (circuit open)")
+            self._acquire()
+            sent_at = self._clock()
+            try:
+                resp = send()
+            except httpx.RequestError:
+                self.breaker.record_failure()
+                if attempt >= self.max_retries:
+                    raise
+                self._sleep(self.backoff(attempt))
+                attempt += 1
+                continue
+            except BaseException:
+                # Beklenmeyen hata da sonuçtur: yarı açık denemesi serbest kalmazsa devre hiç kapanmaz
+                self.breaker.record_failure()
+                raise
+
+            if resp.status_code not in RETRYABLE_STATUS:
+                self.breaker.record_success()
+                self._on_success()
+                return resp
+
+            if resp.status_code == 429:
+                # Upstream ayakta, sadece yavaşlamamızı istiyor
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure()
+            retry_after = parse_retry_after(resp.headers.get("retry-after"))
+            if retry_after is not None:
+                self._pause(min(retry_after, self.max_retry_after))
+            if resp.status_code in THROTTLE_STATUS:
+                self._on_throttled(sent_at)
+            if attempt >= self.max_retries:
+                return resp
+            # Retry-After pause'u _acquire içinde uygulanır
+            if retry_after is None:
+                self._sleep(self.backoff(attempt))
+            attempt += 1
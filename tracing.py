@@ -0,0 +1,324 @@
+"""Hafif, span tabanlı istek izleme.
+
+Bir HTTP isteği ``TracingMiddleware`` içinde kök span açar; ``Library``,
+depolama ve Open Library istemcisi aynı ``contextvars`` bağlamında alt
+span'ler açar. Böylece tek bir ``POST /books`` isteğinin edition/yazar
+çağrıları ve ``save_books`` süresi aynı ``trace_id`` altında görülür.
+FastAPI senkron endpoint'leri thread havuzunda bağlamı kopyalayarak
+çalıştırdığı için ek bir şey gerekmez.
+
+Dışa aktarma ortam değişkenleriyle açılır:
+
+- ``TRACE_FILE=traces.jsonl``: her span bir JSON satırı olarak yazılır
+- ``OTEL_EXPORTER_OTLP_ENDPOINT=http://localhost:4318``: OTLP/HTTP (JSON)
+  ile toplu gönderim
+
+Hiçbiri tanımlı değilse ``span()`` hiçbir şey yapmayan ortak bir nesne
+döndürür; yalnızca ``X-Request-ID`` başlığı yanıtlara eklenmeye devam eder.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    duration_ms: float = 0.0
+    status: str = "ok"
+    error: Optional[str] = None
+    _started: float = field(default=0.0, repr=False)
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data.pop("_started")
+        return data
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+_request_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def current_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+class SpanExporter:
+    def export(self, span: Span) -> None:
+        raise NotImplementedError
+
+    def shutdown(self) -> None:
+        pass
+
+
+class JsonLinesExporter(SpanExporter):
+    """Append each finished span to a JSON-lines file."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8", buffering=1)
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.as_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OTLPHttpExporter(SpanExporter):
+    """Batch spans to an OTLP/HTTP collector using the JSON encoding.
+
+    A background thread posts at most every ``interval`` seconds; when the
+    buffer is full new spans are dropped rather than slowing requests down.
+    """
+
+    def __init__(self, endpoint: str, service_name: str = "kutuphane-api", interval: float = 2.0,
+                 max_queue: int = 10000, batch_size: int = 512, timeout: float = 5.0) -> None:
+        self.url = endpoint.rstrip("/") + "/v1/traces" if not endpoint.endswith("/v1/traces") else endpoint
+        self.service_name = service_name
+        self.interval = interval
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.dropped = 0
+        self._queue: "queue.Queue[Span]" = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="otlp-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _payload(self, spans: List[Span]) -> Dict[str, Any]:
+        out = []
+        for s in spans:
+            end_ns = s.start_ns + int(s.duration_ms * 1_000_000)
+            item = {
+                "traceId": s.trace_id,
+                "spanId": s.span_id,
+                "name": s.name,
+                "kind": 2 if s.parent_id is None else 1,
+                "startTimeUnixNano": str(s.start_ns),
+                "endTimeUnixNano": str(end_ns),
+                "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()],
+                "status": {"code": 2, "message": s.error or ""} if s.status == "error" else {"code": 1},
+            }
+            if s.parent_id:
+                item["parentSpanId"] = s.parent_id
+            out.append(item)
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+                "scopeSpans": [{"scope": {"name": "tracing"}, "spans": out}],
+            }]
+        }
+
+    def _drain(self) -> List[Span]:
+        spans: List[Span] = []
+        while len(spans) < self.batch_size:
+            try:
+                spans.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return spans
+
+    def flush(self) -> None:
+        import httpx
+
+        while True:
+            spans = self._drain()
+            if not spans:
+                return
+            try:
+                httpx.post(self.url, json=self._payload(spans), timeout=self.timeout)
+            except httpx.HTTPError:
+                # Toplayıcı erişilemezse iz kaybolur; uygulama etkilenmez
+                self.dropped += len(spans)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def shutdown(self) -> None:
+        self._stop.set()
+        self._thread.join(self.timeout)
+        self.flush()
+
+
+class _NoopSpan:
+    """Shared stand-in used while tracing is disabled."""
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class _SpanContext:
+    __slots__ = ("tracer", "span", "_token")
+
+    def __init__(self, tracer: "Tracer", span: Span) -> None:
+        self.tracer = tracer
+        self.span = span
+
+    def __enter__(self) -> Span:
+        self._token = _current_span.set(self.span)
+        self.span._started = time.perf_counter()
+        return self.span
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        span = self.span
+        span.duration_ms = round((time.perf_counter() - span._started) * 1000, 3)
+        if exc is not None:
+            span.status = "error"
+            span.error = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self._token)
+        self.tracer._finish(span)
+
+
+class Tracer:
+    def __init__(self, exporters: Optional[List[SpanExporter]] = None) -> None:
+        self.exporters: List[SpanExporter] = list(exporters or [])
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.exporters)
+
+    @classmethod
+    def from_env(cls) -> "Tracer":
+        exporters: List[SpanExporter] = []
+        path = os.getenv("TRACE_FILE")
+        if path:
+            exporters.append(JsonLinesExporter(path))
+        endpoint = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
+        if endpoint:
+            exporters.append(OTLPHttpExporter(endpoint, service_name=os.getenv("OTEL_SERVICE_NAME", "kutuphane-api")))
+        return cls(exporters)
+
+    def span(self, name: str, **attributes: Any) -> Any:
+        if not self.exporters:
+            return _NOOP
+        parent = _current_span.get()
+        if parent is not None:
+            trace_id, parent_id = parent.trace_id, parent.span_id
+        else:
+            trace_id, parent_id = uuid.uuid4().hex, None
+        rid = _request_id.get()
+        if rid is not None:
+            attributes.setdefault("request_id", rid)
+        span = Span(name, trace_id, uuid.uuid4().hex[:16], parent_id, time.time_ns(), attributes)
+        return _SpanContext(self, span)
+
+    def _finish(self, span: Span) -> None:
+        for exporter in self.exporters:
+            try:
+                exporter.export(span)
+            except Exception:
+                pass  # İzleme hatası isteği bozmamalı
+
+    def shutdown(self) -> None:
+        for exporter in self.exporters:
+            exporter.shutdown()
+        self.exporters = []
+
+
+TRACER = Tracer.from_env()
+
+
+def span(name: str, **attributes: Any) -> Any:
+    """``with span("library.save_books", books=n) as s: ...`` on the global tracer."""
+    return TRACER.span(name, **attributes)
+
+
+def configure(exporters: Optional[List[SpanExporter]]) -> Tracer:
+    """Replace the global tracer's exporters (``None``/empty disables tracing)."""
+    TRACER.shutdown()
+    TRACER.exporters = list(exporters or [])
+    return TRACER
+
+
+class TracingMiddleware:
+    """ASGI middleware: request id handling plus a root span per request.
+
+    The incoming ``X-Request-ID`` is reused (or a new one generated) and
+    echoed on the response, so client logs can be joined with the traces.
+    """
+
+    header = b"x-request-id"
+
+    def __init__(self, app: Any, tracer: Optional[Tracer] = None) -> None:
+        self.app = app
+        self.tracer = tracer or TRACER
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = dict(scope.get("headers") or []).get(self.header)
+        request_id = incoming.decode("latin-1")[:128] if incoming else uuid.uuid4().hex
+        rid_token = _request_id.set(request_id)
+        status_code = 500
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((self.header, request_id.encode("latin-1")))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            with self.tracer.span(f"{scope['method']} {scope['path']}", method=scope["method"], path=scope["path"]) as s:
+                await self.app(scope, receive, send_wrapper)
+                route = scope.get("route")
+                if route is not None:
+                    s.set("route", getattr(route, "path", ""))
+                s.set("status", status_code)
+        finally:
+            _request_id.reset(rid_token)